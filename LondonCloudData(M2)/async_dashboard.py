@@ -0,0 +1,336 @@
+"""
+Asyncio variant of WeatherDashboard built on the async Firestore client.
+
+Methods mirror WeatherDashboard but are coroutines, so independent queries
+(several date ranges, locations or users) can run concurrently with
+asyncio.gather. Every Firestore round-trip takes a slot from a shared
+semaphore, which bounds the number of requests in flight however many
+coroutines are gathered.
+
+Run `python async_dashboard.py` with FIRESTORE_EMULATOR_HOST set to compare
+fan-out latency with the synchronous dashboard against the emulator.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import firebase_admin
+import pandas as pd
+from firebase_admin import credentials, firestore, firestore_async
+from firebase_admin.exceptions import FirebaseError
+import london_data_bridge  # noqa: F401
+from aggregates import AggregateCube
+from monthly_rollups import (ROLLUP_COLLECTION, ROLLUP_STATE_COLLECTION, ROLLUP_STATE_DOCUMENT,
+                             rollups_to_frame, write_days_with_rollups_async)
+from sync_manifest import LONDON_WEATHER_MANIFEST, record_saved
+from weather_dashboard import WeatherDashboard
+from weather_serializer import FIRESTORE_BATCH_LIMIT, chunked, frame_to_documents
+from write_behind import observation_id
+
+class AsyncWeatherDashboard:
+    """
+    Non-blocking counterpart of WeatherDashboard.
+
+    The async client and the concurrency semaphore belong to the event loop
+    that first uses them, so use one instance from a single loop.
+    """
+
+    LONDON_WEATHER_FIELDS = WeatherDashboard.LONDON_WEATHER_FIELDS
+
+    # Validation and cube upkeep are shared with the synchronous dashboard
+    _validate_preferences = WeatherDashboard._validate_preferences
+    _validate_weather_data = WeatherDashboard._validate_weather_data
+    _update_monthly_cube = WeatherDashboard._update_monthly_cube
+
+    def __init__(self, credentials_path: str, max_concurrency: int = 32):
+        """
+        Initialize Firebase connection with credentials.
+
+        Args:
+            credentials_path: Path to Firebase credentials JSON file
+            max_concurrency: Maximum Firestore requests in flight at once
+
+        Raises:
+            ConnectionError: If Firebase initialization fails
+        """
+        try:
+            try:
+                firebase_admin.get_app()
+            except ValueError:
+                cred = credentials.Certificate(credentials_path)
+                firebase_admin.initialize_app(cred)
+
+            self.db = firestore_async.client()
+            self._limit = asyncio.Semaphore(max_concurrency)
+            self._monthly_cube = None
+        except Exception as e:
+            raise ConnectionError(f"Failed to initialize Firebase: {str(e)}")
+
+    async def _stream(self, query) -> list:
+        async with self._limit:
+            return [doc async for doc in query.stream()]
+
+    async def save_weather_preferences(self, user_id: str, preferences: Dict) -> None:
+        """
+        Save user preferences for weather tracking.
+
+        Raises:
+            FirebaseError: If preferences are invalid or the write fails
+        """
+        try:
+            self._validate_preferences(preferences)
+            async with self._limit:
+                await self.db.collection('user_preferences').document(user_id).set(preferences)
+        except Exception as e:
+            raise FirebaseError(f"Failed to save preferences: {str(e)}")
+
+    async def save_weather_preferences_many(self, preferences: Dict[str, Dict]) -> int:
+        """
+        Save preferences for many users, committing batches of 500 concurrently.
+
+        Every entry is validated before anything is written.
+
+        Returns:
+            Number of users saved
+        """
+        try:
+            for data in preferences.values():
+                self._validate_preferences(data)
+
+            async def commit(chunk):
+                batch = self.db.batch()
+                for user_id, data in chunk:
+                    batch.set(self.db.collection('user_preferences').document(user_id), data)
+                async with self._limit:
+                    await batch.commit()
+
+            items = list(preferences.items())
+            await asyncio.gather(*(commit(chunk) for chunk in chunked(items, FIRESTORE_BATCH_LIMIT)))
+            return len(items)
+        except Exception as e:
+            raise FirebaseError(f"Failed to save preferences: {str(e)}")
+
+    async def save_weather_data(self, location: str, data: Dict) -> str:
+        """
+        Save weather data for a specific location.
+
+        Returns:
+            ID of the weather_data document
+
+        Raises:
+            ValueError: If data format is invalid
+            FirebaseError: If database operation fails
+        """
+        self._validate_weather_data(data)
+        try:
+            timestamp = datetime.now().isoformat()
+            weather_data = {
+                'location': location,
+                'temperature': data['temperature'],
+                'humidity': data['humidity'],
+                'conditions': data['conditions'],
+                'timestamp': timestamp
+            }
+            doc_id = observation_id(timestamp)
+            async with self._limit:
+                await self.db.collection('weather_data').document(doc_id).set(weather_data)
+            return doc_id
+        except Exception as e:
+            raise FirebaseError(f"Failed to save weather data: {str(e)}")
+
+    async def save_london_weather_data(self, df, manifest_path=LONDON_WEATHER_MANIFEST) -> int:
+        """
+        Save London weather data from DataFrame to Firestore.
+
+        As WeatherDashboard.save_london_weather_data: payloads are merged into
+        the daily documents together with their monthly rollups, in
+        transactions of up to 400 days that run concurrently, and recorded in
+        the sync manifest at `manifest_path` if it exists.
+
+        Returns:
+            Number of daily documents written
+        """
+        doc_ids, payloads = frame_to_documents(df, self.LONDON_WEATHER_FIELDS)
+        written = await write_days_with_rollups_async(self.db, doc_ids, payloads, merge=True,
+                                                      limit=self._limit)
+        record_saved(manifest_path, doc_ids, payloads)
+        self._update_monthly_cube(df)
+        return written
+
+    async def get_user_preferences(self, user_id):
+        """
+        Retrieve user preferences
+        """
+        async with self._limit:
+            doc = await self.db.collection('user_preferences').document(user_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def get_user_preferences_many(self, user_ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Retrieve preferences for many users, keyed by user ID, with one
+        get_all request per 500 users
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        collection = self.db.collection('user_preferences')
+
+        async def fetch(chunk):
+            async with self._limit:
+                return [snap async for snap in
+                        self.db.get_all([collection.document(user_id) for user_id in chunk])]
+
+        result = {user_id: None for user_id in user_ids}
+        for snaps in await asyncio.gather(*(fetch(chunk) for chunk in
+                                            chunked(user_ids, FIRESTORE_BATCH_LIMIT))):
+            for snap in snaps:
+                if snap.exists:
+                    result[snap.id] = snap.to_dict()
+        return result
+
+    async def update_preference(self, user_id, updates):
+        """
+        Update specific user preferences
+        """
+        async with self._limit:
+            await self.db.collection('user_preferences').document(user_id).update(updates)
+
+    async def delete_preference(self, user_id):
+        """
+        Delete a user's preferences
+        """
+        async with self._limit:
+            await self.db.collection('user_preferences').document(user_id).delete()
+
+    async def get_weather_history(self, location, limit=10):
+        """
+        Retrieve weather history for a location
+        """
+        query = (self.db.collection('weather_data')
+                 .where('location', '==', location)
+                 .order_by('timestamp', direction=firestore.Query.DESCENDING)
+                 .limit(limit))
+        return [doc.to_dict() for doc in await self._stream(query)]
+
+    async def get_weather_history_many(self, locations: Iterable[str],
+                                       limit=10) -> Dict[str, List[Dict]]:
+        """
+        Retrieve weather history for several locations concurrently
+        """
+        locations = list(locations)
+        histories = await asyncio.gather(*(self.get_weather_history(location, limit)
+                                           for location in locations))
+        return dict(zip(locations, histories))
+
+    async def get_london_weather_history(self, start_date=None, end_date=None, limit=None,
+                                         page_size=500):
+        """
+        Retrieve London weather history with optional date filtering, ordered by date.
+
+        Pages are fetched one after another with start_after cursors, as in
+        WeatherDashboard.iter_london_weather; use get_london_weather_ranges to
+        fetch several ranges at once.
+        """
+        query = self.db.collection('london_weather')
+        if start_date:
+            query = query.where('date', '>=', start_date.isoformat())
+        if end_date:
+            query = query.where('date', '<=', end_date.isoformat())
+        query = query.order_by('date')
+
+        history, last_doc = [], None
+        while limit is None or len(history) < limit:
+            size = page_size if limit is None else min(page_size, limit - len(history))
+            page = query.limit(size)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+            docs = await self._stream(page)
+            history.extend(doc.to_dict() for doc in docs)
+            if len(docs) < size:
+                break
+            last_doc = docs[-1]
+        return history
+
+    async def get_london_weather_ranges(self, ranges: Sequence[Tuple[Optional[datetime],
+                                                                     Optional[datetime]]],
+                                        page_size=500) -> List[List[Dict]]:
+        """
+        Retrieve London weather history for several (start_date, end_date)
+        ranges concurrently, returning one history per range in order
+        """
+        return list(await asyncio.gather(*(
+            self.get_london_weather_history(start, end, page_size=page_size)
+            for start, end in ranges)))
+
+    async def get_monthly_averages(self):
+        """
+        Calculate monthly temperature averages from stored data
+
+        Served from the london_weather_monthly rollup documents once they are
+        known to be complete, otherwise from an aggregate over the daily
+        documents.
+        """
+        async with self._limit:
+            state = await (self.db.collection(ROLLUP_STATE_COLLECTION)
+                           .document(ROLLUP_STATE_DOCUMENT).get())
+        if state.exists and state.get('complete'):
+            rows = {doc.id: doc.to_dict()
+                    for doc in await self._stream(self.db.collection(ROLLUP_COLLECTION))}
+            rollups = rollups_to_frame(rows)
+            if 'mean_temp_mean' in rollups.columns:
+                monthly_avg = rollups['mean_temp_mean'].dropna()
+                return {pd.Period(month, 'M'): mean for month, mean in monthly_avg.items()}
+
+        if self._monthly_cube is None:
+            docs = await self._stream(self.db.collection('london_weather').select(['date', 'mean_temp']))
+            df = pd.DataFrame([doc.to_dict() for doc in docs])
+            df['date'] = pd.to_datetime(df['date'])
+            self._monthly_cube = AggregateCube(df)
+        monthly_avg = self._monthly_cube.mean('mean_temp', 'year_month')
+        monthly_avg.index = monthly_avg.index.to_period('M')
+        return monthly_avg.to_dict()
+
+def benchmark(years: int = 10, users: int = 200):
+    """
+    Time a fan-out workload (one range per year, plus per-user preference
+    reads) sequentially on WeatherDashboard and gathered on this class.
+    """
+    import os
+    import time
+
+    if not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        print("Set FIRESTORE_EMULATOR_HOST to run the benchmark against the emulator")
+        return
+
+    sync_dashboard = WeatherDashboard('./firebase_credentials.json')
+    async_dashboard = AsyncWeatherDashboard('./firebase_credentials.json')
+    last_year = datetime.now().year
+    ranges = [(datetime(year, 1, 1), datetime(year, 12, 31))
+              for year in range(last_year - years, last_year)]
+    user_ids = [f'user{i}' for i in range(users)]
+    sync_dashboard.save_weather_preferences_many(
+        {user_id: {'favorite_locations': ['London'], 'temperature_unit': 'Celsius'}
+         for user_id in user_ids})
+
+    start = time.perf_counter()
+    for start_date, end_date in ranges:
+        sync_dashboard.get_london_weather_history(start_date, end_date)
+    for user_id in user_ids:
+        sync_dashboard.preferences.invalidate()
+        sync_dashboard.get_user_preferences(user_id)
+    sync_seconds = time.perf_counter() - start
+
+    async def fan_out():
+        await asyncio.gather(async_dashboard.get_london_weather_ranges(ranges),
+                             *(async_dashboard.get_user_preferences(user_id)
+                               for user_id in user_ids))
+
+    start = time.perf_counter()
+    asyncio.run(fan_out())
+    async_seconds = time.perf_counter() - start
+
+    print(f"{len(ranges)} date ranges + {users} preference reads")
+    print(f"WeatherDashboard, sequential: {sync_seconds:.2f}s")
+    print(f"AsyncWeatherDashboard, gathered: {async_seconds:.2f}s "
+          f"({sync_seconds / async_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    benchmark()
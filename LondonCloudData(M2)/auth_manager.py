@@ -1,9 +1,101 @@
 from firebase_admin import auth
-from typing import Dict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+# auth.import_users accepts at most this many accounts per call
+IMPORT_BATCH_SIZE = 1000
+
+# PBKDF2 rounds used when hashing plaintext passwords for import (Firebase
+# accepts 0-120000)
+PASSWORD_HASH_ROUNDS = 10000
+
+class TokenCache:
+    """
+    LRU cache of verified ID token claims.
+
+    Entries are kept until the token's `exp` claim, so an expired token is
+    always re-verified (and rejected) by Firebase. Verification failures are
+    never cached.
+
+    Args:
+        max_size: Maximum cached tokens; the least recently used is evicted
+        revocation_interval: Seconds after which a cached token is verified
+            again with check_revoked=True; None skips revocation checks
+        clock: Time source returning seconds since the epoch
+        verify: Verification function, auth.verify_id_token by default
+    """
+
+    def __init__(self, max_size: int = 1024, revocation_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.time, verify: Optional[Callable] = None):
+        self.max_size = max_size
+        self.revocation_interval = revocation_interval
+        self.clock = clock
+        self._verify = verify
+        self._entries: 'OrderedDict[str, Tuple[Dict, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revocation_checks = 0
+
+    def verify(self, id_token: str) -> Dict:
+        """Return the token's claims, calling Firebase only on a miss."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(id_token)
+            if entry is not None and entry[0]['exp'] <= now:
+                del self._entries[id_token]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            elif (self.revocation_interval is None
+                  or now - entry[1] < self.revocation_interval):
+                self._entries.move_to_end(id_token)
+                self.hits += 1
+                return dict(entry[0])
+            else:
+                self.revocation_checks += 1
+
+        verify = self._verify or auth.verify_id_token
+        try:
+            claims = verify(id_token, check_revoked=self.revocation_interval is not None)
+        except Exception:
+            self.invalidate(id_token)
+            raise
+
+        with self._lock:
+            self._entries[id_token] = (claims, now)
+            self._entries.move_to_end(id_token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return dict(claims)
+
+    def invalidate(self, id_token: Optional[str] = None) -> None:
+        """Drop one cached token, or all of them."""
+        with self._lock:
+            if id_token is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(id_token, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'revocation_checks': self.revocation_checks}
+
+def _hash_password(password: str, salt: bytes, rounds: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, rounds)
 
 class AuthManager:
     """Manages user authentication for the WeatherDashboard."""
 
+    # Shared by all verify_token calls; replace to change size or revocation checks
+    token_cache = TokenCache()
+
     @staticmethod
     def create_user(email: str, password: str) -> Dict:
         """
@@ -28,11 +120,58 @@ class AuthManager:
         except auth.AuthError as e:
             raise auth.AuthError(f"Failed to create user: {str(e)}")
 
+    @staticmethod
+    def create_users(accounts: Iterable[Tuple[str, str]],
+                     rounds: int = PASSWORD_HASH_ROUNDS) -> Dict[str, List]:
+        """
+        Create many user accounts with auth.import_users.
+
+        Passwords are hashed locally with salted PBKDF2-SHA256, which Firebase
+        accepts for import, so users sign in with the passwords given here.
+        Accounts are sent in batches of 1000, one request per batch.
+
+        Args:
+            accounts: (email, password) pairs
+            rounds: PBKDF2 iterations
+
+        Returns:
+            Dict with 'created', a list of {'uid', 'email'} dicts, and
+            'errors', a list of (email, reason) pairs
+
+        Raises:
+            firebase_admin.exceptions.FirebaseError: If an import request fails
+        """
+        hash_alg = auth.UserImportHash.pbkdf2_sha256(rounds=rounds)
+        records = []
+        for email, password in accounts:
+            salt = os.urandom(16)
+            records.append(auth.ImportUserRecord(
+                uid=uuid.uuid4().hex,
+                email=email,
+                password_hash=_hash_password(password, salt, rounds),
+                password_salt=salt,
+            ))
+
+        created, errors = [], []
+        for start in range(0, len(records), IMPORT_BATCH_SIZE):
+            batch = records[start:start + IMPORT_BATCH_SIZE]
+            result = auth.import_users(batch, hash_alg=hash_alg)
+            failed = {error.index: error.reason for error in result.errors}
+            for index, record in enumerate(batch):
+                if index in failed:
+                    errors.append((record.email, failed[index]))
+                else:
+                    created.append({'uid': record.uid, 'email': record.email})
+        return {'created': created, 'errors': errors}
+
     @staticmethod
     def verify_token(id_token: str) -> Dict:
         """
         Verify a user's ID token.
 
+        Claims of recently verified tokens are served from
+        AuthManager.token_cache until the token expires.
+
         Args:
             id_token: Firebase ID token
 
@@ -40,10 +179,9 @@ class AuthManager:
             Dict containing verified token claims
 
         Raises:
-            auth.AuthError: If token verification fails
+            auth.InvalidIdTokenError: If token verification fails
+            auth.ExpiredIdTokenError: If the token has expired
+            auth.RevokedIdTokenError: If revocation checks are enabled and the
+                token has been revoked
         """
-        try:
-            decoded_token = auth.verify_id_token(id_token)
-            return decoded_token
-        except auth.AuthError as e:
-            raise auth.AuthError(f"Invalid token: {str(e)}")
\ No newline at end of file
+        return AuthManager.token_cache.verify(id_token)
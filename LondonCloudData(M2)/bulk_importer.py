@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import pandas as pd
+from google.api_core import exceptions as api_exceptions
+from firebase_admin import exceptions as firebase_exceptions
+from weather_serializer import FIRESTORE_BATCH_LIMIT, frame_to_documents, chunked
+from sync_manifest import SyncManifest, SyncPlan
+from monthly_rollups import ROLLUP_CHUNK_SIZE, write_days_with_rollups
+
+def is_quota_error(error: Exception) -> bool:
+    """Return True for RESOURCE_EXHAUSTED errors, the only ones worth backing off on."""
+    return isinstance(error, (api_exceptions.ResourceExhausted,
+                              firebase_exceptions.ResourceExhaustedError))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting writes per second.
+
+    The rate adapts: it is halved when Firestore reports RESOURCE_EXHAUSTED and
+    grows back additively after each successful commit, up to `max_rate`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, min_rate: float = 1.0,
+                 max_rate: Optional[float] = None, clock: Callable = time.monotonic,
+                 sleep: Callable = time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> None:
+        """Block until `tokens` writes may proceed."""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            # Sleep without the lock so backoff() and increase() aren't blocked
+            self._sleep(wait)
+
+    def backoff(self, factor: float = 0.5) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * factor)
+
+    def increase(self, step: float) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + step)
+
+class ImportCheckpoint:
+    """Persists the last committed date so an interrupted import can resume."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[str]:
+        try:
+            with open(self.path) as f:
+                return json.load(f).get('last_committed_date')
+        except (OSError, ValueError):
+            return None
+
+    def save(self, last_date: str) -> None:
+        # Write then rename so a crash never leaves a half-written checkpoint
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'last_committed_date': last_date}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class BulkImporter:
+    """
+    Imports a weather DataFrame into Firestore with batched commits.
+
+    Rows are committed in date order through an adaptive TokenBucket, each
+    batch in one transaction that also updates the monthly rollup documents.
+    With max_workers > 1, that many batches are committed concurrently as a
+    wave. The last date is checkpointed once every batch up to it has
+    committed, so a restarted import skips everything already written.
+
+    With a manifest, no checkpoint is kept. Every row is compared against the
+    manifest's content hashes instead, so only new or changed documents are
+    written, a restarted import skips the waves already recorded, and a re-run
+    costs writes proportional to the delta.
+    """
+
+    def __init__(self, db, collection: str = 'london_weather',
+                 checkpoint_path: str = 'import_checkpoint.json',
+                 batch_size: int = ROLLUP_CHUNK_SIZE, rate: float = 500,
+                 max_rate: float = 5000, max_retries: int = 8,
+                 limiter: Optional[TokenBucket] = None, max_workers: int = 1,
+                 manifest_path: Optional[str] = None):
+        """
+        Args:
+            db: Firestore client (or fake_firestore.FakeFirestore)
+            collection: Destination collection
+            checkpoint_path: JSON file recording the last committed date, used
+                when there is no manifest
+            batch_size: Days per commit; batches over 400 days are split
+            rate: Initial writes per second
+            max_rate: Ceiling the rate recovers towards after backoffs
+            max_retries: Quota errors tolerated for a single batch before giving up
+            limiter: Optional pre-configured TokenBucket
+            max_workers: Batches committed concurrently from a thread pool
+            manifest_path: Optional SyncManifest file enabling diff-based upserts
+        """
+        if not 0 < batch_size <= FIRESTORE_BATCH_LIMIT:
+            raise ValueError(f"batch_size must be between 1 and {FIRESTORE_BATCH_LIMIT}")
+        self.db = db
+        self.collection = collection
+        self.checkpoint = ImportCheckpoint(checkpoint_path)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.max_workers = max_workers
+        self.limiter = limiter or TokenBucket(rate, capacity=batch_size, max_rate=max_rate)
+        self.manifest = SyncManifest(manifest_path) if manifest_path else None
+
+    def pending_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return the rows not yet covered by the checkpoint, in date order."""
+        df = df.dropna(subset=['date', 'mean_temp']).sort_values('date')
+        last_date = self.checkpoint.load() if self.manifest is None else None
+        if last_date:
+            df = df[df['date'] > pd.Timestamp(last_date)]
+        return df
+
+    def _commit_with_backoff(self, chunk) -> int:
+        doc_ids, payloads = chunk
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(len(doc_ids))
+            try:
+                # Retrying is safe: rewriting a day replaces its rollup contribution
+                write_days_with_rollups(self.db, doc_ids, payloads, self.collection)
+                self.limiter.increase(len(doc_ids) / 10)
+                return len(doc_ids)
+            except Exception as e:
+                if not is_quota_error(e) or attempt == self.max_retries:
+                    raise
+                self.limiter.backoff()
+
+    def plan(self, df: pd.DataFrame) -> SyncPlan:
+        """
+        Work out which documents a run would write, without writing anything.
+
+        Without a manifest every pending row counts as an insert.
+        """
+        doc_ids, payloads = frame_to_documents(self.pending_rows(df))
+        if self.manifest is not None:
+            return self.manifest.plan(doc_ids, payloads)
+        plan = SyncPlan()
+        plan.doc_ids, plan.payloads = doc_ids, payloads
+        plan.inserts = len(doc_ids)
+        return plan
+
+    def run(self, df: pd.DataFrame,
+            on_progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Import all pending rows.
+
+        Args:
+            df: Frame with a datetime `date` column and the weather measurements
+            on_progress: Called with (committed, total) after each batch
+
+        Returns:
+            Number of documents written by this run
+        """
+        plan = self.plan(df)
+        total = len(plan.doc_ids)
+        wave_size = self.batch_size * max(1, self.max_workers)
+        committed = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            for start in range(0, total, wave_size):
+                doc_ids = plan.doc_ids[start:start + wave_size]
+                payloads = plan.payloads[start:start + wave_size]
+                chunks = zip(chunked(doc_ids, self.batch_size), chunked(payloads, self.batch_size))
+                committed += sum(pool.map(self._commit_with_backoff, chunks))
+
+                if self.manifest is not None:
+                    self.manifest.record(doc_ids, plan.hashes[start:start + wave_size])
+                else:
+                    self.checkpoint.save(payloads[-1]['date'])
+                if on_progress:
+                    on_progress(committed, total)
+        return committed
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+import weather_dashboard
+from fake_firestore import FakeFirestore
+from ingest import read_weather_csv, parse_date_column
+
+LONDON_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'london_weather.csv')
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """FakeFirestore that WeatherDashboard instances created in the test connect to."""
+    db = FakeFirestore()
+    monkeypatch.setattr(weather_dashboard.firebase_admin, 'get_app', lambda: None)
+    monkeypatch.setattr(weather_dashboard.firestore, 'client', lambda: db)
+    return db
+
+@pytest.fixture
+def london_frame():
+    """The bundled london_weather.csv, typed as import_london_data reads it."""
+    df = read_weather_csv(LONDON_CSV, measurement_dtype='float64')
+    df['date'] = parse_date_column(df['date'])
+    return df.dropna(subset=['date', 'mean_temp'])
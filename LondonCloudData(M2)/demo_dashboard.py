@@ -13,7 +13,8 @@ def weather_update_callback(doc_snapshot, changes, read_time):
 def main():
     try:
         # Initialize dashboard
-        dashboard = WeatherDashboard('./firebase_credentials.json')
+        dashboard = WeatherDashboard('./firebase_credentials.json',
+                                     cache_path='london_weather_cache.db')
 
         # Create a test user
         auth_manager = AuthManager()
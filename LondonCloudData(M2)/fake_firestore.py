@@ -0,0 +1,399 @@
+"""
+In-memory stand-in for the parts of the Firestore client the dashboard uses.
+
+Lets the importer and other write paths be exercised and benchmarked without
+credentials or the emulator. Writes and reads are counted so billing-relevant
+behaviour can be checked, and failures can be injected into commits.
+"""
+import copy
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from google.cloud.firestore_v1.transforms import Increment
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+from weather_serializer import FIRESTORE_BATCH_LIMIT
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field: str):
+        return self._data.get(field) if self._data is not None else None
+
+class FakeDocumentReference:
+    def __init__(self, client, collection: str, doc_id: str):
+        self._client = client
+        self.collection_name = collection
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def set(self, data: Dict, merge: bool = False) -> None:
+        self._client._commit([('set', self, data, merge)])
+
+    def update(self, updates: Dict) -> None:
+        self._client._commit([('update', self, updates, True)])
+
+    def delete(self) -> None:
+        self._client._commit([('delete', self, None, False)])
+
+    def get(self) -> FakeDocumentSnapshot:
+        return self._client._read(self)
+
+_OPERATORS = {
+    '==': lambda a, b: a == b,
+    '<': lambda a, b: a is not None and a < b,
+    '<=': lambda a, b: a is not None and a <= b,
+    '>': lambda a, b: a is not None and a > b,
+    '>=': lambda a, b: a is not None and a >= b,
+}
+
+class FakeQuery:
+    DESCENDING = 'DESCENDING'
+    ASCENDING = 'ASCENDING'
+
+    def __init__(self, client, collection: str, filters=(), order=(), limit_to=None):
+        self._client = client
+        self._collection = collection
+        self._filters = list(filters)
+        self._order = list(order)
+        self._limit = limit_to
+        self._fields = None
+        self._cursor = None
+
+    def _copy(self, **changes):
+        query = FakeQuery(self._client, self._collection, self._filters, self._order, self._limit)
+        query._fields = self._fields
+        query._cursor = self._cursor
+        query.__dict__.update(changes)
+        return query
+
+    def where(self, field: str, op: str, value):
+        return self._copy(_filters=self._filters + [(field, op, value)])
+
+    def order_by(self, field: str, direction: str = ASCENDING):
+        return self._copy(_order=self._order + [(field, direction)])
+
+    def limit(self, count: int):
+        return self._copy(_limit=count)
+
+    def select(self, field_paths):
+        return self._copy(_fields=list(field_paths))
+
+    def start_after(self, snapshot):
+        # Cursor on the ordered fields, with the document ID breaking ties as in Firestore
+        data = snapshot.to_dict()
+        return self._copy(_cursor=(tuple(data.get(f) for f, _ in self._order), snapshot.id))
+
+    def _matches(self):
+        docs = self._client._collection_items(self._collection)
+        for field, op, value in self._filters:
+            docs = [(doc_id, data) for doc_id, data in docs
+                    if _OPERATORS[op](data.get(field), value)]
+        docs.sort(key=lambda item: item[0])
+        for field, direction in reversed(self._order):
+            docs.sort(key=lambda item: item[1].get(field),
+                      reverse=direction == self.DESCENDING)
+        if self._cursor is not None:
+            # Ascending cursors only, which is all the dashboard pages with
+            cursor = self._cursor
+            docs = [(doc_id, data) for doc_id, data in docs
+                    if (tuple(data.get(f) for f, _ in self._order), doc_id) > cursor]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        return docs
+
+    def stream(self):
+        for doc_id, data in self._matches():
+            ref = FakeDocumentReference(self._client, self._collection, doc_id)
+            if self._fields is not None:
+                data = {f: data[f] for f in self._fields if f in data}
+            self._client.read_count += 1
+            yield FakeDocumentSnapshot(ref, copy.deepcopy(data))
+
+    def get(self) -> List[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client, name: str):
+        super().__init__(client, name)
+        self.id = name
+
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self._collection, doc_id)
+
+    def list_documents(self, page_size: Optional[int] = None):
+        for doc_id, _ in self._client._collection_items(self._collection):
+            yield FakeDocumentReference(self._client, self._collection, doc_id)
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, ref, data: Dict, merge: bool = False):
+        self._ops.append(('set', ref, data, merge))
+
+    def update(self, ref, updates: Dict):
+        self._ops.append(('update', ref, updates, True))
+
+    def delete(self, ref):
+        self._ops.append(('delete', ref, None, False))
+
+    def commit(self):
+        if len(self._ops) > FIRESTORE_BATCH_LIMIT:
+            raise ValueError(f"A batch can contain at most {FIRESTORE_BATCH_LIMIT} writes")
+        self._client._commit(self._ops)
+        self._ops = []
+
+    def __len__(self):
+        return len(self._ops)
+
+class FakeTransaction(FakeWriteBatch):
+    """Write batch with the hooks firestore.transactional drives."""
+
+    _read_only = False
+    _max_attempts = 5
+
+    def __init__(self, client):
+        super().__init__(client)
+        self._id = None
+
+    def _clean_up(self):
+        self._ops = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._id = b'fake-transaction'
+
+    def _commit(self):
+        self.commit()
+        self._clean_up()
+        return []
+
+    def _rollback(self):
+        self._clean_up()
+
+def _apply_fields(doc: Dict, data: Dict) -> Dict:
+    # Copy values in, resolving Increment transforms against the current value
+    for key, value in data.items():
+        if isinstance(value, Increment):
+            doc[key] = doc.get(key, 0) + value.value
+        else:
+            doc[key] = copy.deepcopy(value)
+    return doc
+
+class FakeFirestore:
+    """Thread-safe in-memory document store with Firestore-like references."""
+
+    def __init__(self, commit_latency: float = 0.0):
+        self._collections: Dict[str, Dict[str, Dict]] = {}
+        self.commit_latency = commit_latency  # Simulated round-trip per commit
+        self._lock = threading.Lock()
+        self._errors = []
+        self.write_count = 0
+        self.read_count = 0
+        self.commit_count = 0
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self) -> FakeTransaction:
+        return FakeTransaction(self)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        for ref in references:
+            yield self._read(ref)
+
+    def fail_next_commits(self, error: Exception, times: int = 1) -> None:
+        """Make the next `times` commits raise `error` without applying any writes."""
+        with self._lock:
+            self._errors.extend([error] * times)
+
+    def _commit(self, ops) -> None:
+        if self.commit_latency:
+            time.sleep(self.commit_latency)
+        with self._lock:
+            if self._errors:
+                raise self._errors.pop(0)
+            for kind, ref, data, merge in ops:
+                docs = self._collections.setdefault(ref.collection_name, {})
+                if kind == 'delete':
+                    docs.pop(ref.id, None)
+                elif kind == 'update':
+                    if ref.id not in docs:
+                        raise KeyError(f"No document to update: {ref.path}")
+                    _apply_fields(docs[ref.id], data)
+                elif merge and ref.id in docs:
+                    _apply_fields(docs[ref.id], data)
+                else:
+                    docs[ref.id] = _apply_fields({}, data)
+            self.write_count += len(ops)
+            self.commit_count += 1
+
+    def _read(self, ref) -> FakeDocumentSnapshot:
+        with self._lock:
+            data = self._collections.get(ref.collection_name, {}).get(ref.id)
+            self.read_count += 1
+            return FakeDocumentSnapshot(ref, copy.deepcopy(data))
+
+    def _collection_items(self, name: str):
+        with self._lock:
+            return list(self._collections.get(name, {}).items())
+
+class FakeWatch:
+    def __init__(self, query, callback):
+        self._query = query
+        self.callback = callback
+
+    def unsubscribe(self) -> None:
+        if self in self._query._watches:
+            self._query._watches.remove(self)
+
+class FakeSnapshotQuery:
+    """Query whose snapshots are emitted by hand, for driving real-time listeners."""
+
+    def __init__(self, collection: str = 'weather_data'):
+        self._collection = collection
+        self._watches: List[FakeWatch] = []
+        self.watch_count = 0
+
+    def on_snapshot(self, callback) -> FakeWatch:
+        watch = FakeWatch(self, callback)
+        self._watches.append(watch)
+        self.watch_count += 1
+        return watch
+
+    def emit(self, docs, changes, read_time=None) -> None:
+        """Invoke every watch callback on the calling thread, like the watch thread does."""
+        read_time = read_time or datetime.now()
+        for watch in list(self._watches):
+            watch.callback(docs, changes, read_time)
+
+    def emit_modified(self, doc_id: str, **data) -> None:
+        ref = FakeDocumentReference(None, self._collection, doc_id)
+        snapshot = FakeDocumentSnapshot(ref, {'location': doc_id, **data})
+        self.emit([snapshot], [DocumentChange(ChangeType.MODIFIED, snapshot, 0, 0)])
+
+class FakeAsyncDocumentReference:
+    """Coroutine-based view of a FakeDocumentReference, like AsyncDocumentReference."""
+
+    def __init__(self, ref: FakeDocumentReference):
+        self._ref = ref
+        self.id = ref.id
+        self.path = ref.path
+
+    async def set(self, data: Dict, merge: bool = False) -> None:
+        self._ref.set(data, merge)
+
+    async def update(self, updates: Dict) -> None:
+        self._ref.update(updates)
+
+    async def delete(self) -> None:
+        self._ref.delete()
+
+    async def get(self) -> FakeDocumentSnapshot:
+        return self._ref.get()
+
+class FakeAsyncQuery:
+    """Wraps a FakeQuery so that stream() is an async iterator, like AsyncQuery."""
+
+    def __init__(self, query: FakeQuery):
+        self._query = query
+
+    def where(self, field: str, op: str, value):
+        return FakeAsyncQuery(self._query.where(field, op, value))
+
+    def order_by(self, field: str, direction: str = FakeQuery.ASCENDING):
+        return FakeAsyncQuery(self._query.order_by(field, direction))
+
+    def limit(self, count: int):
+        return FakeAsyncQuery(self._query.limit(count))
+
+    def select(self, field_paths):
+        return FakeAsyncQuery(self._query.select(field_paths))
+
+    def start_after(self, snapshot):
+        return FakeAsyncQuery(self._query.start_after(snapshot))
+
+    async def stream(self):
+        for snapshot in self._query.stream():
+            yield snapshot
+
+class FakeAsyncCollectionReference(FakeAsyncQuery):
+    def __init__(self, collection: FakeCollectionReference):
+        super().__init__(collection)
+        self.id = collection.id
+
+    def document(self, doc_id: str) -> FakeAsyncDocumentReference:
+        return FakeAsyncDocumentReference(self._query.document(doc_id))
+
+class FakeAsyncWriteBatch:
+    def __init__(self, client):
+        self._batch = FakeWriteBatch(client)
+
+    def set(self, ref, data: Dict, merge: bool = False):
+        self._batch.set(ref._ref, data, merge)
+
+    def update(self, ref, updates: Dict):
+        self._batch.update(ref._ref, updates)
+
+    def delete(self, ref):
+        self._batch.delete(ref._ref)
+
+    async def commit(self):
+        self._batch.commit()
+
+class FakeAsyncTransaction(FakeTransaction):
+    """Transaction with the coroutine hooks firestore_async.async_transactional drives."""
+
+    def set(self, ref, data: Dict, merge: bool = False):
+        super().set(ref._ref, data, merge)
+
+    def update(self, ref, updates: Dict):
+        super().update(ref._ref, updates)
+
+    def delete(self, ref):
+        super().delete(ref._ref)
+
+    async def _begin(self, retry_id=None):
+        super()._begin(retry_id)
+
+    async def _commit(self):
+        return super()._commit()
+
+    async def _rollback(self):
+        super()._rollback()
+
+class FakeAsyncFirestore:
+    """
+    Async client over a FakeFirestore, for exercising AsyncWeatherDashboard.
+
+    Reads and writes go to (and are counted on) the wrapped store, so sync and
+    async code can share one fake.
+    """
+
+    def __init__(self, store: Optional[FakeFirestore] = None):
+        self.store = store or FakeFirestore()
+
+    def collection(self, name: str) -> FakeAsyncCollectionReference:
+        return FakeAsyncCollectionReference(self.store.collection(name))
+
+    def batch(self) -> FakeAsyncWriteBatch:
+        return FakeAsyncWriteBatch(self.store)
+
+    def transaction(self) -> FakeAsyncTransaction:
+        return FakeAsyncTransaction(self.store)
+
+    async def get_all(self, references, field_paths=None, transaction=None):
+        for ref in references:
+            yield self.store._read(ref._ref)
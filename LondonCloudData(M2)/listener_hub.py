@@ -0,0 +1,246 @@
+"""
+Shared real-time listeners for the weather dashboard.
+
+One Firestore watch is opened per query key and fanned out to any number of
+subscribers. The watch thread only enqueues: each subscriber has a bounded
+queue drained on a dispatcher thread pool, a few milliseconds at a time, so
+a slow callback delays nobody but itself. A subscriber joining an open watch
+is first sent the latest snapshot, as Firestore would send a new watch.
+Bursts of MODIFIED changes can optionally be coalesced.
+
+Run `python listener_hub.py` to benchmark fan-out against a fake snapshot source.
+"""
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+# Seconds a subscriber may deliver for before its drain task yields its
+# dispatcher thread to other subscribers; at least one event is delivered
+DRAIN_SLICE = 0.005
+
+class Subscription:
+    """A subscriber's bounded event queue and its delivery statistics."""
+
+    def __init__(self, hub, key: Hashable, callback: Callable, queue_size: int, overflow: str):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.hub = hub
+        self.key = key
+        self.callback = callback
+        self.overflow = overflow
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue = collections.deque(maxlen=queue_size if overflow == 'drop_oldest' else None)
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._draining = False
+        self.active = True
+
+    def _offer(self, event) -> bool:
+        # Called on the watch thread; never blocks. Returns True if a drain
+        # task needs scheduling.
+        with self._lock:
+            if not self.active:
+                return False
+            if len(self._queue) >= self._queue_size:
+                self.dropped += 1
+                if self.overflow == 'drop_newest':
+                    return False
+            self._queue.append(event)
+            if self._draining:
+                return False
+            self._draining = True
+            return True
+
+    def _drain(self) -> None:
+        # Runs on a dispatcher thread; delivers this subscriber's events in
+        # order, then re-queues itself behind other subscribers' drains once
+        # its time slice is used up
+        deadline = time.monotonic() + DRAIN_SLICE
+        while True:
+            with self._lock:
+                if not self._queue or not self.active:
+                    self._draining = False
+                    return
+                if time.monotonic() >= deadline:
+                    break
+                event = self._queue.popleft()
+            try:
+                self.callback(*event)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in weather listener callback: {str(e)}")
+        try:
+            self.hub._executor.submit(self._drain)
+        except RuntimeError:
+            # The hub was closed
+            with self._lock:
+                self._draining = False
+
+    def unsubscribe(self) -> None:
+        self.hub.unsubscribe(self)
+
+class ListenerHub:
+    """
+    Multiplexes Firestore on_snapshot watches across subscribers.
+
+    Args:
+        max_workers: Dispatcher threads shared by all subscribers
+        queue_size: Default per-subscriber queue bound
+        overflow: Default policy when a queue is full, drop_oldest or drop_newest
+        debounce: Seconds to hold events so bursts of MODIFIED changes to the
+            same document collapse into the latest one; 0 delivers immediately
+    """
+
+    def __init__(self, max_workers: int = 4, queue_size: int = 1000,
+                 overflow: str = 'drop_oldest', debounce: float = 0.0):
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.debounce = debounce
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='weather-listener')
+        self._lock = threading.Lock()
+        self._watches: Dict[Hashable, object] = {}
+        self._subscribers: Dict[Hashable, List[Subscription]] = {}
+        self._pending: Dict[Hashable, list] = {}
+        self._snapshots: Dict[Hashable, tuple] = {}  # Latest (docs, read_time) per key
+
+    def subscribe(self, key: Hashable, query, callback: Callable,
+                  queue_size: Optional[int] = None, overflow: Optional[str] = None) -> Subscription:
+        """
+        Subscribe `callback(docs, changes, read_time)` to `query`.
+
+        The first subscriber for `key` opens the watch; later subscribers share
+        it and are first sent the watch's latest snapshot, with every document
+        as an ADDED change.
+        """
+        subscription = Subscription(self, key, callback,
+                                    queue_size or self.queue_size, overflow or self.overflow)
+        with self._lock:
+            self._subscribers.setdefault(key, []).append(subscription)
+            if key not in self._watches:
+                self._watches[key] = query.on_snapshot(
+                    lambda docs, changes, read_time: self._on_snapshot(key, docs, changes, read_time))
+            elif key in self._snapshots:
+                # Offered under the lock so it queues ahead of the next snapshot
+                docs, read_time = self._snapshots[key]
+                changes = [DocumentChange(ChangeType.ADDED, doc, -1, index)
+                           for index, doc in enumerate(docs)]
+                if subscription._offer((docs, changes, read_time)):
+                    self._executor.submit(subscription._drain)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber; the last one out closes the shared watch."""
+        with subscription._lock:
+            subscription.active = False
+            subscription._queue.clear()
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.key, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers and subscription.key in self._watches:
+                self._watches.pop(subscription.key).unsubscribe()
+                self._subscribers.pop(subscription.key, None)
+                self._pending.pop(subscription.key, None)
+                self._snapshots.pop(subscription.key, None)
+
+    def subscribers(self, key: Hashable) -> List[Subscription]:
+        with self._lock:
+            return list(self._subscribers.get(key, []))
+
+    def _on_snapshot(self, key, docs, changes, read_time) -> None:
+        if self.debounce <= 0:
+            self._fan_out(key, (docs, changes, read_time))
+            return
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending[0], pending[2] = docs, read_time
+                pending[1].extend(changes)
+                return
+            self._pending[key] = [docs, list(changes), read_time]
+        timer = threading.Timer(self.debounce, self._flush, args=(key,))
+        timer.daemon = True
+        timer.start()
+
+    def _flush(self, key) -> None:
+        with self._lock:
+            pending = self._pending.pop(key, None)
+        if pending is not None:
+            docs, changes, read_time = pending
+            self._fan_out(key, (docs, coalesce_changes(changes), read_time))
+
+    def _fan_out(self, key, event) -> None:
+        with self._lock:
+            if key not in self._watches:
+                return
+            self._snapshots[key] = (event[0], event[2])
+            subscriptions = list(self._subscribers.get(key, []))
+        for subscription in subscriptions:
+            if subscription._offer(event):
+                self._executor.submit(subscription._drain)
+
+    def close(self) -> None:
+        """Close every watch and stop the dispatcher threads."""
+        with self._lock:
+            subscriptions = [s for subs in self._subscribers.values() for s in subs]
+        for subscription in subscriptions:
+            self.unsubscribe(subscription)
+        self._executor.shutdown(wait=True)
+
+def coalesce_changes(changes) -> list:
+    """Keep only the latest MODIFIED change per document, preserving order otherwise."""
+    latest = {}
+    for index, change in enumerate(changes):
+        if change.type.name == 'MODIFIED':
+            latest[change.document.id] = index
+    return [change for index, change in enumerate(changes)
+            if change.type.name != 'MODIFIED' or latest[change.document.id] == index]
+
+def benchmark(subscribers: int = 50, events: int = 20000, slow_callback_delay: float = 0.05):
+    """Measure fan-out throughput with one deliberately slow subscriber."""
+    import time
+    from fake_firestore import FakeSnapshotQuery
+
+    hub = ListenerHub(max_workers=8, queue_size=events)
+    query = FakeSnapshotQuery()
+    received = collections.Counter()
+    done = threading.Event()
+
+    def counting_callback(index):
+        def callback(docs, changes, read_time):
+            received[index] += 1
+            if sum(received.values()) == subscribers * events:
+                done.set()
+        return callback
+
+    slow = hub.subscribe('London', query, lambda *event: time.sleep(slow_callback_delay),
+                         queue_size=10)
+    for index in range(subscribers):
+        hub.subscribe('London', query, counting_callback(index))
+
+    start = time.perf_counter()
+    for _ in range(events):
+        query.emit_modified('London')
+    emit_seconds = time.perf_counter() - start
+    done.wait(timeout=60)
+    total_seconds = time.perf_counter() - start
+
+    print(f"Watches opened: {query.watch_count}")
+    print(f"Emitted {events} snapshots in {emit_seconds:.3f}s "
+          f"({events / emit_seconds:,.0f}/s on the watch thread)")
+    print(f"Delivered {sum(received.values()):,} callbacks to {subscribers} subscribers "
+          f"in {total_seconds:.3f}s ({sum(received.values()) / total_seconds:,.0f}/s)")
+    print(f"Slow subscriber: {slow.delivered} delivered, {slow.dropped} dropped")
+    hub.close()
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,116 @@
+import json
+import sqlite3
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+STORE_FIELDS = ['mean_temp', 'max_temp', 'min_temp', 'cloud_cover', 'precipitation',
+                'pressure', 'sunshine', 'snow_depth', 'global_radiation']
+
+class LocalWeatherStore:
+    """
+    SQLite copy of the london_weather collection.
+
+    Each document is kept as its raw JSON plus typed measurement columns, so
+    history reads return the original dicts and frame reads are plain SQL. A
+    connection is opened per operation so the store can be used from worker
+    threads.
+    """
+
+    def __init__(self, path: str = 'london_weather_cache.db'):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            columns = ', '.join(f'{field} REAL' for field in STORE_FIELDS)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS london_weather "
+                         f"(doc_id TEXT PRIMARY KEY, date TEXT, data TEXT, {columns})")
+            conn.execute("CREATE INDEX IF NOT EXISTS london_weather_date ON london_weather (date)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def upsert(self, docs: Iterable[Tuple[str, Dict]], merge: bool = False) -> int:
+        """
+        Insert or replace (doc_id, data) pairs. With `merge`, the fields are
+        merged into any cached document as a Firestore merge write would.
+        Returns the number stored.
+        """
+        docs = list(docs)
+        placeholders = ', '.join('?' * (3 + len(STORE_FIELDS)))
+        with closing(self._connect()) as conn, conn:
+            if merge:
+                cached = {}
+                for start in range(0, len(docs), 500):
+                    ids = [doc_id for doc_id, _ in docs[start:start + 500]]
+                    cursor = conn.execute(f"SELECT doc_id, data FROM london_weather WHERE doc_id "
+                                          f"IN ({', '.join('?' * len(ids))})", ids)
+                    cached.update((doc_id, json.loads(data)) for doc_id, data in cursor)
+                docs = [(doc_id, {**cached.get(doc_id, {}), **data}) for doc_id, data in docs]
+            rows = [
+                (doc_id, data.get('date'), json.dumps(data), *[data.get(f) for f in STORE_FIELDS])
+                for doc_id, data in docs
+            ]
+            conn.executemany(f"INSERT OR REPLACE INTO london_weather VALUES ({placeholders})", rows)
+        return len(rows)
+
+    def delete_missing(self, remote_ids: Iterable[str]) -> int:
+        """
+        Delete cached documents whose IDs are not in `remote_ids`.
+
+        An empty listing deletes nothing, since it is far more likely to be a
+        failed or truncated listing than an emptied collection.
+        """
+        remote_ids = [(doc_id,) for doc_id in remote_ids]
+        if not remote_ids:
+            return 0
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TEMP TABLE remote_ids (doc_id TEXT PRIMARY KEY)")
+            conn.executemany("INSERT OR IGNORE INTO remote_ids VALUES (?)", remote_ids)
+            cursor = conn.execute("DELETE FROM london_weather "
+                                  "WHERE doc_id NOT IN (SELECT doc_id FROM remote_ids)")
+            return cursor.rowcount
+
+    def last_date(self) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT MAX(date) FROM london_weather").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def _where(self, start_date, end_date):
+        clauses, params = [], []
+        if start_date:
+            clauses.append("date >= ?")
+            params.append(start_date.isoformat())
+        if end_date:
+            clauses.append("date <= ?")
+            params.append(end_date.isoformat())
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def history(self, start_date=None, end_date=None, limit=None) -> List[Dict]:
+        """Cached documents in date order, as the dicts stored in Firestore."""
+        where, params = self._where(start_date, end_date)
+        sql = f"SELECT data FROM london_weather{where} ORDER BY date"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with closing(self._connect()) as conn:
+            return [json.loads(row[0]) for row in conn.execute(sql, params)]
+
+    def frame(self, start_date=None, end_date=None,
+              fields: Sequence[str] = ('mean_temp', 'cloud_cover', 'precipitation')) -> pd.DataFrame:
+        """Cached documents in date order as a typed DataFrame."""
+        fields = [f for f in fields if f in STORE_FIELDS]
+        where, params = self._where(start_date, end_date)
+        sql = f"SELECT {', '.join(['date', *fields])} FROM london_weather{where} ORDER BY date"
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df['date'] = pd.to_datetime(df['date']).astype('datetime64[ns]')
+        return df.astype({field: 'float64' for field in fields})
@@ -1,25 +1,26 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 from weather_dashboard import WeatherDashboard
+import london_data_bridge  # noqa: F401
+from compact import month_categories
+from downsample import plot_decimated
 from datetime import datetime, timedelta
 
 def analyze_london_weather():
     # Initialize dashboard
-    dashboard = WeatherDashboard('./firebase_credentials.json')
+    dashboard = WeatherDashboard('./firebase_credentials.json',
+                                 cache_path='london_weather_cache.db')
     
     # Load data from Firebase
     print("Loading London weather data from Firebase...")
     start_date = datetime.now() - timedelta(days=365)  # Last year of data
-    data = dashboard.get_london_weather_history(start_date=start_date)
-    df = pd.DataFrame(data)
-    df['date'] = pd.to_datetime(df['date'])
+    df = dashboard.get_london_weather_frame(start_date=start_date, fields=['mean_temp'])
     
     # Create visualizations
     print("Creating visualizations...")
     
     # 1. Temperature Trends
     plt.figure(figsize=(12, 6))
-    plt.plot(df['date'], df['mean_temp'])
+    plot_decimated(plt.gca(), df['date'], df['mean_temp'])
     plt.title('London Temperature Trends')
     plt.xlabel('Date')
     plt.ylabel('Temperature (°C)')
@@ -30,7 +31,7 @@ def analyze_london_weather():
     
     # 2. Monthly Temperature Box Plot
     plt.figure(figsize=(12, 6))
-    df['month'] = df['date'].dt.strftime('%B')
+    df['month'] = month_categories(df['date'].dt.month)
     df.boxplot(column='mean_temp', by='month', figsize=(12, 6))
     plt.title('Monthly Temperature Distribution')
     plt.xlabel('Month')
@@ -0,0 +1,12 @@
+"""
+Make the LondonData(M1) analysis modules importable from the cloud dashboard
+scripts, which are run from this directory.
+"""
+import os
+import sys
+
+ANALYSIS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'LondonData(M1)')
+
+if ANALYSIS_DIR not in sys.path:
+    sys.path.append(ANALYSIS_DIR)
@@ -0,0 +1,220 @@
+"""
+Monthly rollup documents for the london_weather collection.
+
+Each london_weather_monthly/{YYYY-MM} document holds, per measurement,
+`<field>_count`, `<field>_sum` and `<field>_sumsq`. They are kept in step with
+the daily documents by writing both in one transaction, so monthly means and
+standard deviations can be read from ~500 small documents instead of the
+whole archive.
+
+Days written before the rollups existed aren't in them, so readers only use
+the rollups once `python monthly_rollups.py --rebuild` has regenerated them
+from the raw data and recorded that they are complete.
+"""
+import asyncio
+import math
+import sys
+from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+from firebase_admin import firestore, firestore_async
+from weather_serializer import FIRESTORE_BATCH_LIMIT, chunked
+
+ROLLUP_COLLECTION = 'london_weather_monthly'
+
+# Marker document written by rebuild_rollups once the rollups cover every day
+ROLLUP_STATE_COLLECTION = 'london_weather_meta'
+ROLLUP_STATE_DOCUMENT = 'monthly_rollups'
+
+ROLLUP_FIELDS = ['mean_temp', 'max_temp', 'min_temp', 'cloud_cover', 'precipitation',
+                 'pressure', 'sunshine', 'snow_depth', 'global_radiation']
+
+# Days per transaction; leaves room under the 500-write limit for the month
+# documents a chunk of days touches
+ROLLUP_CHUNK_SIZE = 400
+
+def rollup_deltas(old: Optional[Dict], new: Optional[Dict]) -> Dict[str, Dict[str, float]]:
+    """
+    Return the change to each month's rollup when a day document goes from
+    `old` to `new` (either may be None for an insert or delete).
+    """
+    deltas = defaultdict(lambda: defaultdict(float))
+    for data, sign in ((old, -1), (new, 1)):
+        if not data:
+            continue
+        month = deltas[data['date'][:7]]
+        for field in ROLLUP_FIELDS:
+            value = data.get(field)
+            if value is None or math.isnan(value):
+                continue
+            month[f'{field}_count'] += sign
+            month[f'{field}_sum'] += sign * value
+            month[f'{field}_sumsq'] += sign * value * value
+    return deltas
+
+def _merge_deltas(total, deltas) -> None:
+    for month, fields in deltas.items():
+        for key, value in fields.items():
+            total[month][key] += value
+
+def _set_days_and_rollups(transaction, rollup_collection, refs, data, old, merge) -> None:
+    # Queue the day writes and the increments that move their months' rollups
+    # from the `old` documents to the new ones
+    totals = defaultdict(lambda: defaultdict(float))
+    for ref, payload in zip(refs, data):
+        previous = old.get(ref.id)
+        new = {**previous, **payload} if merge and previous else payload
+        _merge_deltas(totals, rollup_deltas(previous, new))
+        transaction.set(ref, payload, merge=merge)
+    for month, fields in totals.items():
+        update = {key: firestore.Increment(value) for key, value in fields.items()}
+        transaction.set(rollup_collection.document(month), {'month': month, **update},
+                        merge=True)
+
+def write_days_with_rollups(db, doc_ids: Sequence[str], payloads: Sequence[Dict],
+                            collection: str = 'london_weather', max_workers: int = 1,
+                            merge: bool = False) -> int:
+    """
+    Write daily documents and update their monthly rollups transactionally.
+
+    Each chunk of days runs in one transaction. The transaction reads the days'
+    current documents, writes the new ones, and applies the difference to the
+    month documents with server-side increments. Rewriting a day replaces its
+    contribution rather than adding to it, so retrying a chunk is safe.
+
+    With `merge`, payloads are merged into existing documents instead of
+    replacing them, so fields a payload doesn't carry are kept.
+
+    Returns:
+        Number of daily documents written
+    """
+    day_collection = db.collection(collection)
+    rollup_collection = db.collection(ROLLUP_COLLECTION)
+
+    def write_chunk(chunk):
+        ids, data = chunk
+        refs = [day_collection.document(doc_id) for doc_id in ids]
+
+        @firestore.transactional
+        def apply(transaction):
+            old = {snap.id: snap.to_dict()
+                   for snap in db.get_all(refs, transaction=transaction) if snap.exists}
+            _set_days_and_rollups(transaction, rollup_collection, refs, data, old, merge)
+
+        apply(db.transaction())
+        return len(ids)
+
+    chunks = list(zip(chunked(doc_ids, ROLLUP_CHUNK_SIZE), chunked(payloads, ROLLUP_CHUNK_SIZE)))
+    if max_workers <= 1:
+        return sum(write_chunk(chunk) for chunk in chunks)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return sum(pool.map(write_chunk, chunks))
+
+def rollups_complete(db) -> bool:
+    """Return True if rebuild_rollups has run, so the rollups cover every daily document."""
+    snapshot = db.collection(ROLLUP_STATE_COLLECTION).document(ROLLUP_STATE_DOCUMENT).get()
+    return snapshot.exists and bool(snapshot.get('complete'))
+
+async def write_days_with_rollups_async(db, doc_ids: Sequence[str], payloads: Sequence[Dict],
+                                       collection: str = 'london_weather', merge: bool = False,
+                                       limit: Optional[asyncio.Semaphore] = None) -> int:
+    """
+    write_days_with_rollups for the async client.
+
+    The chunk transactions run concurrently; `limit` is an optional semaphore
+    each one holds while it runs.
+
+    Returns:
+        Number of daily documents written
+    """
+    day_collection = db.collection(collection)
+    rollup_collection = db.collection(ROLLUP_COLLECTION)
+
+    async def write_chunk(ids, data):
+        refs = [day_collection.document(doc_id) for doc_id in ids]
+
+        @firestore_async.async_transactional
+        async def apply(transaction):
+            old = {snap.id: snap.to_dict()
+                   async for snap in db.get_all(refs, transaction=transaction) if snap.exists}
+            _set_days_and_rollups(transaction, rollup_collection, refs, data, old, merge)
+
+        if limit is None:
+            await apply(db.transaction())
+        else:
+            async with limit:
+                await apply(db.transaction())
+        return len(ids)
+
+    counts = await asyncio.gather(*(write_chunk(ids, data) for ids, data in
+                                    zip(chunked(doc_ids, ROLLUP_CHUNK_SIZE),
+                                        chunked(payloads, ROLLUP_CHUNK_SIZE))))
+    return sum(counts)
+
+def monthly_rollups_frame(db) -> pd.DataFrame:
+    """
+    Read every rollup document into a DataFrame indexed by month (YYYY-MM),
+    with `<field>_mean` and `<field>_std` columns added for each measurement.
+    """
+    rows = {doc.id: doc.to_dict() for doc in db.collection(ROLLUP_COLLECTION).stream()}
+    return rollups_to_frame(rows)
+
+def rollups_to_frame(rows: Dict[str, Dict]) -> pd.DataFrame:
+    """Build the monthly_rollups_frame result from rollup documents keyed by month."""
+    df = pd.DataFrame.from_dict(rows, orient='index').sort_index()
+    if df.empty:
+        return df
+    for field in ROLLUP_FIELDS:
+        if f'{field}_count' not in df.columns:
+            continue
+        count = df[f'{field}_count'].where(df[f'{field}_count'] > 0)
+        total, sumsq = df[f'{field}_sum'], df[f'{field}_sumsq']
+        df[f'{field}_mean'] = total / count
+        df[f'{field}_std'] = ((sumsq - total * total / count).clip(lower=0) / (count - 1)) ** 0.5
+    return df
+
+def rebuild_rollups(db, collection: str = 'london_weather') -> int:
+    """
+    Regenerate all rollup documents from the daily documents.
+
+    Stale month documents are deleted, then the rollups are marked complete
+    (see rollups_complete). Returns the number of months written.
+    """
+    totals = defaultdict(lambda: defaultdict(float))
+    for doc in db.collection(collection).stream():
+        _merge_deltas(totals, rollup_deltas(None, doc.to_dict()))
+
+    rollup_collection = db.collection(ROLLUP_COLLECTION)
+    stale = [ref for ref in rollup_collection.list_documents() if ref.id not in totals]
+    writes = [(rollup_collection.document(month), {'month': month, **fields})
+              for month, fields in sorted(totals.items())]
+
+    for chunk in chunked(writes, FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for ref, data in chunk:
+            batch.set(ref, data)
+        batch.commit()
+    for chunk in chunked(stale, FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for ref in chunk:
+            batch.delete(ref)
+        batch.commit()
+    db.collection(ROLLUP_STATE_COLLECTION).document(ROLLUP_STATE_DOCUMENT).set(
+        {'complete': True, 'rebuilt_at': datetime.now().isoformat(), 'months': len(writes)})
+    return len(writes)
+
+def main():
+    if '--rebuild' not in sys.argv:
+        print("Usage: python monthly_rollups.py --rebuild")
+        return
+    from weather_dashboard import WeatherDashboard
+    dashboard = WeatherDashboard('./firebase_credentials.json')
+    print("Rebuilding monthly rollups from london_weather...")
+    months = rebuild_rollups(dashboard.db)
+    print(f"Wrote {months} monthly rollup documents")
+
+if __name__ == "__main__":
+    main()
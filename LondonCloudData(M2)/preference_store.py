@@ -0,0 +1,227 @@
+"""
+Cached, batched access to the user_preferences collection.
+
+Reads go through an in-process LRU cache; misses for many users are fetched
+together with one db.get_all call. Entries are updated by this process's own
+writes and, once the first read has filled the cache, by a snapshot listener
+on the collection, so changes made elsewhere are picked up too.
+
+Run `python preference_store.py` to benchmark cached reads against the fake
+client.
+"""
+import copy
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+from weather_serializer import FIRESTORE_BATCH_LIMIT, chunked
+
+_MISSING = object()
+
+class PreferenceStore:
+    """
+    Read-through LRU cache and batch writer for user preferences.
+
+    Args:
+        db: Firestore client
+        collection: Preferences collection
+        max_size: Maximum cached users; 0 disables caching
+        validate: Called with each preferences dict before it is saved
+        listen: Keep cached entries current with a snapshot listener, started
+            on the first read
+    """
+
+    def __init__(self, db, collection: str = 'user_preferences', max_size: int = 10000,
+                 validate: Optional[Callable[[Dict], None]] = None, listen: bool = True):
+        self.db = db
+        self.collection = collection
+        self.max_size = max_size
+        self.validate = validate
+        self.listen = listen
+        self.hits = 0
+        self.misses = 0
+        self._cache: 'OrderedDict[str, Optional[Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped on every invalidation
+        self._watch = None
+        self._watching = False
+
+    def _ref(self, user_id: str):
+        return self.db.collection(self.collection).document(user_id)
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Preferences for one user, or None if they have none."""
+        return self.get_many([user_id])[user_id]
+
+    def get_many(self, user_ids: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Preferences for many users, keyed by user ID (None where missing).
+
+        Cached users are served from memory; the rest are read in one
+        db.get_all call per 500 users.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        result, missing = {}, []
+        with self._lock:
+            for user_id in user_ids:
+                data = self._cache.get(user_id, _MISSING)
+                if data is _MISSING:
+                    missing.append(user_id)
+                else:
+                    self._cache.move_to_end(user_id)
+                    result[user_id] = data
+            self.hits += len(result)
+            self.misses += len(missing)
+            generation = self._generation
+        if not missing:
+            return {user_id: _copy(result[user_id]) for user_id in user_ids}
+
+        if self.listen and self.max_size and not self._watching:
+            self._start_watch()
+        fetched = {user_id: None for user_id in missing}
+        for chunk in chunked(missing, FIRESTORE_BATCH_LIMIT):
+            for snap in self.db.get_all([self._ref(user_id) for user_id in chunk]):
+                if snap.exists:
+                    fetched[snap.id] = snap.to_dict()
+
+        with self._lock:
+            # A write or change notification during the fetch may have made
+            # these results stale; only cache them if nothing was invalidated
+            if generation == self._generation:
+                for user_id, data in fetched.items():
+                    self._put(user_id, data)
+        result.update(fetched)
+        return {user_id: _copy(result[user_id]) for user_id in user_ids}
+
+    def save(self, user_id: str, preferences: Dict) -> None:
+        self.save_many({user_id: preferences})
+
+    def save_many(self, preferences: Dict[str, Dict]) -> int:
+        """
+        Save preferences for many users in batched commits.
+
+        Every entry is validated before anything is written, so invalid input
+        writes nothing. Returns the number of users saved.
+
+        Raises:
+            ValueError: If any preferences are invalid
+        """
+        if self.validate is not None:
+            for data in preferences.values():
+                self.validate(data)
+        items = list(preferences.items())
+        for chunk in chunked(items, FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for user_id, data in chunk:
+                batch.set(self._ref(user_id), data)
+            batch.commit()
+            self._store_local(dict(chunk))
+        return len(items)
+
+    def update(self, user_id: str, updates: Dict) -> None:
+        self._ref(user_id).update(updates)
+        self.invalidate([user_id])
+
+    def delete(self, user_id: str) -> None:
+        self.delete_many([user_id])
+
+    def delete_many(self, user_ids: Iterable[str]) -> int:
+        """Delete many users' preferences in batched commits."""
+        user_ids = list(user_ids)
+        for chunk in chunked(user_ids, FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for user_id in chunk:
+                batch.delete(self._ref(user_id))
+            batch.commit()
+            self._store_local({user_id: None for user_id in chunk})
+        return len(user_ids)
+
+    def invalidate(self, user_ids: Optional[Iterable[str]] = None) -> None:
+        """Drop cached entries for `user_ids`, or the whole cache."""
+        with self._lock:
+            self._generation += 1
+            if user_ids is None:
+                self._cache.clear()
+            else:
+                for user_id in user_ids:
+                    self._cache.pop(user_id, None)
+
+    def _store_local(self, values: Dict[str, Optional[Dict]]) -> None:
+        with self._lock:
+            self._generation += 1
+            for user_id, data in values.items():
+                self._put(user_id, _copy(data))
+
+    def _put(self, user_id: str, data: Optional[Dict]) -> None:
+        # Caller holds the lock
+        if not self.max_size:
+            return
+        self._cache[user_id] = data
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _start_watch(self) -> None:
+        with self._lock:
+            if self._watching:
+                return
+            self._watching = True
+        self._watch = self.db.collection(self.collection).on_snapshot(self._on_snapshot)
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        # Refresh only users already cached; the initial snapshot reports every
+        # document as ADDED and shouldn't flood the cache
+        with self._lock:
+            self._generation += 1
+            for change in changes:
+                user_id = change.document.id
+                if user_id in self._cache:
+                    removed = change.type.name == 'REMOVED'
+                    self._cache[user_id] = None if removed else change.document.to_dict()
+
+    def close(self) -> None:
+        """Stop the snapshot listener and clear the cache."""
+        if self._watch is not None:
+            self._watch.unsubscribe()
+        self._watch = None
+        self._watching = False
+        self.invalidate()
+
+def _copy(data: Optional[Dict]) -> Optional[Dict]:
+    # Callers get their own deep copy (favorite_locations is a list) so they
+    # can't edit cached entries
+    return copy.deepcopy(data) if data is not None else None
+
+def benchmark(users: int = 5000, rounds: int = 20):
+    """Compare cached get_many with one get() round-trip per user."""
+    import time
+    from fake_firestore import FakeFirestore
+
+    db = FakeFirestore()
+    store = PreferenceStore(db, listen=False)
+    store.save_many({f'user{i}': {'favorite_locations': ['London'], 'temperature_unit': 'Celsius'}
+                     for i in range(users)})
+    store.invalidate()
+    user_ids = [f'user{i}' for i in range(users)]
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        db.collection('user_preferences').document(user_id).get()
+    print(f"Sequential get(): {users / (time.perf_counter() - start):,.0f} users/s")
+
+    start = time.perf_counter()
+    store.get_many(user_ids)
+    print(f"get_many, cold cache: {users / (time.perf_counter() - start):,.0f} users/s")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        store.get_many(user_ids)
+    print(f"get_many, warm cache: {users * rounds / (time.perf_counter() - start):,.0f} users/s")
+
+    start = time.perf_counter()
+    for user_id in user_ids:
+        store.get(user_id)
+    print(f"get, warm cache: {users / (time.perf_counter() - start):,.0f} users/s "
+          f"({store.hits} hits, {store.misses} misses)")
+
+if __name__ == "__main__":
+    benchmark()
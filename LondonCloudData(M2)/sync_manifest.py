@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Sequence
+
+# Manifest shared by import_london_data.py and the dashboard's London weather writes
+LONDON_WEATHER_MANIFEST = 'london_weather_manifest.json'
+
+def value_hash(value) -> str:
+    """Stable content hash of one field value."""
+    encoded = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+def payload_hashes(payload: Dict) -> Dict[str, str]:
+    """Content hash of each field of a document payload."""
+    return {field: value_hash(value) for field, value in payload.items()}
+
+class SyncPlan:
+    """Documents split into inserts, updates and unchanged skips."""
+
+    def __init__(self):
+        self.doc_ids: List[str] = []
+        self.payloads: List[Dict] = []
+        self.hashes: List[Dict[str, str]] = []
+        self.inserts = 0
+        self.updates = 0
+        self.skips = 0
+
+    def report(self) -> Dict[str, int]:
+        return {'insert': self.inserts, 'update': self.updates, 'skip': self.skips}
+
+class SyncManifest:
+    """
+    Local record of the content hash last written to each field of each
+    document.
+
+    Comparing against it lets a sync write only new or changed documents
+    without reading the collection back. Payloads are compared field by field,
+    so writers that set different subsets of a document's fields (merged into
+    it) can share one manifest: a payload is skipped when every field it
+    carries is unchanged. It only knows about writes made through it, so
+    delete the manifest file to force a full rewrite after documents are
+    changed elsewhere.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.hashes: Dict[str, Dict[str, str]] = json.load(f)
+        except (OSError, ValueError):
+            self.hashes = {}
+
+    def plan(self, doc_ids: Sequence[str], payloads: Sequence[Dict]) -> SyncPlan:
+        """Return the subset of documents that differ from the manifest."""
+        plan = SyncPlan()
+        for doc_id, payload in zip(doc_ids, payloads):
+            digests = payload_hashes(payload)
+            known = self.hashes.get(doc_id)
+            # Entries that aren't per-field dicts predate field hashing; rewrite them
+            if isinstance(known, dict) and all(known.get(field) == digest
+                                               for field, digest in digests.items()):
+                plan.skips += 1
+                continue
+            if known is None:
+                plan.inserts += 1
+            else:
+                plan.updates += 1
+            plan.doc_ids.append(doc_id)
+            plan.payloads.append(payload)
+            plan.hashes.append(digests)
+        return plan
+
+    def record(self, doc_ids: Sequence[str], hashes: Sequence[Dict[str, str]]) -> None:
+        """Remember the field hashes of committed documents and persist the manifest."""
+        for doc_id, digests in zip(doc_ids, hashes):
+            known = self.hashes.get(doc_id)
+            self.hashes[doc_id] = {**known, **digests} if isinstance(known, dict) else dict(digests)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.hashes, f)
+        os.replace(tmp, self.path)
+
+def record_saved(path: str, doc_ids: Sequence[str], payloads: Sequence[Dict]) -> None:
+    """
+    Record documents written without consulting the manifest at `path`, if
+    it exists. Otherwise a later sync would see its stale hashes and skip
+    rewriting those documents as unchanged.
+    """
+    if os.path.exists(path):
+        SyncManifest(path).record(doc_ids, [payload_hashes(payload) for payload in payloads])
@@ -0,0 +1,66 @@
+import asyncio
+
+import pandas as pd
+import pytest
+import async_dashboard
+from async_dashboard import AsyncWeatherDashboard
+from fake_firestore import FakeAsyncFirestore, FakeFirestore
+from monthly_rollups import rebuild_rollups
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeFirestore()
+    monkeypatch.setattr(async_dashboard.firebase_admin, 'get_app', lambda: None)
+    monkeypatch.setattr(async_dashboard.firestore_async, 'client', lambda: FakeAsyncFirestore(store))
+    return store
+
+def make_frame(start, periods):
+    dates = pd.date_range(start, periods=periods)
+    return pd.DataFrame({'date': dates, 'mean_temp': [float(i % 20) for i in range(periods)],
+                         'cloud_cover': 4.0, 'precipitation': 0.5})
+
+def test_save_london_weather_data_writes_days_and_rollups(store):
+    df = make_frame('2020-01-01', 900)
+
+    async def run():
+        dashboard = AsyncWeatherDashboard('unused.json', max_concurrency=2)
+        written = await dashboard.save_london_weather_data(df)
+        history = await dashboard.get_london_weather_history(page_size=100)
+        return written, history
+
+    written, history = asyncio.run(run())
+    assert written == 900
+    assert [day['date'][:10] for day in history] == df['date'].dt.strftime('%Y-%m-%d').tolist()
+    rollups = {doc.id: doc.to_dict() for doc in store.collection('london_weather_monthly').stream()}
+    january = df[df['date'].dt.strftime('%Y-%m') == '2020-01']
+    assert rollups['2020-01']['mean_temp_count'] == 31
+    assert rollups['2020-01']['mean_temp_sum'] == pytest.approx(january['mean_temp'].sum())
+
+def test_monthly_cube_follows_writes(store):
+    async def run():
+        dashboard = AsyncWeatherDashboard('unused.json')
+        await dashboard.save_london_weather_data(make_frame('2020-01-01', 60))
+        before = await dashboard.get_monthly_averages()
+        # Appended days extend the cached cube; rewritten days replace it
+        await dashboard.save_london_weather_data(make_frame('2020-03-01', 31))
+        appended = await dashboard.get_monthly_averages()
+        rewritten = make_frame('2020-01-01', 31).assign(mean_temp=100.0)
+        await dashboard.save_london_weather_data(rewritten)
+        return before, appended, await dashboard.get_monthly_averages()
+
+    before, appended, after = asyncio.run(run())
+    assert sorted(map(str, before)) == ['2020-01', '2020-02']
+    assert sorted(map(str, appended)) == ['2020-01', '2020-02', '2020-03']
+    assert after[pd.Period('2020-01', 'M')] == pytest.approx(100.0)
+
+def test_monthly_averages_use_complete_rollups(store):
+    async def run():
+        dashboard = AsyncWeatherDashboard('unused.json')
+        await dashboard.save_london_weather_data(make_frame('2020-01-01', 60))
+        from_days = await dashboard.get_monthly_averages()
+        rebuild_rollups(store)
+        dashboard._monthly_cube = None
+        return from_days, await dashboard.get_monthly_averages()
+
+    from_days, from_rollups = asyncio.run(run())
+    assert from_rollups == pytest.approx(from_days)
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pytest
+import auth_manager
+from auth_manager import IMPORT_BATCH_SIZE, AuthManager, TokenCache
+from firebase_admin import auth
+
+class FakeVerifier:
+    """Stands in for auth.verify_id_token; tokens look like 'name:exp'."""
+
+    def __init__(self):
+        self.calls = []
+        self.revoked = set()
+
+    def __call__(self, id_token, check_revoked=False):
+        self.calls.append((id_token, check_revoked))
+        if check_revoked and id_token in self.revoked:
+            raise auth.RevokedIdTokenError('revoked')
+        return {'uid': id_token.split(':')[0], 'exp': float(id_token.split(':')[1])}
+
+def make_cache(**kwargs):
+    now = [0.0]
+    verifier = FakeVerifier()
+    cache = TokenCache(clock=lambda: now[0], verify=verifier, **kwargs)
+    return cache, verifier, now
+
+def test_tokens_are_cached_until_expiry():
+    cache, verifier, now = make_cache()
+    assert cache.verify('alice:100')['uid'] == 'alice'
+    now[0] = 99
+    cache.verify('alice:100')
+    assert len(verifier.calls) == 1
+    now[0] = 100
+    cache.verify('alice:100')
+    assert len(verifier.calls) == 2
+    assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 2, 'revocation_checks': 0}
+
+def test_least_recently_used_token_is_evicted():
+    cache, verifier, _ = make_cache(max_size=2)
+    cache.verify('a:100')
+    cache.verify('b:100')
+    cache.verify('a:100')  # b is now the least recently used
+    cache.verify('c:100')
+    assert cache.stats()['size'] == 2
+    cache.verify('a:100')
+    cache.verify('b:100')
+    assert [token for token, _ in verifier.calls] == ['a:100', 'b:100', 'c:100', 'b:100']
+
+def test_revoked_tokens_are_rejected_and_dropped():
+    cache, verifier, now = make_cache(revocation_interval=60)
+    cache.verify('alice:1000')
+    now[0] = 30
+    cache.verify('alice:1000')
+    assert len(verifier.calls) == 1
+
+    verifier.revoked.add('alice:1000')
+    now[0] = 61
+    with pytest.raises(auth.RevokedIdTokenError):
+        cache.verify('alice:1000')
+    assert verifier.calls[-1] == ('alice:1000', True)
+    assert cache.stats()['size'] == 0 and cache.stats()['revocation_checks'] == 1
+
+def test_create_users_imports_in_batches(monkeypatch):
+    batches = []
+
+    def import_users(records, hash_alg=None):
+        batches.append(records)
+        # The second account of every batch already exists
+        return SimpleNamespace(errors=[SimpleNamespace(index=1, reason='EMAIL_EXISTS')])
+
+    monkeypatch.setattr(auth_manager.auth, 'import_users', import_users)
+    accounts = [(f'user{i}@example.com', f'password{i}') for i in range(2 * IMPORT_BATCH_SIZE + 5)]
+    result = AuthManager.create_users(accounts, rounds=1)
+
+    assert [len(batch) for batch in batches] == [IMPORT_BATCH_SIZE, IMPORT_BATCH_SIZE, 5]
+    assert [email for email, _ in result['errors']] == \
+        [accounts[start + 1][0] for start in (0, IMPORT_BATCH_SIZE, 2 * IMPORT_BATCH_SIZE)]
+    assert len(result['created']) == len(accounts) - 3
+    record = batches[0][0]
+    assert record.password_hash == auth_manager._hash_password('password0', record.password_salt, 1)
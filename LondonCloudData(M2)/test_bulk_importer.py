@@ -0,0 +1,28 @@
+import os
+
+from bulk_importer import BulkImporter, TokenBucket
+from fake_firestore import FakeFirestore
+
+def test_acquire_sleeps_without_the_lock():
+    held = []
+    bucket = None
+
+    def sleep(seconds):
+        held.append(bucket._lock.locked())
+        bucket._tokens = bucket.capacity
+
+    bucket = TokenBucket(10, capacity=10, clock=lambda: 0.0, sleep=sleep)
+    bucket.acquire(10)
+    bucket.acquire(5)
+    assert held == [False]
+    assert bucket._tokens == 5
+
+def test_manifest_import_keeps_no_checkpoint(tmp_path, london_frame):
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    df = london_frame.head(100)
+    importer = BulkImporter(FakeFirestore(), checkpoint_path=checkpoint_path, batch_size=40,
+                            manifest_path=str(tmp_path / 'manifest.json'))
+
+    assert importer.run(df) > 0
+    assert not os.path.exists(checkpoint_path)
+    assert importer.run(df) == 0
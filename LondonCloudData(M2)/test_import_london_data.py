@@ -0,0 +1,12 @@
+from fake_firestore import FakeFirestore
+from import_london_data import import_data
+
+def test_invalid_dates_stop_the_import(tmp_path, capsys):
+    csv_path = tmp_path / 'london_weather.csv'
+    csv_path.write_text('date,mean_temp\n19790101,1.5\n19790230,2.0\n19790103,2.5\n')
+    db = FakeFirestore()
+
+    assert not import_data(db, str(csv_path), str(tmp_path / 'checkpoint.json'),
+                           str(tmp_path / 'manifest.json'))
+    assert '1 rows have invalid dates, e.g. 19790230' in capsys.readouterr().out
+    assert db.write_count == 0
@@ -0,0 +1,40 @@
+import threading
+import time
+
+from fake_firestore import FakeSnapshotQuery
+from listener_hub import ListenerHub
+
+def test_late_subscriber_gets_latest_snapshot():
+    hub = ListenerHub(max_workers=2)
+    query = FakeSnapshotQuery()
+    hub.subscribe('London', query, lambda docs, changes, read_time: None)
+    query.emit_modified('London', temperature=18.0)
+    query.emit_modified('London', temperature=20.0)
+
+    received = []
+    delivered = threading.Event()
+    hub.subscribe('London', query,
+                  lambda docs, changes, read_time: (received.append(changes), delivered.set()))
+    assert delivered.wait(5)
+    assert query.watch_count == 1
+    assert [change.type.name for change in received[0]] == ['ADDED']
+    assert received[0][0].document.to_dict()['temperature'] == 20.0
+    hub.close()
+
+def test_slow_callbacks_do_not_hold_dispatcher_threads():
+    hub = ListenerHub(max_workers=2)
+    query = FakeSnapshotQuery()
+    for _ in range(2):
+        hub.subscribe('London', query, lambda *event: time.sleep(0.2))
+    fast_done = threading.Event()
+    received = []
+    hub.subscribe('London', query,
+                  lambda *event: (received.append(event), len(received) == 5 and fast_done.set()))
+
+    start = time.perf_counter()
+    for _ in range(5):
+        query.emit_modified('London')
+    # Draining both slow queues first would take a second
+    assert fast_done.wait(5)
+    assert time.perf_counter() - start < 0.7
+    hub.close()
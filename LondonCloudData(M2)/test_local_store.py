@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+import weather_dashboard
+from fake_firestore import FakeFirestore
+from local_store import LocalWeatherStore
+from weather_dashboard import WeatherDashboard
+
+@pytest.fixture
+def dashboard(monkeypatch, tmp_path):
+    db = FakeFirestore()
+    monkeypatch.setattr(weather_dashboard.firebase_admin, 'get_app', lambda: None)
+    monkeypatch.setattr(weather_dashboard.firestore, 'client', lambda: db)
+    return WeatherDashboard('unused.json', cache_path=str(tmp_path / 'cache.db'), sync_interval=60)
+
+def test_offline_reads_wait_for_sync_interval(dashboard, monkeypatch):
+    dashboard.save_london_weather_day(pd.Timestamp('2024-01-01'), {'mean_temp': 5.0})
+    attempts = []
+
+    def offline(*args, **kwargs):
+        attempts.append(1)
+        raise ConnectionError('offline')
+
+    monkeypatch.setattr(dashboard, 'sync_local_cache', offline)
+    for _ in range(3):
+        frame = dashboard.get_london_weather_frame()
+    assert len(attempts) == 1
+    assert frame['mean_temp'].tolist() == [5.0]
+
+def test_delete_missing_keeps_everything_for_an_empty_listing(tmp_path):
+    store = LocalWeatherStore(str(tmp_path / 'cache.db'))
+    store.upsert([('19790101', {'date': '1979-01-01'}), ('19790102', {'date': '1979-01-02'})])
+
+    assert store.delete_missing([]) == 0
+    assert store.last_date() == '1979-01-02'
+    assert store.delete_missing(iter(['19790101'])) == 1
+    assert store.last_date() == '1979-01-01'
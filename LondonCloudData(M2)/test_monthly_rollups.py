@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+import weather_dashboard
+from fake_firestore import FakeFirestore
+from monthly_rollups import rebuild_rollups
+from weather_dashboard import WeatherDashboard
+from weather_serializer import frame_to_documents
+
+@pytest.fixture
+def dashboard(monkeypatch):
+    db = FakeFirestore()
+    monkeypatch.setattr(weather_dashboard.firebase_admin, 'get_app', lambda: None)
+    monkeypatch.setattr(weather_dashboard.firestore, 'client', lambda: db)
+    return WeatherDashboard('unused.json')
+
+def write_days_without_rollups(db, df):
+    # Documents written before rollups existed, e.g. by an older importer
+    batch = db.batch()
+    for doc_id, payload in zip(*frame_to_documents(df)):
+        batch.set(db.collection('london_weather').document(doc_id), payload)
+    batch.commit()
+
+def test_partial_rollups_fall_back_to_daily_documents(dashboard):
+    dates = pd.date_range('2020-01-01', '2020-03-31')
+    df = pd.DataFrame({'date': dates, 'mean_temp': range(len(dates))}).astype({'mean_temp': 'float64'})
+    write_days_without_rollups(dashboard.db, df)
+    dashboard.save_london_weather_day(datetime(2020, 4, 1), {'mean_temp': 100.0})
+
+    averages = dashboard.get_monthly_averages()
+    assert sorted(str(month) for month in averages) == ['2020-01', '2020-02', '2020-03', '2020-04']
+    assert averages[pd.Period('2020-01', 'M')] == pytest.approx(15.0)
+
+    rebuild_rollups(dashboard.db)
+    dashboard._monthly_cube = None
+    assert dashboard.get_monthly_averages() == pytest.approx(averages)
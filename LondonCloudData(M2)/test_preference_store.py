@@ -0,0 +1,87 @@
+from google.cloud.firestore_v1.watch import ChangeType, DocumentChange
+from fake_firestore import (FakeDocumentReference, FakeDocumentSnapshot, FakeFirestore,
+                            FakeSnapshotQuery)
+from preference_store import PreferenceStore
+
+def test_cached_preferences_are_not_shared():
+    store = PreferenceStore(FakeFirestore())
+    preferences = {'favorite_locations': ['London'], 'temperature_unit': 'Celsius'}
+    store.save('user', preferences)
+    preferences['favorite_locations'].append('Leeds')
+
+    first = store.get('user')
+    first['favorite_locations'].append('Paris')
+    store.get_many(['user'])['user']['favorite_locations'].clear()
+
+    assert store.get('user') == {'favorite_locations': ['London'], 'temperature_unit': 'Celsius'}
+
+class ListenedFirestore(FakeFirestore):
+    """FakeFirestore whose collections hand on_snapshot to one FakeSnapshotQuery."""
+
+    def __init__(self):
+        super().__init__()
+        self.snapshots = FakeSnapshotQuery('user_preferences')
+
+    def collection(self, name):
+        collection = super().collection(name)
+        collection.on_snapshot = self.snapshots.on_snapshot
+        return collection
+
+def _change(kind, user_id, data=None):
+    ref = FakeDocumentReference(None, 'user_preferences', user_id)
+    return DocumentChange(kind, FakeDocumentSnapshot(ref, data), 0, 0)
+
+def test_get_many_reads_misses_in_batches():
+    db = FakeFirestore()
+    store = PreferenceStore(db, listen=False)
+    store.save_many({f'user{i}': {'temperature_unit': 'Celsius'} for i in range(0, 1200, 2)})
+    store.invalidate()
+    calls = []
+    get_all = db.get_all
+    db.get_all = lambda refs: calls.append(len(refs)) or get_all(refs)
+
+    result = store.get_many(f'user{i}' for i in range(1200))
+
+    assert calls == [500, 500, 200]
+    assert db.read_count == 1200
+    assert result['user0'] == {'temperature_unit': 'Celsius'}
+    assert result['user1'] is None
+    assert store.misses == 1200
+
+def test_cached_users_are_not_read_again():
+    db = FakeFirestore()
+    store = PreferenceStore(db, listen=False)
+    store.save_many({'a': {'temperature_unit': 'Celsius'}, 'b': {'temperature_unit': 'Fahrenheit'}})
+    store.invalidate(['b'])
+
+    assert store.get_many(['a', 'b', 'c']) == {
+        'a': {'temperature_unit': 'Celsius'}, 'b': {'temperature_unit': 'Fahrenheit'}, 'c': None}
+    assert db.read_count == 2
+    assert (store.hits, store.misses) == (1, 2)
+
+    store.get_many(['a', 'b', 'c'])
+    store.get('c')
+    assert db.read_count == 2
+    assert (store.hits, store.misses) == (5, 2)
+
+def test_snapshot_listener_refreshes_cached_users():
+    db = ListenedFirestore()
+    store = PreferenceStore(db)
+    store.save_many({'a': {'temperature_unit': 'Celsius'}, 'b': {'temperature_unit': 'Celsius'}})
+    store.invalidate()
+    store.get_many(['a', 'b'])
+    assert db.snapshots.watch_count == 1
+    reads = db.read_count
+
+    db.snapshots.emit([], [_change(ChangeType.MODIFIED, 'a', {'temperature_unit': 'Fahrenheit'}),
+                           _change(ChangeType.REMOVED, 'b'),
+                           _change(ChangeType.ADDED, 'c', {'temperature_unit': 'Celsius'})])
+
+    assert store.get_many(['a', 'b']) == {'a': {'temperature_unit': 'Fahrenheit'}, 'b': None}
+    assert db.read_count == reads
+    # Users that weren't cached are still read from Firestore
+    assert store.get('c') is None
+    assert db.read_count == reads + 1
+
+    store.close()
+    assert db.snapshots._watches == []
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+from import_london_data import import_data
+from weather_dashboard import WeatherDashboard
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'london_weather.csv')
+
+def test_sync_after_import_writes_nothing(fake_db, tmp_path, london_frame):
+    manifest_path = str(tmp_path / 'manifest.json')
+    assert import_data(fake_db, CSV_PATH, str(tmp_path / 'checkpoint.json'), manifest_path)
+    imported = {doc.id: doc.to_dict() for doc in fake_db.collection('london_weather').stream()}
+    writes = fake_db.write_count
+
+    dashboard = WeatherDashboard('unused.json')
+    report = dashboard.sync_london_weather_data(london_frame, manifest_path=manifest_path)
+
+    assert report == {'insert': 0, 'update': 0, 'skip': len(imported)}
+    assert fake_db.write_count == writes
+    synced = {doc.id: doc.to_dict() for doc in fake_db.collection('london_weather').stream()}
+    assert synced == imported
+
+def test_sync_merges_changed_days(fake_db, tmp_path, london_frame):
+    manifest_path = str(tmp_path / 'manifest.json')
+    assert import_data(fake_db, CSV_PATH, str(tmp_path / 'checkpoint.json'), manifest_path)
+    day = fake_db.collection('london_weather').document('1979-01-01').get().to_dict()
+
+    df = london_frame
+    df.loc[df.index[0], 'mean_temp'] = 20.0
+    dashboard = WeatherDashboard('unused.json')
+    report = dashboard.sync_london_weather_data(df, manifest_path=manifest_path)
+
+    assert report['update'] == 1 and report['insert'] == 0
+    assert fake_db.collection('london_weather').document('1979-01-01').get().to_dict() == \
+        {**day, 'mean_temp': 20.0}
+    rollup = fake_db.collection('london_weather_monthly').document('1979-01').get().to_dict()
+    assert rollup['max_temp_count'] == 31
+    assert rollup['mean_temp_sum'] == pytest.approx(
+        df.loc[df['date'].dt.month == 1, 'mean_temp'].sum())
+
+def test_sync_restores_a_day_changed_by_save(fake_db, tmp_path, london_frame):
+    manifest_path = str(tmp_path / 'manifest.json')
+    df = london_frame.head(40)
+    dashboard = WeatherDashboard('unused.json')
+    dashboard.sync_london_weather_data(df, manifest_path=manifest_path)
+
+    changed = df.head(1).assign(mean_temp=30.0)
+    dashboard.save_london_weather_data(changed, manifest_path=manifest_path)
+    report = dashboard.sync_london_weather_data(df, manifest_path=manifest_path)
+
+    assert report == {'insert': 0, 'update': 1, 'skip': 39}
+    day = fake_db.collection('london_weather').document('1979-01-01').get().to_dict()
+    assert day['mean_temp'] == df['mean_temp'].iloc[0]
@@ -0,0 +1,15 @@
+from weather_dashboard import WeatherDashboard
+
+def test_history_limit_bounds_the_reads(fake_db, london_frame):
+    dashboard = WeatherDashboard('unused.json')
+    dashboard.save_london_weather_data(london_frame)
+    fake_db.read_count = 0
+
+    history = dashboard.get_london_weather_history(limit=10)
+    assert [day['date'][:10] for day in history] == \
+        london_frame['date'].head(10).dt.strftime('%Y-%m-%d').tolist()
+    assert fake_db.read_count == 10
+
+    # Limits across several pages still stop at the limit
+    assert len(dashboard.get_london_weather_history(limit=60, page_size=25)) == 60
+    assert len(dashboard.get_london_weather_history(page_size=25)) == len(london_frame)
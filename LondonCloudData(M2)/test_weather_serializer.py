@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from weather_serializer import chunked, frame_to_documents
+
+def test_documents_are_keyed_by_day_with_none_for_missing():
+    df = pd.DataFrame({'date': pd.to_datetime(['2024-01-02', '2024-01-01']),
+                       'mean_temp': [1.5, np.nan],
+                       'precipitation': np.array([0.1, 0.2], dtype='float32')})
+    doc_ids, payloads = frame_to_documents(df, ['mean_temp', 'precipitation', 'snow_depth'])
+    assert doc_ids == ['2024-01-02', '2024-01-01']
+    assert payloads[0] == {'date': '2024-01-02T00:00:00', 'mean_temp': 1.5,
+                           'precipitation': pytest.approx(0.1), 'snow_depth': None}
+    assert payloads[1]['mean_temp'] is None and payloads[1]['snow_depth'] is None
+
+def test_times_are_kept_in_the_iso_date():
+    df = pd.DataFrame({'date': pd.to_datetime(['2024-01-01 06:30']), 'mean_temp': [1.0]})
+    doc_ids, payloads = frame_to_documents(df, ['mean_temp'])
+    assert doc_ids == ['2024-01-01'] and payloads[0]['date'] == '2024-01-01T06:30:00'
+
+def test_undated_rows_are_rejected():
+    df = pd.DataFrame({'date': pd.to_datetime(['2024-01-01', None, None]), 'mean_temp': [1.0, 2.0, 3.0]})
+    with pytest.raises(ValueError, match='2 rows have no date'):
+        frame_to_documents(df, ['mean_temp'])
+
+def test_chunks_follow_frame_position_not_index():
+    dates = pd.date_range('2024-01-01', periods=1203)
+    # A shuffled, repeated index must not change the order or the chunks
+    df = pd.DataFrame({'date': dates, 'mean_temp': np.arange(len(dates), dtype='float64')},
+                      index=np.random.default_rng(0).integers(0, 10, len(dates)))
+    doc_ids, payloads = frame_to_documents(df, ['mean_temp'])
+    chunks = list(zip(chunked(doc_ids), chunked(payloads)))
+    assert [len(ids) for ids, _ in chunks] == [500, 500, 203]
+    assert [payload['mean_temp'] for _, chunk in chunks for payload in chunk] == \
+        df['mean_temp'].tolist()
+    assert [doc_id for ids, _ in chunks for doc_id in ids] == dates.strftime('%Y-%m-%d').tolist()
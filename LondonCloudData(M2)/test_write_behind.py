@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+from fake_firestore import FakeFirestore
+from write_behind import WriteBehindBuffer, WriteBehindError
+
+def reading(i):
+    return {'location': 'London', 'temperature': float(i), 'timestamp': f'2024-01-01T00:00:{i % 60:02d}'}
+
+def test_put_racing_close_is_written_or_rejected():
+    db = FakeFirestore()
+    buffer = WriteBehindBuffer(db, flush_interval=0.01)
+    accepted, rejected = [], []
+
+    def produce():
+        for i in range(2000):
+            try:
+                accepted.append(buffer.put(reading(i)))
+            except RuntimeError:
+                rejected.append(i)
+
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    buffer.close()
+    for thread in threads:
+        thread.join()
+
+    written = {doc.id for doc in db.collection('weather_data').stream()}
+    assert written == set(accepted)
+    assert len(accepted) + len(rejected) == 8000
+    with pytest.raises(RuntimeError):
+        buffer.put(reading(0))
+
+def test_failed_batches_raise_on_close():
+    db = FakeFirestore()
+    buffer = WriteBehindBuffer(db, max_retries=2, flush_interval=0.01)
+    db.fail_next_commits(ConnectionError('offline'), times=2)
+    doc_id = buffer.put(reading(1))
+    with pytest.raises(WriteBehindError) as raised:
+        buffer.close()
+    assert [item[0] for item in raised.value.items] == [doc_id]
+    assert buffer.failed == 1
+
+def test_failed_batches_go_to_error_callback():
+    db = FakeFirestore()
+    failures = []
+    buffer = WriteBehindBuffer(db, max_retries=1, flush_interval=0.01,
+                               on_error=lambda items, error: failures.append((items, error)))
+    db.fail_next_commits(ConnectionError('offline'))
+    buffer.put(reading(1))
+    buffer.close()
+    assert len(failures) == 1 and isinstance(failures[0][1], ConnectionError)
+
+def test_close_does_not_wait_behind_a_blocked_put():
+    db = FakeFirestore()
+    release = threading.Event()
+    commit = db._commit
+    db._commit = lambda ops: release.wait() and commit(ops)
+    buffer = WriteBehindBuffer(db, max_batch=1, capacity=1, flush_interval=0.01)
+    accepted = []
+
+    def wait_for(condition):
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    try:
+        accepted.append(buffer.put(reading(1)))
+        wait_for(buffer._queue.empty)  # The flusher has taken it and is stuck committing
+        accepted.append(buffer.put(reading(2)))
+        blocked = threading.Thread(target=lambda: accepted.append(buffer.put(reading(3))))
+        blocked.start()
+        wait_for(lambda: getattr(buffer, '_putting', 0))
+        closer = threading.Thread(target=buffer.close)
+        closer.start()
+        wait_for(lambda: buffer._closed)
+        with pytest.raises(RuntimeError):
+            buffer.put(reading(4), timeout=1)
+    finally:
+        release.set()
+    blocked.join()
+    closer.join()
+    written = {doc.id for doc in db.collection('weather_data').stream()}
+    assert written == set(accepted) and len(written) == 3
+
+def test_no_backoff_after_the_last_attempt(monkeypatch):
+    sleeps = []
+    sleep = time.sleep
+
+    def record(seconds):
+        if threading.current_thread().name == 'weather-write-behind':
+            sleeps.append(seconds)
+        sleep(seconds)
+
+    monkeypatch.setattr(time, 'sleep', record)
+    db = FakeFirestore()
+    buffer = WriteBehindBuffer(db, max_retries=3, flush_interval=0.01, on_error=lambda *args: None)
+    db.fail_next_commits(ConnectionError('offline'), times=3)
+    buffer.put(reading(1))
+    buffer.close()
+    assert sleeps == [0.1, 0.2]
@@ -1,10 +1,22 @@
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 from firebase_admin.exceptions import FirebaseError
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable
+import itertools
 import json
+import time
 import pandas as pd
+import london_data_bridge  # noqa: F401
+from aggregates import AggregateCube
+from weather_serializer import frame_to_documents
+from sync_manifest import LONDON_WEATHER_MANIFEST, SyncManifest, record_saved
+from local_store import LocalWeatherStore
+from monthly_rollups import write_days_with_rollups, monthly_rollups_frame, rollups_complete
+from listener_hub import ListenerHub, Subscription
+from write_behind import WriteBehindBuffer, observation_id
+from preference_store import PreferenceStore
+from climatology import Climatology
 
 class WeatherDashboard:
     """
@@ -13,12 +25,37 @@ class WeatherDashboard:
     preferences, and real-time weather updates.
     """
 
-    def __init__(self, credentials_path: str):
+    # Fields written to london_weather documents by the dashboard's save methods
+    LONDON_WEATHER_FIELDS = ['mean_temp', 'cloud_cover', 'precipitation']
+
+    # Reading fields scored against the climatology column of the same quantity
+    ANOMALY_FIELDS = {'temperature': 'mean_temp'}
+
+    def __init__(self, credentials_path: str, cache_path: Optional[str] = None,
+                 sync_interval: float = 60, reconcile_interval: timedelta = timedelta(days=1),
+                 listener_workers: int = 4, listener_debounce: float = 0.0,
+                 write_behind: bool = False, preference_cache_size: int = 10000,
+                 climatology_path: Optional[str] = None):
         """
         Initialize Firebase connection with credentials.
 
         Args:
             credentials_path: Path to Firebase credentials JSON file
+            cache_path: Optional SQLite file for a local read-through copy of
+                london_weather; reads are then served from it after a delta sync
+            sync_interval: Minimum seconds between delta syncs of the local copy,
+                or between retries while Firestore is unreachable
+            reconcile_interval: How often the local copy is checked for documents
+                deleted in Firestore
+            listener_workers: Threads delivering real-time listener callbacks
+            listener_debounce: Seconds over which bursts of MODIFIED updates to a
+                document are coalesced before delivery; 0 disables coalescing
+            write_behind: Buffer save_weather_data writes and commit them in
+                background batches instead of one round-trip per call
+            preference_cache_size: Users whose preferences are cached in memory;
+                0 reads every request from Firestore
+            climatology_path: Saved Climatology baseline; when given, weather
+                readings are stored with their standardized anomalies
 
         Raises:
             FileNotFoundError: If credentials file doesn't exist
@@ -34,7 +71,17 @@ class WeatherDashboard:
                 firebase_admin.initialize_app(cred)
             
             self.db = firestore.client()
-            self._listeners = {}  # Store active listeners
+            self._listeners = {}  # Active subscriptions per location
+            self._hub = ListenerHub(max_workers=listener_workers, debounce=listener_debounce)
+            self._monthly_cube = None  # Built on the first get_monthly_averages call
+            self._store = LocalWeatherStore(cache_path) if cache_path else None
+            self.sync_interval = sync_interval
+            self.reconcile_interval = reconcile_interval
+            self._last_sync = None
+            self._weather_buffer = WriteBehindBuffer(self.db) if write_behind else None
+            self.preferences = PreferenceStore(self.db, max_size=preference_cache_size,
+                                               validate=self._validate_preferences)
+            self.climatology = Climatology.load(climatology_path) if climatology_path else None
         except Exception as e:
             raise ConnectionError(f"Failed to initialize Firebase: {str(e)}")
 
@@ -52,9 +99,26 @@ class WeatherDashboard:
             FirebaseError: If database operation fails
         """
         try:
-            self._validate_preferences(preferences)
-            doc_ref = self.db.collection('user_preferences').document(user_id)
-            doc_ref.set(preferences)
+            self.preferences.save(user_id, preferences)
+        except Exception as e:
+            raise FirebaseError(f"Failed to save preferences: {str(e)}")
+
+    def save_weather_preferences_many(self, preferences: Dict[str, Dict]) -> int:
+        """
+        Save preferences for many users in batched writes.
+
+        Args:
+            preferences: Preferences dictionaries keyed by user ID
+
+        Returns:
+            Number of users saved
+
+        Raises:
+            ValueError: If any preferences are invalid; nothing is written
+            FirebaseError: If database operation fails
+        """
+        try:
+            return self.preferences.save_many(preferences)
         except Exception as e:
             raise FirebaseError(f"Failed to save preferences: {str(e)}")
 
@@ -79,22 +143,27 @@ class WeatherDashboard:
         if preferences['temperature_unit'] not in valid_units:
             raise ValueError(f"temperature_unit must be one of {valid_units}")
 
-    def save_weather_data(self, location: str, data: Dict) -> None:
+    def save_weather_data(self, location: str, data: Dict) -> str:
         """
         Save weather data for a specific location.
 
+        With write-behind enabled the document is queued and written in a
+        later batch; the call blocks only while the buffer is full.
+
         Args:
             location: Location identifier
             data: Weather data dictionary containing temperature, humidity, conditions
 
+        Returns:
+            ID of the weather_data document
+
         Raises:
             ValueError: If data format is invalid
             FirebaseError: If database operation fails
         """
+        self._validate_weather_data(data)
         try:
-            self._validate_weather_data(data)
             timestamp = datetime.now().isoformat()
-            doc_ref = self.db.collection('weather_data').document(timestamp)
             weather_data = {
                 'location': location,
                 'temperature': data['temperature'],
@@ -102,66 +171,226 @@ class WeatherDashboard:
                 'conditions': data['conditions'],
                 'timestamp': timestamp
             }
-            doc_ref.set(weather_data)
+            weather_data.update(self.reading_anomalies(weather_data))
+            if self._weather_buffer is not None:
+                return self._weather_buffer.put(weather_data)
+            doc_id = observation_id(timestamp)
+            self.db.collection('weather_data').document(doc_id).set(weather_data)
+            return doc_id
         except Exception as e:
             raise FirebaseError(f"Failed to save weather data: {str(e)}")
 
-    def add_realtime_weather_listener(self, location: str, callback: Callable) -> None:
+    def _validate_weather_data(self, data: Dict) -> None:
+        """
+        Validate weather data format.
+
+        Args:
+            data: Weather data dictionary
+
+        Raises:
+            ValueError: If weather data format is invalid
+        """
+        required_fields = ['temperature', 'humidity', 'conditions']
+        if not all(field in data for field in required_fields):
+            raise ValueError("Missing required weather data fields")
+
+    def reading_anomalies(self, reading: Dict) -> Dict[str, float]:
+        """
+        Score one weather_data reading against the climatology baseline.
+
+        Args:
+            reading: Document data with an ISO `timestamp` and the ANOMALY_FIELDS
+
+        Returns:
+            Dict of `<field>_anomaly` standardized anomalies; empty without a
+            baseline or a parseable timestamp
+        """
+        if self.climatology is None:
+            return {}
+        try:
+            when = datetime.fromisoformat(reading['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return {}
+        anomalies = {}
+        for field, column in self.ANOMALY_FIELDS.items():
+            anomaly = self.climatology.anomaly(column, when, reading.get(field))
+            if anomaly == anomaly:  # Skip NaN
+                anomalies[f'{field}_anomaly'] = anomaly
+        return anomalies
+
+    def flush_weather_data(self) -> None:
+        """
+        Write any buffered weather data and stop buffering further calls.
+
+        Raises:
+            write_behind.WriteBehindError: If buffered documents could not be
+                written; its `items` holds them for retrying
+        """
+        if self._weather_buffer is not None:
+            buffer, self._weather_buffer = self._weather_buffer, None
+            buffer.close()
+
+    def add_realtime_weather_listener(self, location: str, callback: Callable,
+                                      queue_size: Optional[int] = None,
+                                      overflow: Optional[str] = None) -> Subscription:
         """
         Add a real-time listener for weather updates.
 
+        All listeners for a location share one Firestore watch. Callbacks run on
+        the dashboard's dispatcher threads, not the watch thread, so a slow
+        callback only falls behind on its own bounded queue.
+
         Args:
             location: Location to monitor
             callback: Function to call when data changes
+            queue_size: Maximum undelivered updates held for this listener
+            overflow: 'drop_oldest' or 'drop_newest' when the queue is full
 
         Returns:
-            None
+            Subscription that can be passed to remove_weather_listener
         """
         doc_ref = self.db.collection('weather_data')
         query = doc_ref.where('location', '==', location)
-        self._listeners[location] = query.on_snapshot(callback)
+        subscription = self._hub.subscribe(('weather_data', location), query, callback,
+                                           queue_size, overflow)
+        self._listeners.setdefault(location, []).append(subscription)
+        return subscription
 
-    def remove_weather_listener(self, location: str) -> None:
+    def add_anomaly_listener(self, location: str, callback: Callable,
+                             queue_size: Optional[int] = None,
+                             overflow: Optional[str] = None) -> Subscription:
+        """
+        Add a real-time listener that receives readings with their anomalies.
+
+        Shares the location's watch with add_realtime_weather_listener. Each
+        added or modified reading is scored against the climatology baseline
+        on the dispatcher thread, so readings written by other clients get
+        anomalies too.
+
+        Args:
+            location: Location to monitor
+            callback: Called with a list of reading dicts, each including its
+                `<field>_anomaly` values
+            queue_size: Maximum undelivered updates held for this listener
+            overflow: 'drop_oldest' or 'drop_newest' when the queue is full
+
+        Returns:
+            Subscription that can be passed to remove_weather_listener
+        """
+        if self.climatology is None:
+            raise ValueError("No climatology baseline; pass climatology_path")
+
+        def on_changes(docs, changes, read_time):
+            readings = []
+            for change in changes:
+                if change.type.name in ('ADDED', 'MODIFIED'):
+                    reading = change.document.to_dict()
+                    reading.update(self.reading_anomalies(reading))
+                    readings.append(reading)
+            if readings:
+                callback(readings)
+
+        return self.add_realtime_weather_listener(location, on_changes, queue_size, overflow)
+
+    def remove_weather_listener(self, location: str,
+                                subscription: Optional[Subscription] = None) -> None:
         """
         Remove real-time listener for a location.
 
         Args:
             location: Location to stop monitoring
+            subscription: Remove only this listener; by default all listeners
+                for the location are removed
         """
-        if location in self._listeners:
-            self._listeners[location].unsubscribe()
-            del self._listeners[location]
+        subscriptions = self._listeners.get(location, [])
+        for existing in list(subscriptions):
+            if subscription is None or existing is subscription:
+                existing.unsubscribe()
+                subscriptions.remove(existing)
+        if not subscriptions:
+            self._listeners.pop(location, None)
 
-    def save_london_weather_data(self, df):
+    def save_london_weather_data(self, df, max_workers=1, manifest_path=LONDON_WEATHER_MANIFEST):
         """
         Save London weather data from DataFrame to Firestore
+
+        Payloads are built column-wise and written together with their monthly
+        rollups in transactions of up to 400 days, optionally from a thread
+        pool of `max_workers`. They are merged into existing documents, so
+        fields written by the bulk importer are kept. If the sync manifest at
+        `manifest_path` exists, the saved field hashes are recorded in it, so
+        a later sync_london_weather_data compares against what was saved.
         """
-        batch = self.db.batch()
-        for index, row in df.iterrows():
-            doc_ref = self.db.collection('london_weather').document(str(row['date'].date()))
-            weather_data = {
-                'date': row['date'].isoformat(),
-                'mean_temp': float(row['mean_temp']),
-                'cloud_cover': float(row['cloud_cover']) if 'cloud_cover' in row else None,
-                'precipitation': float(row['precipitation']) if 'precipitation' in row else None
-            }
-            batch.set(doc_ref, weather_data)
-            
-            # Commit every 500 records (Firestore batch limit)
-            if index % 499 == 0 and index > 0:
-                batch.commit()
-                batch = self.db.batch()
-        
-        # Commit any remaining records
-        batch.commit()
+        doc_ids, payloads = frame_to_documents(df, self.LONDON_WEATHER_FIELDS)
+        write_days_with_rollups(self.db, doc_ids, payloads, max_workers=max_workers, merge=True)
+        record_saved(manifest_path, doc_ids, payloads)
+        if self._store is not None:
+            self._store.upsert(zip(doc_ids, payloads), merge=True)
+        self._update_monthly_cube(df)
+
+    def sync_london_weather_data(self, df, manifest_path=LONDON_WEATHER_MANIFEST,
+                                 dry_run=False, max_workers=1) -> Dict[str, int]:
+        """
+        Write only the London weather documents that are new or have changed.
+
+        The manifest is shared with import_london_data.py. It hashes each field
+        separately, so days the importer wrote are skipped when their
+        LONDON_WEATHER_FIELDS are unchanged, and changed days are merged into
+        their documents without losing the importer's other fields.
+
+        Args:
+            df: Frame with a datetime `date` column
+            manifest_path: Local SyncManifest of the field hashes already written
+            dry_run: Report what would be written without writing
+            max_workers: Batches committed concurrently from a thread pool
+
+        Returns:
+            Dict with insert, update and skip counts
+        """
+        doc_ids, payloads = frame_to_documents(df, self.LONDON_WEATHER_FIELDS)
+        manifest = SyncManifest(manifest_path)
+        plan = manifest.plan(doc_ids, payloads)
+        if not dry_run and plan.doc_ids:
+            write_days_with_rollups(self.db, plan.doc_ids, plan.payloads,
+                                    max_workers=max_workers, merge=True)
+            manifest.record(plan.doc_ids, plan.hashes)
+            if self._store is not None:
+                self._store.upsert(zip(plan.doc_ids, plan.payloads), merge=True)
+            written = set(plan.doc_ids)
+            self._update_monthly_cube(df[[doc_id in written for doc_id in doc_ids]])
+        return plan.report()
+
+    def save_london_weather_day(self, date: datetime, data: Dict) -> None:
+        """
+        Save a single day of London weather, keeping its monthly rollup in step.
+
+        Args:
+            date: Day to save
+            data: Measurements for the day, e.g. mean_temp, cloud_cover, precipitation
+        """
+        self.save_london_weather_data(pd.DataFrame([{'date': pd.Timestamp(date), **data}]))
+
+    def _update_monthly_cube(self, df) -> None:
+        # Fold newly appended days into the cached aggregates; the cube skips
+        # days it has already counted, so after rewriting older days drop it
+        # and rebuild it lazily
+        if self._monthly_cube is not None:
+            if df['date'].min() <= pd.Timestamp(self._monthly_cube.last_day):
+                self._monthly_cube = None
+            else:
+                self._monthly_cube.append(df)
 
     def get_user_preferences(self, user_id):
         """
         Retrieve user preferences
         """
-        doc_ref = self.db.collection('user_preferences').document(user_id)
-        doc = doc_ref.get()
-        return doc.to_dict() if doc.exists else None
+        return self.preferences.get(user_id)
+
+    def get_user_preferences_many(self, user_ids):
+        """
+        Retrieve preferences for many users, keyed by user ID
+        """
+        return self.preferences.get_many(user_ids)
 
     def get_weather_history(self, location, limit=10):
         """
@@ -174,9 +403,34 @@ class WeatherDashboard:
                 .stream())
         return [doc.to_dict() for doc in docs]
 
-    def get_london_weather_history(self, start_date=None, end_date=None, limit=100):
+    def get_london_weather_history(self, start_date=None, end_date=None, limit=None,
+                                   page_size=500):
+        """
+        Retrieve London weather history with optional date filtering, ordered by date
         """
-        Retrieve London weather history with optional date filtering
+        if self._use_local_cache():
+            return self._store.history(start_date, end_date, limit)
+        if limit is not None:
+            # Don't fetch (and pay for) more documents than will be returned
+            page_size = min(page_size, limit)
+        docs = self.iter_london_weather(start_date, end_date, page_size=page_size)
+        return [doc.to_dict() for doc in itertools.islice(docs, limit)]
+
+    def iter_london_weather(self, start_date=None, end_date=None, page_size=500, fields=None):
+        """
+        Stream London weather documents in date order, one page at a time.
+
+        Each page is a separate query resumed with a start_after cursor on the
+        previous page's last document, so no single query holds the whole range.
+
+        Args:
+            start_date: Optional inclusive lower bound
+            end_date: Optional inclusive upper bound
+            page_size: Documents fetched per query
+            fields: Optional list of fields to project; `date` is always included
+
+        Yields:
+            Document snapshots
         """
         query = self.db.collection('london_weather')
         
@@ -184,31 +438,139 @@ class WeatherDashboard:
             query = query.where('date', '>=', start_date.isoformat())
         if end_date:
             query = query.where('date', '<=', end_date.isoformat())
-            
-        docs = query.limit(limit).stream()
-        return [doc.to_dict() for doc in docs]
+        if fields is not None:
+            query = query.select(['date', *[f for f in fields if f != 'date']])
+        query = query.order_by('date')
+
+        last_doc = None
+        while True:
+            page = query.limit(page_size)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+            docs = list(page.stream())
+            yield from docs
+            if len(docs) < page_size:
+                return
+            last_doc = docs[-1]
+
+    def get_london_weather_frame(self, start_date=None, end_date=None,
+                                 fields=('mean_temp', 'cloud_cover', 'precipitation'),
+                                 page_size=500) -> pd.DataFrame:
+        """
+        Load London weather history straight into a typed DataFrame.
+
+        Pages are streamed with iter_london_weather and only the projected fields
+        are read, filling per-column lists instead of building a dict per document.
+
+        Returns:
+            DataFrame with a datetime `date` column and float64 measurement columns,
+            sorted by date
+        """
+        if self._use_local_cache():
+            return self._store.frame(start_date, end_date, fields)
+        fields = [f for f in fields if f != 'date']
+        columns = {field: [] for field in ['date', *fields]}
+        for doc in self.iter_london_weather(start_date, end_date, page_size, fields):
+            data = doc.to_dict()
+            for field, values in columns.items():
+                values.append(data.get(field))
+
+        df = pd.DataFrame({
+            field: pd.to_numeric(pd.Series(values, dtype='object'), errors='coerce')
+                     .astype('float64')
+            for field, values in columns.items() if field != 'date'
+        })
+        df.insert(0, 'date', pd.to_datetime(pd.Series(columns['date'], dtype='object'))
+                         .astype('datetime64[ns]'))
+        return df
+
+    def sync_local_cache(self, reconcile_deletes: Optional[bool] = None) -> Dict[str, int]:
+        """
+        Bring the local london_weather copy up to date with Firestore.
+
+        Only documents dated on or after the newest cached date are fetched, so
+        the cost is proportional to what is new. Documents deleted in Firestore
+        are reconciled by listing document IDs, which happens when
+        `reconcile_deletes` is True or, if it is None, once per reconcile_interval.
+        Historical documents rewritten in place are not re-fetched until the
+        cache file is removed.
+
+        Returns:
+            Dict with the number of documents fetched and deleted locally
+        """
+        if self._store is None:
+            raise ValueError("No local cache configured")
+
+        last_date = self._store.last_date()
+        start_date = datetime.fromisoformat(last_date) if last_date else None
+        fetched = self._store.upsert((doc.id, doc.to_dict())
+                                     for doc in self.iter_london_weather(start_date=start_date))
+
+        deleted = 0
+        last_reconciled = self._store.get_meta('last_reconciled')
+        if reconcile_deletes is None:
+            # A cache filled from scratch has nothing stale to reconcile yet
+            reconcile_deletes = last_date is not None and (
+                last_reconciled is None or
+                datetime.now() - datetime.fromisoformat(last_reconciled) >= self.reconcile_interval)
+        if reconcile_deletes:
+            refs = self.db.collection('london_weather').list_documents()
+            deleted = self._store.delete_missing(ref.id for ref in refs)
+        if reconcile_deletes or last_reconciled is None:
+            self._store.set_meta('last_reconciled', datetime.now().isoformat())
+
+        self._last_sync = time.monotonic()
+        return {'fetched': fetched, 'deleted': deleted}
+
+    def _use_local_cache(self) -> bool:
+        # Delta-sync at most once per sync_interval; if Firestore is unreachable,
+        # keep serving the local copy so the dashboards work offline. A failed
+        # attempt also counts, so offline reads don't each wait out a timeout.
+        if self._store is None:
+            return False
+        if self._last_sync is None or time.monotonic() - self._last_sync >= self.sync_interval:
+            try:
+                self.sync_local_cache()
+            except Exception as e:
+                self._last_sync = time.monotonic()
+                print(f"Could not sync local weather cache, using cached data: {str(e)}")
+        return True
 
     def get_monthly_averages(self):
         """
         Calculate monthly temperature averages from stored data
+
+        Served from the london_weather_monthly rollup documents once they are
+        known to be complete (see monthly_rollups.py --rebuild), otherwise from
+        an aggregate over the daily documents.
         """
-        docs = self.db.collection('london_weather').stream()
-        data = [doc.to_dict() for doc in docs]
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        monthly_avg = df.groupby(df['date'].dt.to_period('M'))['mean_temp'].mean()
+        if rollups_complete(self.db):
+            rollups = monthly_rollups_frame(self.db)
+            if 'mean_temp_mean' in rollups.columns:
+                monthly_avg = rollups['mean_temp_mean'].dropna()
+                return {pd.Period(month, 'M'): mean for month, mean in monthly_avg.items()}
+
+        if self._monthly_cube is None:
+            if self._use_local_cache():
+                df = self._store.frame(fields=['mean_temp'])
+            else:
+                docs = self.db.collection('london_weather').stream()
+                data = [doc.to_dict() for doc in docs]
+                df = pd.DataFrame(data)
+                df['date'] = pd.to_datetime(df['date'])
+            self._monthly_cube = AggregateCube(df)
+        monthly_avg = self._monthly_cube.mean('mean_temp', 'year_month')
+        monthly_avg.index = monthly_avg.index.to_period('M')
         return monthly_avg.to_dict()
 
     def delete_preference(self, user_id):
         """
         Delete a user's preferences
         """
-        doc_ref = self.db.collection('user_preferences').document(user_id)
-        doc_ref.delete()
+        self.preferences.delete(user_id)
 
     def update_preference(self, user_id, updates):
         """
         Update specific user preferences
         """
-        doc_ref = self.db.collection('user_preferences').document(user_id)
-        doc_ref.update(updates) 
\ No newline at end of file
+        self.preferences.update(user_id, updates)
\ No newline at end of file
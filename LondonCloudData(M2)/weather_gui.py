@@ -1,71 +1,141 @@
 import tkinter as tk
 from tkinter import ttk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib import cbook
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+import numpy as np
 import pandas as pd
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 from weather_dashboard import WeatherDashboard
+import london_data_bridge  # noqa: F401
+from compact import month_categories, MONTHS
+from aggregates import AggregateCube
+from downsample import DecimatedLine
+from correlation import correlation_matrix, pair_stats, rolling_correlation
+from events import EventDetector, EVENT_DEFINITIONS
+from date_index import DateIndex
+from climatology import Climatology, CLIMATOLOGY_PATH
+from ingest import read_weather_csv, parse_date_column
 from datetime import datetime, timedelta
 
 class WeatherDashboardGUI:
+    # How often the Tk main loop checks for finished background loads (ms)
+    POLL_MS = 50
+
+    # Measurements fetched from Firestore: those the plots use plus the
+    # columns the event detector needs (max_temp for heatwaves, and so on)
+    FIELDS = list(dict.fromkeys(['mean_temp', 'cloud_cover', 'precipitation',
+                                 *(spec['column'] for spec in EVENT_DEFINITIONS.values())]))
+
     def __init__(self, root):
+        self._started = time.perf_counter()
+        self._first_paint = None
         self.root = root
         self.root.title("London Weather Dashboard")
         self.root.geometry("1200x800")
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         
-        # Initialize dashboard and load data
-        self.dashboard = WeatherDashboard('./firebase_credentials.json')
-        self.load_data()
+        # Data is loaded on a worker thread and handed back through a queue the
+        # main loop polls, so the window paints and stays responsive meanwhile
+        self.dashboard = None  # Created by the first load
+        self.df = None
+        self.cube = None
+        self.events = None
+        self.date_index = None  # Sorted days with prefix sums, for range statistics
+        self.climatology = None  # Baseline read (or fitted) once by the first load
+        self.anomalies = None
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gui-loader')
+        self._results = queue.Queue()
+        self._generation = 0  # Incremented per refresh; older results are discarded
+        self._pending = None
         
-        # Create GUI elements
+        # Create GUI elements, then start loading
         self.create_widgets()
+        self.refresh_data()
+        self.root.after(self.POLL_MS, self._poll_results)
         
-    def load_data(self):
+    def load_data(self, since=None):
+        """
+        Fetch data and build its aggregates and event detector. Runs on the
+        loader thread.
+
+        With `since`, only days after that date are fetched and neither is
+        built; the caller appends them to what it already has.
+
+        Returns:
+            (df, cube, events, date_index), with all but df None for an append
+        """
         try:
             print("Loading data from Firebase...")
-            start_date = datetime.now() - timedelta(days=365)  # Last year of data
-            data = self.dashboard.get_london_weather_history(start_date=start_date)
-            
-            if not data:  # If no data in Firebase, fall back to CSV
-                print("No data in Firebase, loading from CSV...")
-                self.df = pd.read_csv('london_weather.csv')
+            if self.dashboard is None:
+                self.dashboard = WeatherDashboard('./firebase_credentials.json',
+                                                  cache_path='london_weather_cache.db')
+            if since is None:
+                start_date = datetime.now() - timedelta(days=365)  # Last year of data
             else:
-                # Convert Firebase data to DataFrame
-                self.df = pd.DataFrame(data)
+                start_date = since + timedelta(days=1)
+            df = self.dashboard.get_london_weather_frame(start_date=start_date, fields=self.FIELDS)
             
-            # Ensure date column is datetime
-            self.df['date'] = pd.to_datetime(self.df['date'])
+            if df.empty and since is None:  # If no data in Firebase, fall back to CSV
+                print("No data in Firebase, loading from CSV...")
+                df = self._load_csv()
             print("Data loaded successfully!")
             
         except Exception as e:
             print(f"Error loading data: {str(e)}")
+            if since is not None:
+                raise
             # Fallback to CSV if Firebase fails
             print("Falling back to CSV data...")
-            self.df = pd.read_csv('london_weather.csv')
-            self.df['date'] = pd.to_datetime(self.df['date'])
+            df = self._load_csv()
+        
+        # Categorical month column for proper ordering, computed once per load
+        df['month'] = month_categories(df['date'].dt.month)
+        if since is not None:
+            return df, None, None, None
+        if self.climatology is None:
+            self.climatology = self._load_climatology(df)
+        return df, AggregateCube(df), EventDetector(df), DateIndex(df)
+
+    def _load_climatology(self, df):
+        # The saved baseline covers the full history; without one, fit it
+        # from what was loaded
+        if os.path.exists(CLIMATOLOGY_PATH):
+            try:
+                return Climatology.load(CLIMATOLOGY_PATH)
+            except (OSError, KeyError, ValueError) as e:
+                print(f"Error reading climatology: {str(e)}")
+        return Climatology.fit(df)
+
+    def _load_csv(self):
+        df = read_weather_csv('london_weather.csv', measurement_dtype='float64')
+        df['date'] = parse_date_column(df['date'])
+        return df.dropna(subset=['date']).reset_index(drop=True)
         
     def create_widgets(self):
         # Create main container
         main_container = ttk.Frame(self.root)
         main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        # Create notebook for tabs
-        notebook = ttk.Notebook(main_container)
-        notebook.pack(fill=tk.BOTH, expand=True, pady=5)
-        
-        # Temperature Trends Tab
-        temp_frame = ttk.Frame(notebook)
-        notebook.add(temp_frame, text="Temperature Trends")
-        self.create_temperature_plot(temp_frame)
-        
-        # Monthly Analysis Tab
-        monthly_frame = ttk.Frame(notebook)
-        notebook.add(monthly_frame, text="Monthly Analysis")
-        self.create_monthly_plot(monthly_frame)
-        
-        # Statistics Tab
-        stats_frame = ttk.Frame(notebook)
-        notebook.add(stats_frame, text="Statistics")
-        self.create_statistics(stats_frame)
+        # Create notebook for tabs; each tab is built the first time it is
+        # shown and afterwards updated in place when new data arrives
+        self.notebook = ttk.Notebook(main_container)
+        self.notebook.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.tab_builders = {}
+        self._rendered = set()
+        for title, builder, updater in (
+                ("Temperature Trends", self.create_temperature_plot, self.update_temperature_plot),
+                ("Monthly Analysis", self.create_monthly_plot, self.update_monthly_plot),
+                ("Statistics", self.create_statistics, self.update_statistics),
+                ("Correlations", self.create_correlation_plot, self.update_correlation_plot),
+                ("Anomalies", self.create_anomaly_plot, self.update_anomaly_plot)):
+            frame = ttk.Frame(self.notebook)
+            self.notebook.add(frame, text=title)
+            self.tab_builders[str(frame)] = (frame, builder, updater)
+        self.notebook.bind('<<NotebookTabChanged>>', self._render_current_tab)
         
         # Control Panel
         control_frame = ttk.Frame(main_container)
@@ -73,90 +143,364 @@ class WeatherDashboardGUI:
         
         ttk.Button(control_frame, text="Refresh Data", 
                   command=self.refresh_data).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="Reload All", 
+                  command=lambda: self.refresh_data(full=True)).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="Save to Firebase", 
                   command=self.save_to_firebase).pack(side=tk.LEFT, padx=5)
+        self.status = tk.StringVar(value="")
+        ttk.Label(control_frame, textvariable=self.status).pack(side=tk.RIGHT, padx=5)
+        self.progress = ttk.Progressbar(control_frame, mode='indeterminate', length=150)
+        self.progress.pack(side=tk.RIGHT, padx=5)
         
-    def create_temperature_plot(self, parent):
-        fig, ax = plt.subplots(figsize=(11, 5))
-        ax.plot(self.df['date'], self.df['mean_temp'])
+    def _attach_canvas(self, fig, parent, **pack_options):
+        # Figures are created without pyplot, so nothing outlives the widgets
+        canvas = FigureCanvasTkAgg(fig, parent)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, **pack_options)
+        return canvas
+
+    def create_temperature_plot(self, parent, changed_months=None):
+        fig = Figure(figsize=(11, 5))
+        ax = fig.add_subplot()
+        # Drawn at about two points per pixel and re-decimated when zooming
+        self.temp_trend = DecimatedLine(ax, self.df['date'], self.df['mean_temp'])
         ax.set_title('London Temperature Trends')
         ax.set_xlabel('Date')
         ax.set_ylabel('Temperature (°C)')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
         
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.temp_canvas = self._attach_canvas(fig, parent, padx=10, pady=5)
+        toolbar = NavigationToolbar2Tk(self.temp_canvas, parent, pack_toolbar=False)
+        toolbar.pack(side=tk.BOTTOM, fill=tk.X, before=self.temp_canvas.get_tk_widget())
+
+    def update_temperature_plot(self, changed_months):
+        self.temp_trend.set_data(self.df['date'], self.df['mean_temp'])
+        ax = self.temp_trend.ax
+        ax.relim()
+        ax.autoscale_view()
+        self.temp_canvas.draw_idle()
         
-    def create_monthly_plot(self, parent):
+    def create_monthly_plot(self, parent, changed_months=None):
         # Create a frame to hold both plots
         plots_frame = ttk.Frame(parent)
         plots_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
         # Monthly Box Plot
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(11, 8), height_ratios=[1.2, 1])
+        fig = Figure(figsize=(11, 8))
+        ax1, ax2 = fig.subplots(2, 1, height_ratios=[1.2, 1])
         fig.suptitle('Monthly Temperature Analysis', y=0.95)
         
-        # Create a categorical month column for proper ordering
-        months_order = ['January', 'February', 'March', 'April', 'May', 'June',
-                       'July', 'August', 'September', 'October', 'November', 'December']
-        self.df['month'] = pd.Categorical(self.df['date'].dt.strftime('%B'), 
-                                        categories=months_order, 
-                                        ordered=True)
-        
-        # Box plot
-        self.df.boxplot(column='mean_temp', by='month', ax=ax1)
+        # Box plot, one fixed position per month so its artists can be reused
+        self._month_stats = {month: self._box_stats(month) for month in range(1, 13)}
+        self.month_boxes = ax1.bxp([self._month_stats[month] for month in range(1, 13)],
+                                   positions=range(1, 13))
+        ax1.set_xticks(range(1, 13), MONTHS)
         ax1.set_title('Temperature Distribution by Month')
         ax1.set_ylabel('Temperature (°C)')
-        plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45)
+        ax1.tick_params(axis='x', labelrotation=45)
         
         # Monthly averages bar plot
-        monthly_avg = self.df.groupby('month')['mean_temp'].mean()
-        monthly_avg.plot(kind='bar', ax=ax2)
+        self.month_bars = ax2.bar(MONTHS, self._monthly_means())
         ax2.set_title('Average Monthly Temperatures')
         ax2.set_ylabel('Temperature (°C)')
-        plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45)
+        ax2.tick_params(axis='x', labelrotation=45)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
-        canvas = FigureCanvasTkAgg(fig, plots_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.monthly_canvas = self._attach_canvas(fig, plots_frame)
+
+    def update_monthly_plot(self, changed_months):
+        # Only months that received data need their box statistics recomputed
+        for month in changed_months:
+            stats = self._month_stats[month] = self._box_stats(month)
+            i = month - 1
+            self.month_boxes['boxes'][i].set_ydata(
+                [stats['q1'], stats['q1'], stats['q3'], stats['q3'], stats['q1']])
+            self.month_boxes['medians'][i].set_ydata([stats['med'], stats['med']])
+            self.month_boxes['whiskers'][2 * i].set_ydata([stats['q1'], stats['whislo']])
+            self.month_boxes['whiskers'][2 * i + 1].set_ydata([stats['q3'], stats['whishi']])
+            self.month_boxes['caps'][2 * i].set_ydata([stats['whislo']] * 2)
+            self.month_boxes['caps'][2 * i + 1].set_ydata([stats['whishi']] * 2)
+            self.month_boxes['fliers'][i].set_data([month] * len(stats['fliers']),
+                                                   stats['fliers'])
+        for bar, height in zip(self.month_bars, self._monthly_means()):
+            bar.set_height(height)
+        for ax in self.monthly_canvas.figure.axes:
+            ax.relim()
+            ax.autoscale_view()
+        self.monthly_canvas.draw_idle()
+
+    def _box_stats(self, month):
+        values = self.df.loc[self.df['month'] == MONTHS[month - 1], 'mean_temp'].dropna()
+        if values.empty:
+            return {'med': np.nan, 'q1': np.nan, 'q3': np.nan, 'whislo': np.nan,
+                    'whishi': np.nan, 'fliers': np.array([])}
+        return cbook.boxplot_stats(values.to_numpy())[0]
+
+    def _monthly_means(self):
+        monthly_avg = self.cube.mean('mean_temp', 'month').reindex(range(1, 13))
+        return monthly_avg.fillna(0).to_numpy()
         
-    def create_statistics(self, parent):
+    def create_statistics(self, parent, changed_months=None):
         # Create a frame with padding
         stats_frame = ttk.Frame(parent, padding="20")
         stats_frame.pack(fill=tk.BOTH, expand=True)
         
+        self.stats_widget = tk.Text(stats_frame, height=22, width=50, font=('Arial', 12))
+        self.stats_widget.pack(pady=20)
+        
+        # Date-range selector; each move is answered from the date index
+        # without scanning the rows
+        range_frame = ttk.LabelFrame(stats_frame, text="Date Range", padding="10")
+        range_frame.pack(fill=tk.X)
+        self.range_scales = []
+        for label in ("From:", "To:"):
+            ttk.Label(range_frame, text=label).pack(anchor=tk.W)
+            scale = tk.Scale(range_frame, orient=tk.HORIZONTAL, showvalue=False,
+                             command=lambda value: self._show_range_stats())
+            scale.pack(fill=tk.X)
+            self.range_scales.append(scale)
+        self.range_summary = tk.StringVar(value="")
+        ttk.Label(range_frame, textvariable=self.range_summary).pack(anchor=tk.W, pady=5)
+        self.range_span = None
+        self.update_statistics(changed_months)
+
+    def update_statistics(self, changed_months):
+        # Calendar windows from the date index, so unordered or gappy data
+        # still gives the last 30 and 7 days
+        index = self.date_index
+        overall = index.stats(columns=['mean_temp']).loc['mean_temp']
+        last_month = index.stats(*index.last(30), columns=['mean_temp']).loc['mean_temp']
+        last_week = index.stats(*index.last(7), columns=['mean_temp']).loc['mean_temp']
         stats_text = f"""
         Weather Statistics:
         
         Temperature (°C):
-        - Average: {self.df['mean_temp'].mean():.1f}°C
-        - Maximum: {self.df['mean_temp'].max():.1f}°C
-        - Minimum: {self.df['mean_temp'].min():.1f}°C
+        - Average: {overall['mean']:.1f}°C
+        - Maximum: {overall['max']:.1f}°C
+        - Minimum: {overall['min']:.1f}°C
         
         Recent Trends:
-        - Last Month Average: {self.df.iloc[-30:]['mean_temp'].mean():.1f}°C
-        - Last Week Average: {self.df.iloc[-7:]['mean_temp'].mean():.1f}°C
+        - Last Month Average: {last_month['mean']:.1f}°C
+        - Last Week Average: {last_week['mean']:.1f}°C
         
         Data Range:
-        - From: {self.df['date'].min().strftime('%Y-%m-%d')}
-        - To: {self.df['date'].max().strftime('%Y-%m-%d')}
+        - From: {index.first_day}
+        - To: {index.last_day}
+        
+        Extreme Events:
+        {self._event_summary()}
         """
         
-        text_widget = tk.Text(stats_frame, height=15, width=50, font=('Arial', 12))
-        text_widget.pack(pady=20)
-        text_widget.insert(tk.END, stats_text)
-        text_widget.config(state='disabled')
+        self.stats_widget.config(state='normal')
+        self.stats_widget.delete('1.0', tk.END)
+        self.stats_widget.insert(tk.END, stats_text)
+        self.stats_widget.config(state='disabled')
         
-    def refresh_data(self):
-        self.load_data()
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Notebook):
-                widget.destroy()
-        self.create_widgets()
+        # Scales count days from the first one; an end left at the newest day
+        # follows new data
+        span = int((index.last_day - index.first_day).astype('int64'))
+        start_scale, end_scale = self.range_scales
+        at_end = self.range_span is None or end_scale.get() >= self.range_span
+        for scale in self.range_scales:
+            scale.configure(from_=0, to=span)
+        if at_end:
+            end_scale.set(span)
+        self.range_span = span
+        self._show_range_stats()
+
+    def _show_range_stats(self):
+        start_scale, end_scale = self.range_scales
+        first = self.date_index.first_day
+        start = first + int(start_scale.get())
+        end = first + int(end_scale.get())
+        stats = self.date_index.stats(start, end, columns=['mean_temp']).loc['mean_temp']
+        if stats['count'] == 0:
+            self.range_summary.set(f"{start} to {end}: no data")
+            return
+        self.range_summary.set(f"{start} to {end}: {int(stats['count'])} days, "
+                               f"mean {stats['mean']:.1f}°C, "
+                               f"min {stats['min']:.1f}°C, max {stats['max']:.1f}°C")
+
+    def _event_summary(self):
+        # Documents saved by the dashboard only hold some measurements, so
+        # say so rather than report no events for a column without data
+        lines = []
+        for name, events in self.events.tables().items():
+            label = name.replace('_', ' ').capitalize()
+            column = self.events.definitions[name]['column']
+            if column not in self.df.columns or self.df[column].isna().all():
+                lines.append(f"- {label}: no {column} data")
+                continue
+            longest = f" (longest {events['duration'].max()} days)" if len(events) else ""
+            lines.append(f"- {label}: {len(events)} events{longest}")
+        return "\n        ".join(lines)
+        
+    def create_correlation_plot(self, parent, changed_months=None):
+        # Pair selectors; the matrix is computed once per data update and the
+        # selected pair is read from it
+        controls = ttk.Frame(parent)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        self.corr_x = tk.StringVar(value='mean_temp')
+        self.corr_y = tk.StringVar(value='cloud_cover')
+        self.corr_boxes = []
+        for label, variable in (("X:", self.corr_x), ("Y:", self.corr_y)):
+            ttk.Label(controls, text=label).pack(side=tk.LEFT)
+            box = ttk.Combobox(controls, textvariable=variable, state='readonly', width=18)
+            box.pack(side=tk.LEFT, padx=5)
+            box.bind('<<ComboboxSelected>>', lambda event: self._show_correlation())
+            self.corr_boxes.append(box)
+        self.corr_summary = tk.StringVar(value="")
+        ttk.Label(controls, textvariable=self.corr_summary).pack(side=tk.LEFT, padx=10)
+        
+        self.correlations = correlation_matrix(self.df)
+        fig = Figure(figsize=(11, 5))
+        ax = fig.add_subplot()
+        rolling = rolling_correlation(self.df, self.corr_x.get(), self.corr_y.get())
+        self.corr_trend = DecimatedLine(ax, self.df['date'], rolling)
+        ax.axhline(0, color='grey', linewidth=0.8)
+        ax.set_ylim(-1, 1)
+        ax.set_title('365-day Rolling Correlation')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Pearson r')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        
+        self.corr_canvas = self._attach_canvas(fig, parent, padx=10, pady=5)
+        self.update_correlation_plot(changed_months)
+
+    def update_correlation_plot(self, changed_months):
+        self.correlations = correlation_matrix(self.df)
+        columns = list(self.correlations['r'].columns)
+        for box, variable in zip(self.corr_boxes, (self.corr_x, self.corr_y)):
+            box['values'] = columns
+            if variable.get() not in columns:
+                variable.set(columns[0])
+        self._show_correlation()
+
+    def _show_correlation(self):
+        x, y = self.corr_x.get(), self.corr_y.get()
+        pair = pair_stats(self.correlations, x, y)
+        self.corr_summary.set(f"r = {pair['correlation']:.3f}, "
+                              f"p = {pair['p_value']:.3g}, n = {pair['n']}")
+        self.corr_trend.set_data(self.df['date'], rolling_correlation(self.df, x, y))
+        ax = self.corr_trend.ax
+        ax.relim()
+        ax.autoscale_view(scaley=False)
+        self.corr_canvas.draw_idle()
+
+    def create_anomaly_plot(self, parent, changed_months=None):
+        # Daily standardized anomalies of mean temperature against the
+        # climatology baseline, with a 30-day running mean
+        fig = Figure(figsize=(11, 5))
+        ax = fig.add_subplot()
+        dates, anomaly = self.anomalies['date'], self.anomalies['mean_temp']
+        self.anomaly_daily = DecimatedLine(ax, dates, anomaly, color='lightsteelblue',
+                                           linewidth=0.8, label='Daily')
+        self.anomaly_smooth = DecimatedLine(ax, dates, anomaly.rolling(30, min_periods=1).mean(),
+                                            color='firebrick', label='30-day mean')
+        ax.axhline(0, color='grey', linewidth=0.8)
+        ax.set_title('Temperature Anomaly vs Daily Normal')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Standardized anomaly (σ)')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.legend(loc='upper left')
+        fig.tight_layout()
+
+        self.anomaly_canvas = self._attach_canvas(fig, parent, padx=10, pady=5)
+
+    def update_anomaly_plot(self, changed_months):
+        dates, anomaly = self.anomalies['date'], self.anomalies['mean_temp']
+        self.anomaly_daily.set_data(dates, anomaly)
+        self.anomaly_smooth.set_data(dates, anomaly.rolling(30, min_periods=1).mean())
+        ax = self.anomaly_daily.ax
+        ax.relim()
+        ax.autoscale_view()
+        self.anomaly_canvas.draw_idle()
+
+    def refresh_data(self, full=False):
+        """
+        Load new data in the background. Only days after the newest one shown
+        are fetched unless `full` is set or nothing has loaded yet.
+        """
+        # Supersede any load in progress: a queued one is cancelled, a running
+        # one finishes but its result is dropped
+        self._generation += 1
+        if self._pending is not None:
+            self._pending.cancel()
+        since = None if full or self.df is None else self.df['date'].max()
+        self.status.set("Loading data...")
+        self.progress.start(10)
+        self._load_started = time.perf_counter()
+        self._pending = self._loader.submit(self._load_in_background, self._generation, since)
+
+    def _load_in_background(self, generation, since):
+        if generation != self._generation:
+            return
+        try:
+            self._results.put((generation, self.load_data(since), None))
+        except Exception as e:
+            self._results.put((generation, None, e))
+
+    def _poll_results(self):
+        try:
+            while True:
+                generation, result, error = self._results.get_nowait()
+                if generation == self._generation:
+                    self._on_data_loaded(result, error)
+        except queue.Empty:
+            pass
+        self.root.after(self.POLL_MS, self._poll_results)
+
+    def _on_data_loaded(self, result, error):
+        self.progress.stop()
+        if error is not None:
+            self.status.set(f"Error loading data: {str(error)}")
+            return
+        df, cube, events, date_index = result
+        if cube is not None:
+            self.df, self.cube, self.events, self.date_index = df, cube, events, date_index
+            self.anomalies = self.climatology.anomalies(df)
+            changed_months = range(1, 13)
+        elif df.empty:
+            self.status.set("No new data")
+            return
+        else:
+            self.df = pd.concat([self.df, df], ignore_index=True)
+            self.cube.append(df)
+            self.events.append(df)
+            self.date_index.append(df)
+            self.anomalies = pd.concat([self.anomalies, self.climatology.anomalies(df)],
+                                       ignore_index=True)
+            changed_months = sorted(df['date'].dt.month.unique())
+        self.status.set(f"Loaded {len(df)} days in "
+                        f"{time.perf_counter() - self._load_started:.2f}s")
+        # Update tabs already built; the others are built from the new data
+        # when first shown
+        for tab in self._rendered:
+            _, _, updater = self.tab_builders[tab]
+            updater(changed_months)
+        self._render_current_tab()
+
+    def _render_current_tab(self, event=None):
+        if self.df is None:
+            return
+        selected = self.notebook.select()
+        if not selected or selected in self._rendered:
+            return
+        frame, builder, _ = self.tab_builders[selected]
+        builder(frame)
+        self._rendered.add(selected)
+        if self._first_paint is None:
+            self.root.update_idletasks()
+            self._first_paint = time.perf_counter() - self._started
+            print(f"First paint with data after {self._first_paint:.2f}s")
+
+    def close(self):
+        self._generation += 1
+        self._loader.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
         
     def save_to_firebase(self):
         print("Data is already in Firebase. No need to save again.")
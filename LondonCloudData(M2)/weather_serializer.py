@@ -0,0 +1,60 @@
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+FIRESTORE_BATCH_LIMIT = 500
+
+LONDON_WEATHER_FIELDS = ['mean_temp', 'max_temp', 'min_temp', 'cloud_cover', 'precipitation',
+                         'pressure', 'sunshine', 'snow_depth', 'global_radiation']
+
+def frame_to_documents(df: pd.DataFrame,
+                       fields: Sequence[str] = LONDON_WEATHER_FIELDS) -> Tuple[List[str], List[Dict]]:
+    """
+    Serialize a weather DataFrame into london_weather document IDs and payloads.
+
+    Works column-wise rather than per row. Missing values become None, and a
+    field the frame doesn't have is written as None for every document.
+    Measurements should be float64; float32 values don't round-trip to their
+    decimal form.
+
+    Args:
+        df: Frame with a datetime `date` column
+        fields: Measurement fields to include after `date`
+
+    Returns:
+        Tuple of (document IDs as YYYY-MM-DD, payload dicts) in frame order
+
+    Raises:
+        ValueError: If any row has no date, since the date is the document ID
+    """
+    dates = pd.to_datetime(df['date']).to_numpy()
+    missing = np.isnat(dates)
+    if missing.any():
+        raise ValueError(f"{missing.sum()} rows have no date; drop them before saving")
+    days = dates.astype('datetime64[D]')
+    doc_ids = days.astype(str).tolist()
+
+    # Daily data is all midnight, which numpy formats far faster than strftime
+    if (dates == days).all():
+        iso_dates = [doc_id + 'T00:00:00' for doc_id in doc_ids]
+    else:
+        iso_dates = pd.Series(dates).dt.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+    columns = [iso_dates]
+    for field in fields:
+        if field not in df.columns:
+            columns.append([None] * len(df))
+            continue
+        values = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype='float64')
+        column = values.astype(object)
+        column[np.isnan(values)] = None
+        columns.append(column.tolist())
+
+    keys = ['date', *fields]
+    payloads = [dict(zip(keys, row)) for row in zip(*columns)]
+    return doc_ids, payloads
+
+def chunked(items: Sequence, size: int = FIRESTORE_BATCH_LIMIT) -> Iterator[Sequence]:
+    # Positional chunks, independent of any DataFrame index
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,212 @@
+"""
+Write-behind buffering for weather observations.
+
+Observations are accepted from any number of threads into a bounded queue and
+written by a single flusher thread as batched commits, whenever a batch fills
+or the flush interval passes. A full queue blocks producers (backpressure),
+and the buffer is flushed on close and at interpreter exit. Batches that still
+fail after retrying are passed to an error callback or raised from close.
+
+Run `python write_behind.py` to measure throughput and enqueue latency against
+the in-memory fake client.
+"""
+import atexit
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from weather_serializer import FIRESTORE_BATCH_LIMIT
+
+def observation_id(timestamp: str) -> str:
+    """Document ID that sorts by time but can't collide across writers."""
+    return f"{timestamp}_{uuid.uuid4().hex[:12]}"
+
+class WriteBehindError(RuntimeError):
+    """Raised by close() when buffered documents could not be written."""
+
+    def __init__(self, items: List[Tuple[str, Dict]], error: Exception):
+        super().__init__(f"Failed to write {len(items)} weather observations: {str(error)}")
+        self.items = items  # (doc_id, data) pairs that were not written
+        self.error = error
+
+class WriteBehindBuffer:
+    """
+    Buffers weather_data documents and commits them in batches.
+
+    Args:
+        db: Firestore client
+        collection: Destination collection
+        max_batch: Documents per commit, at most 500
+        flush_interval: Seconds a partial batch may wait before being committed
+        capacity: Maximum buffered documents before put() blocks
+        max_retries: Commit attempts per batch before it is reported as failed
+        on_error: Called on the flusher thread with the (doc_id, data) pairs
+            and the last exception of each batch that failed; without it,
+            failed documents are kept and raised from close()
+    """
+
+    _STOP = object()
+
+    def __init__(self, db, collection: str = 'weather_data', max_batch: int = FIRESTORE_BATCH_LIMIT,
+                 flush_interval: float = 1.0, capacity: int = 10000, max_retries: int = 3,
+                 on_error: Optional[Callable[[List[Tuple[str, Dict]], Exception], None]] = None):
+        if not 0 < max_batch <= FIRESTORE_BATCH_LIMIT:
+            raise ValueError(f"max_batch must be between 1 and {FIRESTORE_BATCH_LIMIT}")
+        self.db = db
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.on_error = on_error
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self._queue = queue.Queue(maxsize=capacity)
+        self._failed_items: List[Tuple[str, Dict]] = []
+        self._last_error: Optional[Exception] = None
+        # Producers register under the lock and enqueue outside it, so one
+        # blocked put doesn't hold up the others; close waits for registered
+        # puts to finish so nothing is queued behind the stop marker and lost
+        self._lock = threading.Condition()
+        self._closed = False
+        self._putting = 0
+        self._thread = threading.Thread(target=self._run, name='weather-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, data: Dict, timeout: Optional[float] = None) -> str:
+        """
+        Queue a document for writing and return its ID.
+
+        Blocks while the buffer is full.
+
+        Raises:
+            RuntimeError: If the buffer has been closed
+            queue.Full: If `timeout` passes before there is room
+        """
+        doc_id = observation_id(data.get('timestamp') or datetime.now().isoformat())
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            self._putting += 1
+        try:
+            self._queue.put((doc_id, data), timeout=timeout)
+        finally:
+            with self._lock:
+                self._putting -= 1
+                if not self._putting:
+                    self._lock.notify_all()
+        return doc_id
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = None
+            while len(batch) < self.max_batch:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, items) -> None:
+        collection = self.db.collection(self.collection)
+        for attempt in range(self.max_retries):
+            try:
+                batch = self.db.batch()
+                for doc_id, data in items:
+                    batch.set(collection.document(doc_id), data)
+                batch.commit()
+                self.written += len(items)
+                self.batches += 1
+                return
+            except Exception as e:
+                error = e
+                if attempt < self.max_retries - 1:
+                    time.sleep(min(2 ** attempt * 0.1, 2.0))
+        self.failed += len(items)
+        if self.on_error is not None:
+            try:
+                self.on_error(list(items), error)
+            except Exception as e:
+                print(f"Error in write-behind error callback: {str(e)}")
+        else:
+            self._failed_items.extend(items)
+            self._last_error = error
+
+    def close(self) -> None:
+        """
+        Flush everything buffered and stop the flusher thread.
+
+        Raises:
+            WriteBehindError: If batches failed and no on_error callback was given
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._lock.wait_for(lambda: not self._putting)
+        self._queue.put(self._STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+        if self._failed_items:
+            failed, self._failed_items = self._failed_items, []
+            raise WriteBehindError(failed, self._last_error)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def benchmark(producers: int = 8, per_producer: int = 500, commit_latency: float = 0.02):
+    """Compare buffered ingestion with one set() round-trip per observation."""
+    from fake_firestore import FakeFirestore
+
+    def produce(write, latencies):
+        for i in range(per_producer):
+            start = time.perf_counter()
+            write({'location': 'London', 'temperature': 10.0 + i % 10,
+                   'humidity': 70, 'conditions': 'Cloudy',
+                   'timestamp': datetime.now().isoformat()})
+            latencies.append(time.perf_counter() - start)
+
+    def run(label, db, write, finish=lambda: None):
+        latencies = []
+        threads = [threading.Thread(target=produce, args=(write, latencies))
+                   for _ in range(producers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        finish()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        total = len(db._collections.get('weather_data', {}))
+        print(f"{label}: {total} documents in {elapsed:.2f}s ({total / elapsed:,.0f}/s), "
+              f"{db.commit_count} commits, p99 enqueue latency {p99:.2f} ms")
+
+    direct_db = FakeFirestore(commit_latency=commit_latency)
+    direct = direct_db.collection('weather_data')
+    run('Direct set()', direct_db,
+        lambda data: direct.document(observation_id(data['timestamp'])).set(data))
+
+    buffered_db = FakeFirestore(commit_latency=commit_latency)
+    buffer = WriteBehindBuffer(buffered_db, flush_interval=0.05)
+    run('Write-behind', buffered_db, buffer.put, buffer.close)
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+from ingest import MEASUREMENT_COLUMNS
+from compact import frame_dates
+
+DIMENSIONS = ('year_month', 'month', 'day_of_year')
+
+class _StatTable:
+    """Count, sum, sum of squares, min and max per (key, column) over a range of integer keys."""
+
+    def __init__(self, n_columns, lo=0, hi=0):
+        self.n_columns = n_columns
+        self.lo = lo
+        self.rows = np.zeros(hi - lo, dtype='int64')
+        self.count = np.zeros((hi - lo, n_columns), dtype='int64')
+        self.sum = np.zeros((hi - lo, n_columns))
+        self.sumsq = np.zeros((hi - lo, n_columns))
+        self.min = np.full((hi - lo, n_columns), np.inf)
+        self.max = np.full((hi - lo, n_columns), -np.inf)
+
+    def _ensure_range(self, kmin, kmax):
+        hi = self.lo + len(self.rows)
+        if len(self.rows) and kmin >= self.lo and kmax < hi:
+            return
+        new_lo = min(kmin, self.lo) if len(self.rows) else kmin
+        new_hi = max(kmax + 1, hi) if len(self.rows) else kmax + 1
+        grown = _StatTable(self.n_columns, new_lo, new_hi)
+        start = self.lo - new_lo
+        for name in ('rows', 'count', 'sum', 'sumsq', 'min', 'max'):
+            getattr(grown, name)[start:start + len(self.rows)] = getattr(self, name)
+        self.__dict__.update(grown.__dict__)
+
+    def add(self, keys, values):
+        if len(keys) == 0:
+            return
+        self._ensure_range(int(keys.min()), int(keys.max()))
+        idx = keys - self.lo
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        np.add.at(self.rows, idx, 1)
+        np.add.at(self.count, idx, present)
+        np.add.at(self.sum, idx, filled)
+        np.add.at(self.sumsq, idx, filled * filled)
+        np.fmin.at(self.min, idx, np.where(present, values, np.inf))
+        np.fmax.at(self.max, idx, np.where(present, values, -np.inf))
+
+class AggregateCube:
+    """
+    Precomputed count/sum/sum-of-squares/min/max for every measurement column,
+    by year-month, calendar month and day of year.
+
+    Build it once from a loaded frame (full or compact) and append new days as
+    they arrive; appending costs O(new rows) rather than a groupby over the
+    whole history, and the monthly views are answered from the cube.
+    """
+
+    def __init__(self, df=None, columns=None):
+        if columns is None:
+            columns = [col for col in MEASUREMENT_COLUMNS if df is None or col in df.columns]
+        self.columns = list(columns)
+        self.last_day = None
+        # Bitmap of the days already counted, indexed by day number - _seen_lo
+        self._seen_lo = 0
+        self._seen = np.zeros(0, dtype=bool)
+        self._tables = {
+            'year_month': _StatTable(len(self.columns)),
+            'month': _StatTable(len(self.columns), 1, 13),
+            'day_of_year': _StatTable(len(self.columns), 1, 367),
+        }
+        if df is not None:
+            self.append(df)
+
+    def append(self, df):
+        """
+        Fold new days into the cube.
+
+        Rows are merged by day: days the cube has already counted are skipped,
+        so passing an overlapping frame doesn't count them twice, while days
+        it hasn't seen are added wherever they fall, including gaps before
+        `last_day`. A date repeated within the frame is counted once, from
+        its later row. Costs O(new rows log new rows), however long the
+        history. Returns the number of rows folded in.
+        """
+        days = frame_dates(df).to_numpy().astype('datetime64[D]')
+        valid = np.flatnonzero(~np.isnat(days))
+        # One row per day, the later one where the frame repeats a date
+        day_numbers, last = np.unique(days[valid[::-1]].astype('int64'), return_index=True)
+        rows = valid[::-1][last]
+        new = ~self._counted(day_numbers)
+        day_numbers, rows = day_numbers[new], rows[new]
+        if len(rows) == 0:
+            return 0
+        days = day_numbers.astype('datetime64[D]')
+
+        values = np.column_stack([
+            pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')[rows]
+            if col in df.columns else np.full(len(days), np.nan)
+            for col in self.columns
+        ])
+        months = days.astype('datetime64[M]')
+        years = days.astype('datetime64[Y]')
+        keys = {
+            'year_month': months.astype('int64'),
+            'month': months.astype('int64') % 12 + 1,
+            'day_of_year': (days - years.astype('datetime64[D]')).astype('int64') + 1,
+        }
+        for dim, table in self._tables.items():
+            table.add(keys[dim], values)
+
+        self._mark_counted(day_numbers)
+        latest = days.max()
+        self.last_day = latest if self.last_day is None else max(self.last_day, latest)
+        return len(days)
+
+    def _counted(self, day_numbers):
+        offset = day_numbers - self._seen_lo
+        inside = (offset >= 0) & (offset < len(self._seen))
+        counted = np.zeros(len(day_numbers), dtype=bool)
+        counted[inside] = self._seen[offset[inside]]
+        return counted
+
+    def _mark_counted(self, day_numbers):
+        lo, hi = int(day_numbers.min()), int(day_numbers.max()) + 1
+        seen_hi = self._seen_lo + len(self._seen)
+        if len(self._seen) == 0 or lo < self._seen_lo or hi > seen_hi:
+            new_lo = min(lo, self._seen_lo) if len(self._seen) else lo
+            new_hi = max(hi, seen_hi) if len(self._seen) else hi
+            # Grow with headroom so appending a day at a time only regrows
+            # the bitmap O(log n) times
+            new_hi = max(new_hi, new_lo + 2 * len(self._seen))
+            grown = np.zeros(new_hi - new_lo, dtype=bool)
+            start = self._seen_lo - new_lo
+            grown[start:start + len(self._seen)] = self._seen
+            self._seen_lo, self._seen = new_lo, grown
+        self._seen[day_numbers - self._seen_lo] = True
+
+    def stat(self, column, stat, dim='month'):
+        """
+        Return one statistic per key for a column.
+
+        Args:
+            column: Measurement column name
+            stat: One of count, sum, sumsq, min, max, mean, std
+            dim: One of year_month, month, day_of_year
+
+        Returns:
+            Series indexed by key; year_month keys are month-start timestamps
+        """
+        table = self._tables[dim]
+        col = self.columns.index(column)
+        has_rows = table.rows > 0
+        count = table.count[has_rows, col].astype('float64')
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if stat == 'count':
+                values = table.count[has_rows, col]
+            elif stat in ('sum', 'sumsq'):
+                values = getattr(table, stat)[has_rows, col]
+            elif stat in ('min', 'max'):
+                values = np.where(count > 0, getattr(table, stat)[has_rows, col], np.nan)
+            elif stat == 'mean':
+                values = table.sum[has_rows, col] / count
+            elif stat == 'std':
+                total = table.sum[has_rows, col]
+                m2 = np.maximum(table.sumsq[has_rows, col] - total * total / count, 0.0)
+                values = np.sqrt(m2 / (count - 1))
+            else:
+                raise ValueError(f"Unknown statistic: {stat}")
+
+        keys = np.flatnonzero(has_rows) + table.lo
+        if dim == 'year_month':
+            index = pd.DatetimeIndex(keys.astype('datetime64[M]').astype('datetime64[ns]'), name='date')
+        else:
+            index = pd.Index(keys, name='date' if dim == 'month' else dim)
+        return pd.Series(values, index=index, name=column)
+
+    def mean(self, column, dim='month'):
+        return self.stat(column, 'mean', dim)
+
+    def std(self, column, dim='month'):
+        return self.stat(column, 'std', dim)
+
+    def monthly_temps(self):
+        # Same shape as the data returned by analyze_monthly_temperature_trend
+        return self.mean('mean_temp', 'year_month').reset_index()
+
+    def monthly_stats(self):
+        # Same shape as analyze_extreme_weather's table
+        return pd.concat({
+            ('mean_temp', 'mean'): self.mean('mean_temp'),
+            ('mean_temp', 'std'): self.std('mean_temp'),
+            ('precipitation', 'mean'): self.mean('precipitation'),
+            ('precipitation', 'max'): self.stat('precipitation', 'max'),
+        }, axis=1).round(2)
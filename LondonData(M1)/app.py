@@ -3,6 +3,55 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from weatherAnalysis import load_data, analyze_monthly_temperature_trend, analyze_temp_cloud_correlation, analyze_extreme_weather
+from aggregates import AggregateCube
+from correlation import correlation_matrix, pair_stats, rolling_correlation
+from compact import frame_dates
+from bootstrap import bootstrap_correlation, permutation_test_correlation, bootstrap_monthly_stats
+from events import detect_events, events_per_year
+from climatology import Climatology
+from quality import daily_calendar, fill_gaps, resample, completeness_report, FILL_STRATEGIES
+from date_index import DateIndex
+
+@st.cache_data
+def cached_correlation_matrix(df, method):
+    # Computed once per dataset and method; widget changes reuse it
+    return correlation_matrix(df, method=method)
+
+@st.cache_data
+def cached_bootstrap(df, x_col, y_col):
+    # 10k block resamples each, spread over all cores; cached per pair
+    return (bootstrap_correlation(df, x_col, y_col),
+            permutation_test_correlation(df, x_col, y_col),
+            bootstrap_monthly_stats(df))
+
+@st.cache_data
+def cached_events(df):
+    # Every event type in one pass over the history
+    return detect_events(df)
+
+@st.cache_resource
+def cached_climatology(df):
+    # Read from this dataset's own cache file when it was fitted before
+    return Climatology.load_or_fit(df)
+
+@st.cache_data
+def cached_anomalies(df):
+    return cached_climatology(df).anomalies(df)
+
+@st.cache_data
+def cached_daily_calendar(df):
+    # Complete calendar with the gap mask, shared by the quality views
+    return daily_calendar(df)
+
+@st.cache_resource
+def cached_aggregate_cube(df):
+    # Built once per dataset rather than on every rerun
+    return AggregateCube(df)
+
+@st.cache_resource
+def cached_date_index(df):
+    # Built once per dataset; range queries don't touch the rows
+    return DateIndex(df)
 
 # Streamlit app setup
 st.title('London Weather Data Analysis')
@@ -14,22 +63,48 @@ if uploaded_file is not None:
     # Load the data
     df = load_data(uploaded_file)
     
+    # Report whether this load parsed the CSV (cold) or mapped the cache (warm)
+    load_stats = df.attrs.get('load_stats')
+    if load_stats:
+        st.caption(f"Loaded {len(df)} rows from {load_stats['source']} "
+                   f"in {load_stats['seconds'] * 1000:.1f} ms")
+    
     # Display the first few rows of the dataframe
     st.subheader('Data Preview')
     st.write(df.head())
     
     # Perform analyses if the dataframe is not empty
     if not df.empty:
+        # Aggregate once; the monthly views below are answered from the cube
+        cube = cached_aggregate_cube(df)
+        
+        # Summary of any date range, answered from the date index
+        st.subheader('Date Range Summary')
+        date_index = cached_date_index(df)
+        first_day, last_day = date_index.first_day.item(), date_index.last_day.item()
+        range_start, range_end = st.slider('Date range', min_value=first_day, max_value=last_day,
+                                           value=(first_day, last_day), format='YYYY-MM-DD')
+        range_stats = date_index.stats(range_start, range_end, columns=['mean_temp', 'precipitation'])
+        temp_stats = range_stats.loc['mean_temp']
+        days_col, mean_col, min_col, max_col, rain_col = st.columns(5)
+        days_col.metric('Days', int(temp_stats['count']))
+        mean_col.metric('Mean temp', f"{temp_stats['mean']:.1f}°C")
+        min_col.metric('Min temp', f"{temp_stats['min']:.1f}°C")
+        max_col.metric('Max temp', f"{temp_stats['max']:.1f}°C")
+        rain_col.metric('Mean rain', f"{range_stats.loc['precipitation', 'mean']:.1f} mm")
+        st.line_chart(date_index.frame(range_start, range_end).set_index('date')['mean_temp'])
+        
         # Monthly temperature trend analysis
         st.subheader('Average Monthly Temperature Trend')
-        fig_temp, monthly_temps = analyze_monthly_temperature_trend(df)  # Unpack both return values
+        fig_temp, monthly_temps = analyze_monthly_temperature_trend(df, cube)  # Unpack both return values
         
         # Display the matplotlib figure
         st.pyplot(fig_temp)
         
         # Temperature and cloud cover correlation analysis
         st.subheader('Temperature vs Cloud Cover Correlation')
-        fig_corr, correlation_stats = analyze_temp_cloud_correlation(df)  # Unpack both return values
+        matrix = cached_correlation_matrix(df, 'pearson')
+        fig_corr, correlation_stats = analyze_temp_cloud_correlation(df, matrix)  # Unpack both return values
         
         # Display correlation statistics
         st.write(f"Correlation Coefficient: {correlation_stats['correlation']:.3f}")
@@ -39,10 +114,71 @@ if uploaded_file is not None:
         # Display the correlation figure
         st.pyplot(fig_corr)
         
+        # Any pair of measurements, answered from the cached correlation matrix
+        st.subheader('Correlation Explorer')
+        method = st.radio('Method', ['pearson', 'spearman'], horizontal=True)
+        matrix = cached_correlation_matrix(df, method)
+        columns = list(matrix['r'].columns)
+        x_col = st.selectbox('First variable', columns, index=columns.index('mean_temp'))
+        y_col = st.selectbox('Second variable', columns, index=columns.index('cloud_cover'))
+        pair = pair_stats(matrix, x_col, y_col)
+        st.write(f"Correlation Coefficient: {pair['correlation']:.3f} "
+                 f"(p-value {pair['p_value']:.3g}, {pair['n']} days)")
+        st.dataframe(matrix['r'].style.format('{:.2f}').background_gradient(cmap='coolwarm', vmin=-1, vmax=1))
+        
+        window = st.slider('Rolling window (days)', 30, 3650, 365, step=30)
+        rolling = rolling_correlation(df, x_col, y_col, window=window)
+        st.line_chart(pd.Series(rolling.to_numpy(), index=frame_dates(df), name='Pearson r'))
+        
+        # Resampling is opt-in since it takes a few seconds on the full history
+        show_bootstrap = st.checkbox('Bootstrap confidence intervals (10,000 block resamples)')
+        if show_bootstrap:
+            boot, perm, monthly_ci = cached_bootstrap(df, x_col, y_col)
+            st.write(f"Pearson r {boot['correlation']:.3f}, 95% CI "
+                     f"[{boot['ci_low']:.3f}, {boot['ci_high']:.3f}] "
+                     f"({boot['block_length']}-day blocks)")
+            st.write(f"Block permutation p-value: {perm['p_value']:.4g}")
+        
+        # Completeness per column, then gap-filled values resampled to a coarser frequency
+        st.subheader('Data Quality')
+        daily = cached_daily_calendar(df)
+        st.dataframe(completeness_report(daily).style.format({'completeness': '{:.1%}'}))
+        strategy = st.selectbox('Fill gaps with', FILL_STRATEGIES)
+        fill_limit = st.slider('Longest gap to fill (days)', 1, 60, 7)
+        climatology = cached_climatology(df) if strategy == 'climatology' else None
+        filled = fill_gaps(daily, strategy, limit=None if strategy == 'climatology' else fill_limit,
+                           climatology=climatology)
+        frequency = st.radio('Resample to', ['W', 'M', 'A'], index=1, horizontal=True,
+                             format_func={'W': 'Weekly', 'M': 'Monthly', 'A': 'Annual'}.get)
+        st.line_chart(resample(filled, freqs=(frequency,), columns=['mean_temp'])[frequency]['mean_temp'])
+        
+        # Standardized departures from the smoothed day-of-year normal
+        st.subheader('Anomalies from the Daily Normal')
+        anomalies = cached_anomalies(df)
+        anomaly_columns = [col for col in anomalies.columns if col != 'date']
+        anomaly_col = st.selectbox('Variable', anomaly_columns, index=anomaly_columns.index('mean_temp'))
+        smoothing = st.slider('Smoothing (days)', 1, 365, 30)
+        anomaly_series = anomalies.set_index('date')[anomaly_col]
+        st.line_chart(anomaly_series.rolling(smoothing, min_periods=1).mean().rename('Standardized anomaly'))
+        
         # Extreme weather analysis
         st.subheader('Monthly Weather Statistics')
-        extreme_weather = analyze_extreme_weather(df)
+        extreme_weather = analyze_extreme_weather(df, cube)
         st.write(extreme_weather)
+        if show_bootstrap:
+            st.caption('95% block-bootstrap intervals for the monthly mean temperature and its spread')
+            st.dataframe(monthly_ci.style.format('{:.2f}'))
+        
+        # Heatwaves, cold spells, dry spells and snow cover found as runs of
+        # days beyond calendar-day percentiles or fixed thresholds
+        st.subheader('Extreme Weather Events')
+        events = cached_events(df)
+        event_name = st.selectbox('Event type', list(events),
+                                  format_func=lambda name: name.replace('_', ' ').capitalize())
+        event_table = events[event_name]
+        st.write(f"{len(event_table)} events, {event_table['duration'].sum()} days in total")
+        st.bar_chart(events_per_year(event_table)['events'])
+        st.dataframe(event_table.sort_values('start', ascending=False))
     else:
         # Display an error message if the DataFrame is empty
         st.error("The DataFrame is empty after cleaning. Please check the data and cleaning steps.")
@@ -0,0 +1,210 @@
+import calendar
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from ingest import MEASUREMENT_COLUMNS
+from compact import frame_dates
+from data_cache import CACHE_DIR
+from events import calendar_slots
+
+# Default location of the baseline shared by the GUI and dashboard; only
+# written by running this module (see main)
+CLIMATOLOGY_PATH = os.path.join(CACHE_DIR, 'climatology.npz')
+
+# Annual harmonics kept when smoothing the normals and variances
+HARMONICS = 3
+
+# Smoothed variances are floored at this fraction of the column's overall
+# variance, so a near-constant season can't blow up the standardized anomalies
+VARIANCE_FLOOR = 0.01
+
+def calendar_slot(when):
+    """Return the 0-365 calendar slot of a date or datetime (see events.calendar_slots)."""
+    day_of_year = when.timetuple().tm_yday - 1
+    return day_of_year + (not calendar.isleap(when.year) and day_of_year >= 59)
+
+def frame_hash(df, columns, n_harmonics=HARMONICS):
+    """Content hash of the dates and `columns` of a frame, identifying the baseline fitted from it."""
+    digest = hashlib.blake2b(str(n_harmonics).encode('utf-8'), digest_size=16)
+    digest.update(frame_dates(df).to_numpy().astype('datetime64[D]').tobytes())
+    for col in columns:
+        digest.update(col.encode('utf-8'))
+        digest.update(pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64').tobytes())
+    return digest.hexdigest()
+
+def harmonic_basis(n_harmonics=HARMONICS):
+    # (366, 1 + 2 * n_harmonics) design matrix of the annual cycle and its harmonics
+    phase = 2 * np.pi * np.arange(366) / 366
+    columns = [np.ones(366)]
+    for k in range(1, n_harmonics + 1):
+        columns += [np.cos(k * phase), np.sin(k * phase)]
+    return np.column_stack(columns)
+
+def _fit_harmonics(basis, slot_values, slot_counts):
+    # Weighted least squares over calendar slots. The basis is constant within
+    # a slot, so weighting slot means by their counts gives the same fit as
+    # regressing on every day.
+    present = slot_counts > 0
+    if present.sum() < basis.shape[1]:
+        return np.full(366, np.nan)
+    weights = np.sqrt(slot_counts[present])
+    coef = np.linalg.lstsq(basis[present] * weights[:, None],
+                           slot_values[present] * weights, rcond=None)[0]
+    return basis @ coef
+
+class Climatology:
+    """
+    Harmonically smoothed day-of-year normals and variances per measurement.
+
+    Fit once from a load_data frame (or load a saved baseline) and anomalies
+    of any reading are a table lookup: (value - normal) / std for its
+    calendar day, O(1) per reading.
+    """
+
+    def __init__(self, columns, normals, variances, n_harmonics=HARMONICS,
+                 first_day=None, last_day=None, source_hash=None):
+        self.columns = list(columns)
+        self.normals = np.asarray(normals, dtype='float64')
+        self.variances = np.asarray(variances, dtype='float64')
+        self.std = np.sqrt(self.variances)
+        self.n_harmonics = n_harmonics
+        self.first_day = first_day
+        self.last_day = last_day
+        self.source_hash = source_hash  # frame_hash of the data it was fitted from
+        self._index = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def fit(cls, df, columns=None, n_harmonics=HARMONICS):
+        """
+        Fit the baseline from a frame (full or compact).
+
+        Each column's daily values are averaged per calendar day and a
+        constant plus `n_harmonics` annual harmonics are fitted to the means;
+        the variances are fitted the same way to the squared departures from
+        the smoothed normal.
+        """
+        if columns is None:
+            columns = [col for col in MEASUREMENT_COLUMNS if col in df.columns]
+        days = frame_dates(df).to_numpy().astype('datetime64[D]')
+        valid = ~np.isnat(days)
+        slots = calendar_slots(days[valid])
+        basis = harmonic_basis(n_harmonics)
+
+        normals = np.full((366, len(columns)), np.nan)
+        variances = np.full((366, len(columns)), np.nan)
+        for i, col in enumerate(columns):
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')[valid]
+            present = ~np.isnan(values)
+            slot, value = slots[present], values[present]
+            counts = np.bincount(slot, minlength=366).astype('float64')
+            with np.errstate(invalid='ignore', divide='ignore'):
+                normals[:, i] = _fit_harmonics(basis, np.bincount(slot, value, 366) / counts, counts)
+                departures = (value - normals[slot, i]) ** 2
+                fitted = _fit_harmonics(basis, np.bincount(slot, departures, 366) / counts, counts)
+            floor = VARIANCE_FLOOR * value.var() if len(value) else np.nan
+            variances[:, i] = np.maximum(fitted, floor)
+
+        return cls(columns, normals, variances, n_harmonics,
+                   days[valid].min() if valid.any() else None,
+                   days[valid].max() if valid.any() else None,
+                   frame_hash(df, columns, n_harmonics))
+
+    def normal(self, column, when):
+        """Return the smoothed normal of `column` for the calendar day of `when`."""
+        return self.normals[calendar_slot(when), self._index[column]]
+
+    def anomaly(self, column, when, value):
+        """Return the standardized anomaly of one reading, or NaN if it can't be scored."""
+        if value is None or column not in self._index:
+            return np.nan
+        slot, col = calendar_slot(when), self._index[column]
+        return float((float(value) - self.normals[slot, col]) / self.std[slot, col])
+
+    def anomalies(self, df, columns=None, standardized=True):
+        """
+        Anomalies of every row of a frame (full or compact) in one lookup.
+
+        Returns:
+            DataFrame with `date` and one anomaly column per measurement,
+            standardized by the daily std unless `standardized` is False
+        """
+        columns = [col for col in (columns or self.columns) if col in df.columns]
+        dates = frame_dates(df)
+        days = dates.to_numpy().astype('datetime64[D]')
+        slots = calendar_slots(np.where(np.isnat(days), np.datetime64('1970-01-01'), days))
+        result = {'date': dates.to_numpy()}
+        for col in columns:
+            i = self._index[col]
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')
+            departure = values - self.normals[slots, i]
+            anomaly = departure / self.std[slots, i] if standardized else departure
+            result[col] = np.where(np.isnat(days), np.nan, anomaly)
+        return pd.DataFrame(result, index=df.index)
+
+    def save(self, path=CLIMATOLOGY_PATH):
+        """Write the baseline to an .npz file, replacing any previous one."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, columns=np.array(self.columns), normals=self.normals,
+                 variances=self.variances, n_harmonics=self.n_harmonics,
+                 span=np.array([self.first_day, self.last_day], dtype='datetime64[D]'),
+                 source_hash=np.array(self.source_hash or ''))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=CLIMATOLOGY_PATH):
+        """Read a baseline written by save."""
+        with np.load(path, allow_pickle=False) as data:
+            first_day, last_day = data['span']
+            source_hash = str(data['source_hash']) if 'source_hash' in data.files else ''
+            return cls(data['columns'].tolist(), data['normals'], data['variances'],
+                       int(data['n_harmonics']),
+                       None if np.isnat(first_day) else first_day,
+                       None if np.isnat(last_day) else last_day,
+                       source_hash or None)
+
+    @classmethod
+    def load_or_fit(cls, df, path=None, n_harmonics=HARMONICS):
+        """
+        Return the saved baseline if it was fitted from exactly this data,
+        otherwise fit a new one from `df` and save it.
+
+        By default each dataset gets its own file in the cache directory,
+        named by its frame_hash, so fitting an uploaded file never replaces
+        CLIMATOLOGY_PATH or another dataset's baseline.
+        """
+        columns = [col for col in MEASUREMENT_COLUMNS if col in df.columns]
+        digest = frame_hash(df, columns, n_harmonics)
+        if path is None:
+            path = os.path.join(CACHE_DIR, f'climatology_{digest}.npz')
+        try:
+            saved = cls.load(path)
+            if saved.source_hash == digest:
+                return saved
+        except (OSError, KeyError, ValueError):
+            pass
+        fitted = cls.fit(df, columns, n_harmonics)
+        try:
+            fitted.save(path)
+        except OSError:
+            pass
+        return fitted
+
+def main():
+    import sys
+    import time
+    from weatherAnalysis import load_data
+
+    df = load_data(sys.argv[1] if len(sys.argv) > 1 else 'weather_data.csv')
+    path = sys.argv[2] if len(sys.argv) > 2 else CLIMATOLOGY_PATH
+    start = time.perf_counter()
+    climatology = Climatology.fit(df)
+    fitted = time.perf_counter() - start
+    climatology.save(path)
+    print(f"Fitted {len(climatology.columns)} normals over {len(df)} days in "
+          f"{fitted * 1000:.1f} ms; saved to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from ingest import MEASUREMENT_COLUMNS
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June',
+          'July', 'August', 'September', 'October', 'November', 'December']
+SEASONS = ['Winter', 'Spring', 'Summer', 'Autumn']
+
+# Compact `day` of a row with no date (NaT); int32 has no missing value
+NO_DAY = np.iinfo('int32').min
+
+def _month_codes(month_numbers):
+    # 0-11 codes from 1-12 month numbers, -1 (a missing category) for NaN
+    months = np.asarray(month_numbers, dtype='float64')
+    return np.where(np.isnan(months), 0, months).astype('int8') - 1, np.isnan(months)
+
+def month_categories(month_numbers):
+    # Build the ordered month-name categorical from 1-12 month numbers without
+    # formatting a string per row; NaN months (from NaT dates) are missing
+    codes, missing = _month_codes(month_numbers)
+    return pd.Categorical.from_codes(np.where(missing, -1, codes), categories=MONTHS, ordered=True)
+
+def season_categories(month_numbers):
+    # Dec-Feb is winter, Mar-May spring, Jun-Aug summer, Sep-Nov autumn
+    codes, missing = _month_codes(month_numbers)
+    codes = (codes + 1) % 12 // 3
+    return pd.Categorical.from_codes(np.where(missing, -1, codes), categories=SEASONS, ordered=True)
+
+def compact_frame(df):
+    """
+    Return a compact copy of a load_data frame for keeping many histories resident.
+
+    The datetime column becomes an int32 `day` (days since 1970-01-01),
+    measurements are downcast to float32, and categorical `month` and `season`
+    columns are computed once so plots and groupbys don't rebuild them. Rows
+    without a date get day NO_DAY and missing month and season.
+    """
+    days = df['date'].to_numpy().astype('datetime64[D]')
+    missing = np.isnat(days)
+    months = np.where(missing, np.nan, days.astype('datetime64[M]').astype('int64') % 12 + 1)
+
+    compact = pd.DataFrame({'day': np.where(missing, NO_DAY, days.astype('int64')).astype('int32')})
+    for col in MEASUREMENT_COLUMNS:
+        if col in df.columns:
+            compact[col] = df[col].to_numpy(dtype='float32')
+    compact['month'] = month_categories(months)
+    compact['season'] = season_categories(months)
+    return compact
+
+def bytes_per_row(df):
+    """Return the frame's in-memory footprint per row, including object data."""
+    if len(df) == 0:
+        return 0.0
+    return df.memory_usage(index=True, deep=True).sum() / len(df)
+
+def frame_dates(df):
+    # Dates as datetime64 for either a full or a compact frame
+    if 'date' in df.columns:
+        return df['date']
+    day = df['day'].to_numpy()
+    days = np.where(day == NO_DAY, np.datetime64('NaT'), day.astype('datetime64[D]'))
+    return pd.Series(days.astype('datetime64[ns]'), index=df.index, name='date')
+
+def frame_months(df):
+    # Month number (1-12) per row, named 'date' like df['date'].dt.month
+    if 'date' in df.columns:
+        return df['date'].dt.month
+    codes = df['month'].cat.codes.to_numpy()
+    months = pd.Series(codes.astype('int32') + 1, index=df.index, name='date')
+    # NaN where the date is missing, as .dt.month gives
+    return months.where(codes >= 0) if (codes < 0).any() else months
+
+def frame_month_starts(df):
+    # First day of each row's month, for grouping by year-month
+    dates = frame_dates(df).to_numpy()
+    return pd.Series(dates.astype('datetime64[M]').astype('datetime64[ns]'),
+                     index=df.index, name='date')
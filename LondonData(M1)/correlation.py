@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from ingest import MEASUREMENT_COLUMNS
+from compact import frame_dates
+
+def _pairwise_moments(values):
+    # Pairwise-complete counts and co-moments for every column pair at once.
+    # Columns are centred first so the sums don't lose precision on large means.
+    present = ~np.isnan(values)
+    mask = present.astype('float64')
+    centred = values - np.nanmean(values, axis=0)
+    filled = np.where(present, centred, 0.0)
+
+    n = mask.T @ mask                      # rows where both columns are present
+    sum_x = filled.T @ mask                # sum of column i over those rows
+    sum_xx = (filled * filled).T @ mask    # sum of squares of column i over those rows
+    sum_xy = filled.T @ filled
+    return n, sum_x, sum_xx, sum_xy
+
+def _pearson_from_moments(n, sum_x, sum_xx, sum_xy):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sum_xy - sum_x * sum_x.T
+        var_x = n * sum_xx - sum_x * sum_x
+        r = cov / np.sqrt(var_x * var_x.T)
+    return np.clip(r, -1.0, 1.0)
+
+def correlation_pvalues(r, n):
+    """
+    Two-sided p-values for correlation coefficients `r` from `n` pairs each,
+    using the t distribution with n - 2 degrees of freedom (as pearsonr does).
+    """
+    r, n = np.asarray(r, dtype='float64'), np.asarray(n, dtype='float64')
+    dof = n - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    p = np.where(np.abs(r) >= 1.0, 0.0, p)
+    return np.where(dof > 0, p, np.nan)
+
+def _rank_columns(values):
+    # Average ranks per column, ignoring NaNs
+    ranks = np.full(values.shape, np.nan)
+    for i in range(values.shape[1]):
+        present = ~np.isnan(values[:, i])
+        ranks[present, i] = stats.rankdata(values[present, i])
+    return ranks
+
+def correlation_matrix(df, columns=None, method='pearson'):
+    """
+    Correlate every pair of measurement columns in one pass.
+
+    Each pair uses the rows where both of its columns are present
+    (pairwise-complete, like DataFrame.corr). Spearman ranks each column once
+    and only re-ranks pairs whose complete rows differ from their columns'.
+
+    Args:
+        df: Frame with the measurement columns (full or compact)
+        columns: Columns to correlate, by default every measurement column present
+        method: 'pearson' or 'spearman'
+
+    Returns:
+        Dict of DataFrames indexed by column on both axes: 'r' (coefficients),
+        'p' (two-sided p-values) and 'n' (pairs used)
+    """
+    if columns is None:
+        columns = [col for col in MEASUREMENT_COLUMNS if col in df.columns]
+    values = df[columns].to_numpy(dtype='float64')
+    if method == 'spearman':
+        values_for_r = _rank_columns(values)
+    elif method == 'pearson':
+        values_for_r = values
+    else:
+        raise ValueError("method must be 'pearson' or 'spearman'")
+
+    n, sum_x, sum_xx, sum_xy = _pairwise_moments(values_for_r)
+    r = _pearson_from_moments(n, sum_x, sum_xx, sum_xy)
+
+    if method == 'spearman':
+        # Column-wide ranks are only exact where a pair's complete rows are all
+        # of each column's non-missing rows
+        counts = np.diag(n)
+        for i, j in zip(*np.triu_indices(len(columns), k=1)):
+            if n[i, j] != counts[i] or n[i, j] != counts[j]:
+                both = ~(np.isnan(values[:, i]) | np.isnan(values[:, j]))
+                if both.sum() > 1:
+                    r[i, j] = r[j, i] = stats.spearmanr(values[both, i], values[both, j])[0]
+
+    np.fill_diagonal(r, np.where(np.diag(n) > 1, 1.0, np.nan))
+    p = correlation_pvalues(r, n)
+    np.fill_diagonal(p, 0.0)
+    return {
+        'r': pd.DataFrame(r, index=columns, columns=columns),
+        'p': pd.DataFrame(p, index=columns, columns=columns),
+        'n': pd.DataFrame(n.astype('int64'), index=columns, columns=columns),
+    }
+
+def pair_stats(matrix, x, y):
+    """Return {'correlation', 'p_value', 'n'} for one pair from a correlation_matrix result."""
+    return {'correlation': matrix['r'].loc[x, y],
+            'p_value': matrix['p'].loc[x, y],
+            'n': int(matrix['n'].loc[x, y])}
+
+def rolling_correlation(df, x, y, window=365, min_periods=None):
+    """
+    Pearson r of two columns over a trailing window ending at each row, in O(n).
+
+    Windows are `window` calendar days (rows dated within the last `window`
+    days, inclusive of the current one), so gaps in the record don't stretch
+    them. Rows where either value is missing are left out of every window.
+    The counts and sums come from cumulative sums, so each window costs O(1)
+    however long it is.
+
+    Args:
+        df: Frame with the two columns and a date (full or compact), sorted by date
+        x, y: Column names
+        window: Window length in days
+        min_periods: Fewest complete pairs for a value, by default half the window
+
+    Returns:
+        Series of r indexed like `df`, NaN where a window has too few pairs
+    """
+    if min_periods is None:
+        min_periods = max(window // 2, 3)
+    xs = df[x].to_numpy(dtype='float64')
+    ys = df[y].to_numpy(dtype='float64')
+    days = frame_dates(df).to_numpy().astype('datetime64[D]').astype('int64')
+
+    present = ~(np.isnan(xs) | np.isnan(ys))
+    # Centre on the overall means so the cumulative sums stay well conditioned
+    mean_x, mean_y = (xs[present].mean(), ys[present].mean()) if present.any() else (0.0, 0.0)
+    dx = np.where(present, xs - mean_x, 0.0)
+    dy = np.where(present, ys - mean_y, 0.0)
+
+    def cumulative(values):
+        return np.concatenate(([0.0], np.cumsum(values)))
+
+    sums = [cumulative(v) for v in (present.astype('float64'), dx, dy, dx * dx, dy * dy, dx * dy)]
+    end = np.arange(1, len(days) + 1)
+    start = np.searchsorted(days, days - window + 1, side='left')
+    n, sx, sy, sxx, syy, sxy = (s[end] - s[start] for s in sums)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sy
+        r = cov / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    r = np.where(n >= min_periods, np.clip(r, -1.0, 1.0), np.nan)
+    return pd.Series(r, index=df.index, name=f'{x}~{y}')
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bump whenever load_data changes the columns or dtypes it produces,
+# so stale caches are rebuilt instead of being served.
+SCHEMA_VERSION = 2
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.weather_cache')
+
+def _read_source_bytes(file):
+    # Accept either a path or a file-like object (e.g. a Streamlit upload)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as f:
+            return f.read()
+    data = file.read()
+    file.seek(0)
+    return data if isinstance(data, bytes) else data.encode('utf-8')
+
+def source_hash(file):
+    """Return a content hash of the CSV source."""
+    return hashlib.blake2b(_read_source_bytes(file), digest_size=16).hexdigest()
+
+def _entry_dir(file, cache_dir):
+    name = getattr(file, 'name', file)
+    return os.path.join(cache_dir, os.path.basename(str(name)))
+
+def read_cache(file, digest, cache_dir=CACHE_DIR):
+    """
+    Return the cached frame for this source, or None on a miss.
+
+    Columns are memory-mapped copy-on-write from .npy files, so nothing is
+    parsed as text and the frame is writable like a freshly parsed one;
+    changes stay in memory and never reach the cache. A cache entry written
+    for different content or an older schema is a miss.
+    """
+    entry = _entry_dir(file, cache_dir)
+    try:
+        with open(os.path.join(entry, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('hash') != digest or manifest.get('schema_version') != SCHEMA_VERSION:
+        return None
+
+    columns = {
+        col: np.load(os.path.join(entry, f'{i}.npy'), mmap_mode='c')
+        for i, col in enumerate(manifest['columns'])
+    }
+    return pd.DataFrame(columns, copy=False)
+
+def write_cache(file, digest, df, cache_dir=CACHE_DIR):
+    """
+    Store a loaded frame as one .npy file per column, replacing any previous
+    entry for the same source. Returns False if the frame can't be cached
+    (e.g. it still holds object columns, or the cache directory isn't
+    writable); the caller keeps its frame either way.
+    """
+    entry = _entry_dir(file, cache_dir)
+    tmp = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Stage in a directory of our own so concurrent writers never collide
+        tmp = tempfile.mkdtemp(prefix=os.path.basename(entry) + '.', suffix='.tmp', dir=cache_dir)
+        for i, col in enumerate(df.columns):
+            np.save(os.path.join(tmp, f'{i}.npy'), df[col].to_numpy(), allow_pickle=False)
+        manifest = {
+            'hash': digest,
+            'schema_version': SCHEMA_VERSION,
+            'columns': list(df.columns),
+        }
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+    except (OSError, ValueError):
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return False
+    return True
@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+from ingest import MEASUREMENT_COLUMNS
+from compact import frame_dates
+
+def day_number(value):
+    """Return the day number (days since 1970-01-01) of a date, datetime, Timestamp or string."""
+    return int(np.datetime64(value, 'D').astype('int64'))
+
+def _capacity(n):
+    return 1 << max(int(n - 1).bit_length(), 0)
+
+class DateIndex:
+    """
+    Sorted day numbers over a loaded history, with per-column prefix sums and
+    min/max segment trees.
+
+    A date range is found by binary search, and its count, mean, std, min and
+    max come from the prefix sums and O(log n) tree nodes, so no query scans
+    the rows. Rows may arrive in any order (e.g. from Firestore); appending
+    days after the newest one only extends the structures.
+    """
+
+    def __init__(self, df, columns=None):
+        if columns is None:
+            columns = [col for col in MEASUREMENT_COLUMNS if col in df.columns]
+        self.columns = list(columns)
+        self._col = {col: i for i, col in enumerate(self.columns)}
+        days, values = self._sorted_rows(df)
+        # Values are centred on the first load's column means so the prefix
+        # sums of squares stay well conditioned
+        with np.errstate(invalid='ignore'):
+            self.offset = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) \
+                else np.zeros(len(self.columns))
+        self._build(days, values)
+
+    def _sorted_rows(self, df):
+        days = frame_dates(df).to_numpy().astype('datetime64[D]')
+        valid = ~np.isnat(days)
+        days = days[valid].astype('int64')
+        order = np.argsort(days, kind='stable')
+        values = np.empty((len(days), len(self.columns)))
+        for i, col in enumerate(self.columns):
+            source = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+            values[:, i] = pd.to_numeric(source, errors='coerce').to_numpy(dtype='float64')[valid][order]
+        return days[order], values
+
+    def _build(self, days, values):
+        self.days = days
+        self.values = values
+        self._prefix = None
+        self._extend_prefix(0)
+        size = _capacity(max(len(days), 1))
+        self._min = np.full((2 * size, len(self.columns)), np.inf)
+        self._max = np.full((2 * size, len(self.columns)), -np.inf)
+        self._set_leaves(0)
+
+    def _extend_prefix(self, start):
+        # Cumulative count, sum and sum of squares from row `start` onwards
+        new = self.values[start:] - self.offset
+        present = ~np.isnan(new)
+        filled = np.where(present, new, 0.0)
+        base = self._prefix[:, -1:] if self._prefix is not None else np.zeros((3, 1, len(self.columns)))
+        steps = np.stack([present, filled, filled * filled])
+        extended = base + np.cumsum(steps, axis=1)
+        if self._prefix is None:
+            self._prefix = np.concatenate([base, extended], axis=1)
+        else:
+            self._prefix = np.concatenate([self._prefix, extended], axis=1)
+
+    def _set_leaves(self, start):
+        # Write leaves from row `start` and recompute only their ancestors
+        size = len(self._min) // 2
+        values = self.values[start:]
+        self._min[size + start:size + len(self.days)] = np.where(np.isnan(values), np.inf, values)
+        self._max[size + start:size + len(self.days)] = np.where(np.isnan(values), -np.inf, values)
+        lo, hi = size + start, size + len(self.days)
+        while lo > 1:
+            lo, hi = lo // 2, (hi + 1) // 2
+            self._min[lo:hi] = np.minimum(self._min[2 * lo:2 * hi:2], self._min[2 * lo + 1:2 * hi:2])
+            self._max[lo:hi] = np.maximum(self._max[2 * lo:2 * hi:2], self._max[2 * lo + 1:2 * hi:2])
+
+    def __len__(self):
+        return len(self.days)
+
+    def append(self, df):
+        """
+        Add rows. Days after the newest one extend the prefix sums and trees
+        in O(new rows + log n); anything else rebuilds the index. Returns the
+        number of rows added.
+        """
+        days, values = self._sorted_rows(df)
+        if len(days) == 0:
+            return 0
+        start = len(self.days)
+        if start and days[0] <= self.days[-1]:
+            merged_days = np.concatenate([self.days, days])
+            order = np.argsort(merged_days, kind='stable')
+            self._build(merged_days[order], np.concatenate([self.values, values])[order])
+            return len(days)
+
+        self.days = np.concatenate([self.days, days])
+        self.values = np.concatenate([self.values, values])
+        self._extend_prefix(start)
+        if len(self.days) > len(self._min) // 2:
+            self._build(self.days, self.values)
+        else:
+            self._set_leaves(start)
+        return len(days)
+
+    def bounds(self, start=None, end=None):
+        """Return the [lo, hi) row positions of the days from `start` to `end`, inclusive."""
+        lo = 0 if start is None else int(np.searchsorted(self.days, day_number(start), 'left'))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, day_number(end), 'right'))
+        return lo, max(hi, lo)
+
+    def last(self, n_days):
+        """
+        Return the (start, end) dates of the last `n_days` calendar days held;
+        (None, None), an open range, for an empty index.
+        """
+        if not len(self.days):
+            return None, None
+        end = np.datetime64(int(self.days[-1]), 'D')
+        return end - (n_days - 1), end
+
+    @property
+    def first_day(self):
+        return np.datetime64(int(self.days[0]), 'D') if len(self.days) else None
+
+    @property
+    def last_day(self):
+        return np.datetime64(int(self.days[-1]), 'D') if len(self.days) else None
+
+    def _tree_nodes(self, lo, hi):
+        # Segment tree nodes that exactly cover leaves [lo, hi)
+        size = len(self._min) // 2
+        nodes = []
+        lo, hi = lo + size, hi + size
+        while lo < hi:
+            if lo & 1:
+                nodes.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                nodes.append(hi)
+            lo, hi = lo // 2, hi // 2
+        return nodes
+
+    def stats(self, start=None, end=None, columns=None):
+        """
+        Count, mean, std, min and max of each column over a date range.
+
+        Args:
+            start, end: Inclusive range ends (any date-like value); None is open
+            columns: Columns to report, by default all indexed columns
+
+        Returns:
+            DataFrame indexed by column; counts exclude missing values, and
+            std is NaN for fewer than two values
+        """
+        columns = self.columns if columns is None else list(columns)
+        cols = [self._col[col] for col in columns]
+        lo, hi = self.bounds(start, end)
+        count, total, sumsq = self._prefix[:, hi, cols] - self._prefix[:, lo, cols]
+        nodes = self._tree_nodes(lo, hi)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            variance = np.where(count > 1, np.maximum(sumsq - total * mean, 0.0) / (count - 1), np.nan)
+            low = self._min[nodes][:, cols].min(axis=0) if nodes else np.full(len(cols), np.inf)
+            high = self._max[nodes][:, cols].max(axis=0) if nodes else np.full(len(cols), -np.inf)
+        return pd.DataFrame({
+            'count': count.astype('int64'),
+            'mean': mean + self.offset[cols],
+            'std': np.sqrt(variance),
+            'min': np.where(count > 0, low, np.nan),
+            'max': np.where(count > 0, high, np.nan),
+        }, index=pd.Index(columns, name='column'))
+
+    def frame(self, start=None, end=None):
+        """Return the rows of a date range, in date order, as a frame with `date` and the columns."""
+        lo, hi = self.bounds(start, end)
+        frame = pd.DataFrame(self.values[lo:hi], columns=self.columns)
+        frame.insert(0, 'date', self.days[lo:hi].astype('datetime64[D]').astype('datetime64[ns]'))
+        return frame
+
+def main():
+    import sys
+    import time
+    from weatherAnalysis import load_data
+
+    df = load_data(sys.argv[1] if len(sys.argv) > 1 else 'weather_data.csv')
+    start = time.perf_counter()
+    index = DateIndex(df.sample(frac=1, random_state=0))
+    print(f"Indexed {len(index)} days in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = np.random.default_rng(0)
+    ranges = np.sort(rng.integers(index.days[0], index.days[-1], size=(1000, 2)), axis=1)
+    ranges = ranges.astype('datetime64[D]')
+    start = time.perf_counter()
+    for first, last in ranges:
+        index.stats(first, last, columns=['mean_temp'])
+    indexed = (time.perf_counter() - start) / len(ranges)
+    start = time.perf_counter()
+    for first, last in ranges[:100]:
+        mask = (df['date'] >= pd.Timestamp(first)) & (df['date'] <= pd.Timestamp(last))
+        df.loc[mask, 'mean_temp'].agg(['count', 'mean', 'std', 'min', 'max'])
+    masked = (time.perf_counter() - start) / 100
+    print(f"Range stats: {indexed * 1000:.3f} ms indexed, {masked * 1000:.3f} ms with a boolean mask")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import numpy as np
+import matplotlib.dates as mdates
+
+# Points drawn per horizontal pixel; min/max decimation needs two per column
+POINTS_PER_PIXEL = 2
+
+# Scatters with more points than this are drawn as a hexbin density
+MAX_SCATTER_POINTS = 5000
+
+def _numeric(x):
+    # Map x values to the float axis units matplotlib uses (days for dates)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return mdates.date2num(x)
+    return x.astype('float64')
+
+def axis_pixel_width(ax):
+    """Return the width of the axes' drawing area in display pixels."""
+    return max(int(ax.get_window_extent().width), 1)
+
+def minmax_indices(x, y, n_bins):
+    """
+    Return the indices of the lowest and highest y in each of `n_bins` equal
+    x-ranges (plus the end points), in x order. Drawn as a line this looks the
+    same as the full series at one bin per pixel column: every spike survives.
+    """
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    finite = np.flatnonzero(~np.isnan(y))
+    if len(finite) <= 2 * n_bins:
+        return finite
+    xs, ys = x[finite], y[finite]
+    span = xs[-1] - xs[0]
+    if span <= 0:
+        return finite[[0, -1]]
+
+    # Sort by (bin, y); the first and last entry of each bin are its min and max
+    bins = np.minimum(((xs - xs[0]) / span * n_bins).astype('int64'), n_bins - 1)
+    order = np.lexsort((ys, bins))
+    sorted_bins = bins[order]
+    first = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+    last = np.r_[first[1:] - 1, len(order) - 1]
+    keep = np.unique(np.r_[0, order[first], order[last], len(xs) - 1])
+    return finite[keep]
+
+def lttb_indices(x, y, n_out):
+    """
+    Return the indices of `n_out` points chosen by Largest-Triangle-Three-Buckets.
+
+    The series is split into equal-count buckets and from each the point
+    forming the largest triangle with the previously chosen point and the next
+    bucket's average is kept, which preserves the visual shape of the line.
+    """
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    finite = np.flatnonzero(~np.isnan(y))
+    n = len(finite)
+    if n_out >= n or n_out < 3:
+        return finite
+    xs, ys = x[finite], y[finite]
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    chosen = np.empty(n_out, dtype='int64')
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = xs[end:next_end].mean(), ys[end:next_end].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[start:end] - ys[a])
+                      - (xs[a] - xs[start:end]) * (avg_y - ys[a]))
+        a = start + int(np.argmax(area)) if end > start else a
+        chosen[i + 1] = a
+    return finite[np.unique(chosen)]
+
+def decimate(x, y, width_px, method='minmax', xlim=None, points_per_pixel=POINTS_PER_PIXEL):
+    """
+    Downsample a sorted series for drawing `width_px` pixels wide.
+
+    Args:
+        x, y: Series values; x sorted ascending (numbers or datetimes)
+        width_px: Width of the axes in pixels
+        method: 'minmax' (exact envelope) or 'lttb' (shape-preserving)
+        xlim: Optional visible (low, high) range in axis units; points outside
+            it are skipped, keeping one on either side so the line runs to the edge
+        points_per_pixel: Level of detail
+
+    Returns:
+        (x, y) subsets of the inputs
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype='float64')
+    xnum = _numeric(x)
+    lo, hi = 0, len(x)
+    if xlim is not None:
+        lo = max(np.searchsorted(xnum, xlim[0], side='left') - 1, 0)
+        hi = min(np.searchsorted(xnum, xlim[1], side='right') + 1, len(x))
+
+    n_out = max(int(width_px * points_per_pixel), 3)
+    if method == 'lttb':
+        idx = lttb_indices(xnum[lo:hi], y[lo:hi], n_out)
+    elif method == 'minmax':
+        idx = minmax_indices(xnum[lo:hi], y[lo:hi], max(n_out // 2, 1))
+    else:
+        raise ValueError("method must be 'minmax' or 'lttb'")
+    return x[lo:hi][idx], y[lo:hi][idx]
+
+class DecimatedLine:
+    """
+    A line plot that only ever draws about `points_per_pixel` points per pixel.
+
+    The full series is kept and re-decimated to the visible x-range whenever
+    the axes' x-limits change, so zooming in reveals the full detail.
+    """
+
+    def __init__(self, ax, x, y, method='minmax', points_per_pixel=POINTS_PER_PIXEL,
+                 **line_kwargs):
+        self.ax = ax
+        self.method = method
+        self.points_per_pixel = points_per_pixel
+        self._x, self._y = np.asarray(x), np.asarray(y, dtype='float64')
+        self.line, = ax.plot(*decimate(self._x, self._y, axis_pixel_width(ax), method,
+                                       None, points_per_pixel), **line_kwargs)
+        ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    def set_data(self, x, y):
+        # Replace the full series. A zoomed-in view stays zoomed; otherwise the
+        # whole series is drawn, and ax.relim() / ax.autoscale_view() fit it
+        self._x, self._y = np.asarray(x), np.asarray(y, dtype='float64')
+        self._redraw(None if self.ax.get_autoscalex_on() else self.ax.get_xlim())
+
+    def _on_xlim_changed(self, ax):
+        self._redraw(ax.get_xlim())
+
+    def _redraw(self, xlim):
+        x, y = decimate(self._x, self._y, axis_pixel_width(self.ax), self.method,
+                        xlim, self.points_per_pixel)
+        self.line.set_data(x, y)
+
+def plot_decimated(ax, x, y, method='minmax', **line_kwargs):
+    """Draw x/y on `ax` as a DecimatedLine and return it."""
+    return DecimatedLine(ax, x, y, method=method, **line_kwargs)
+
+def density_scatter(ax, x, y, max_points=MAX_SCATTER_POINTS, cmap='Blues', **scatter_kwargs):
+    """
+    Draw a scatter, switching to a hexbin density when there are more than
+    `max_points` points. Hexagon size follows the axis pixel width.
+
+    Returns:
+        The PathCollection or PolyCollection drawn
+    """
+    x, y = np.asarray(x, dtype='float64'), np.asarray(y, dtype='float64')
+    finite = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[finite], y[finite]
+    if len(x) <= max_points:
+        return ax.scatter(x, y, **scatter_kwargs)
+    gridsize = max(axis_pixel_width(ax) // 10, 10)
+    return ax.hexbin(x, y, gridsize=gridsize, mincnt=1, cmap=cmap)
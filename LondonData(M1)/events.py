@@ -0,0 +1,291 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from compact import frame_dates
+
+# Optional column identifying the weather station; frames without one are a
+# single station
+STATION_COLUMN = 'station'
+
+# Each event is a run of at least `min_days` consecutive days on which `column`
+# is above (or below) a threshold: either the `percentile` of that calendar day
+# in the base history, or a fixed `value`
+EVENT_DEFINITIONS = {
+    'heatwave': {'column': 'max_temp', 'above': True, 'percentile': 90, 'min_days': 3},
+    'cold_spell': {'column': 'min_temp', 'above': False, 'percentile': 10, 'min_days': 3},
+    'dry_spell': {'column': 'precipitation', 'above': False, 'value': 1.0, 'min_days': 10},
+    'snow_cover': {'column': 'snow_depth', 'above': True, 'value': 0.0, 'min_days': 1},
+}
+
+# Days either side of a calendar day pooled into its percentile
+THRESHOLD_WINDOW = 7
+
+EVENT_TABLE_COLUMNS = ['start', 'end', 'duration', 'intensity', 'peak']
+
+def calendar_slots(days):
+    """
+    Map datetime64[D] days to a 0-365 calendar slot, with Feb 29 as slot 59 in
+    every year so that a given date always lands in the same slot.
+    """
+    years = days.astype('datetime64[Y]')
+    day_of_year = (days - years.astype('datetime64[D]')).astype('int64')
+    year_numbers = years.astype('int64') + 1970
+    leap = (year_numbers % 4 == 0) & ((year_numbers % 100 != 0) | (year_numbers % 400 == 0))
+    return day_of_year + ((~leap) & (day_of_year >= 59))
+
+def _nan_quantile(values, q):
+    # Linear-interpolated percentile along the last axis, ignoring NaNs; the
+    # same as np.nanpercentile but one sort for every row at once
+    ordered = np.sort(values, axis=-1)
+    count = (~np.isnan(values)).sum(axis=-1)
+    position = q / 100 * np.maximum(count - 1, 0)
+    lower = np.floor(position).astype('int64')
+    upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+    low = np.take_along_axis(ordered, lower[..., None], axis=-1)[..., 0]
+    high = np.take_along_axis(ordered, upper[..., None], axis=-1)[..., 0]
+    result = low + (high - low) * (position - lower)
+    return np.where(count > 0, result, np.nan)
+
+def day_of_year_thresholds(stations, days, values, n_stations, percentile, window=THRESHOLD_WINDOW):
+    """
+    Per-station, per-calendar-day percentile of `values`.
+
+    Values are laid out as a (station, year, slot) cube, so each calendar day's
+    pool is its +/- `window` neighbouring days in every year (running across
+    New Year into the adjacent year), and all 366 percentiles of all stations
+    come from one sort.
+
+    Args:
+        stations: Station code (0..n_stations-1) per row
+        days: datetime64[D] per row
+        values: Measurement per row, NaN where missing
+        n_stations: Number of station codes
+        percentile: Percentile in 0-100
+
+    Returns:
+        (n_stations, 366) array of thresholds, NaN where there is no data
+    """
+    years = days.astype('datetime64[Y]').astype('int64')
+    first_year = years.min() if len(years) else 0
+    n_years = (years.max() - first_year + 1) if len(years) else 0
+    cube = np.full((n_stations, n_years * 366), np.nan)
+    cube[stations, (years - first_year) * 366 + calendar_slots(days)] = values
+
+    padded = np.pad(cube, ((0, 0), (window, window)), constant_values=np.nan)
+    pools = sliding_window_view(padded, 2 * window + 1, axis=1)
+    pools = pools.reshape(n_stations, n_years, 366, -1).transpose(0, 2, 1, 3)
+    return _nan_quantile(pools.reshape(n_stations, 366, -1), percentile)
+
+def find_runs(condition, continues):
+    """
+    Run-length encode a boolean array.
+
+    Args:
+        condition: Whether each row is part of a run
+        continues: Whether each row directly follows the previous one (same
+            station, next day); False breaks a run even if both rows qualify
+
+    Returns:
+        (starts, ends) arrays of the first and last row index of every run
+    """
+    linked = condition[1:] & condition[:-1] & continues[1:]
+    starts = np.flatnonzero(condition & ~np.r_[False, linked])
+    ends = np.flatnonzero(condition & ~np.r_[linked, False])
+    return starts, ends
+
+def _no_days(n):
+    return np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+
+def _run_table(starts, ends, days, excess, signed):
+    # Duration, mean exceedance and most extreme value per run, by reduceat
+    # over [start, end + 1) segments
+    if len(starts) == 0:
+        return {'start': days[:0], 'end': days[:0], 'duration': starts,
+                'intensity': np.zeros(0), 'peak': np.zeros(0)}
+    bounds = np.column_stack([starts, ends + 1]).ravel()
+    excess = np.append(excess, 0.0)
+    signed = np.append(signed, 0.0)
+    duration = ends - starts + 1
+    return {
+        'start': days[starts],
+        'end': days[ends],
+        'duration': duration,
+        'intensity': np.add.reduceat(excess, bounds)[::2] / duration,
+        'peak': np.maximum.reduceat(signed, bounds)[::2],
+    }
+
+class EventDetector:
+    """
+    Finds extreme-weather runs (heatwaves, cold spells, dry spells, snow cover)
+    for one or more stations.
+
+    Thresholds come from a base frame (by default the one it is built with,
+    e.g. pass a 1981-2010 slice for a fixed climate normal) and stay fixed, so
+    appending days never changes events already found. Runs still in progress
+    at the newest day are kept open and extended by later appends, which
+    re-scan only the rows of those open runs plus the new days.
+    """
+
+    def __init__(self, df, definitions=None, window=THRESHOLD_WINDOW, base=None):
+        self.definitions = dict(EVENT_DEFINITIONS if definitions is None else definitions)
+        self.columns = sorted({spec['column'] for spec in self.definitions.values()})
+        self.stations = []
+        # Per station code: newest day seen, and per event type the start of
+        # the run open at that day (NaT if none)
+        self._last_day = _no_days(0)
+        self._open_start = {name: _no_days(0) for name in self.definitions}
+        self._closed = {name: [] for name in self.definitions}
+        self._open = {name: None for name in self.definitions}
+        self._tail = None  # Rows of the open runs, rescanned by the next append
+        self.thresholds = {}
+
+        base_stations, base_days, base_values = self._rows(df if base is None else base)
+        for name, spec in self.definitions.items():
+            if 'percentile' in spec:
+                self.thresholds[name] = day_of_year_thresholds(
+                    base_stations, base_days, base_values[spec['column']], len(self.stations),
+                    spec['percentile'], window)
+        if base is None:
+            self._scan(base_stations, base_days, base_values)
+        else:
+            self._scan(*self._rows(df))
+
+    def _station_codes(self, labels):
+        # Integer code per label; stations first seen in an append get new
+        # codes (and no percentile thresholds, so only fixed-value events)
+        for label in labels:
+            if label not in self.stations:
+                self.stations.append(label)
+        grow = len(self.stations) - len(self._last_day)
+        self._last_day = np.r_[self._last_day, _no_days(grow)]
+        for name, start in self._open_start.items():
+            self._open_start[name] = np.r_[start, _no_days(grow)]
+        for name, thresholds in self.thresholds.items():
+            self.thresholds[name] = np.vstack([thresholds, np.full((grow, 366), np.nan)])
+        return np.array([self.stations.index(label) for label in labels], dtype='int64')
+
+    def _rows(self, df):
+        # Station codes, days and measurement arrays sorted by (station, day)
+        days = frame_dates(df).to_numpy().astype('datetime64[D]')
+        if STATION_COLUMN in df.columns:
+            labels, uniques = pd.factorize(df[STATION_COLUMN])
+            stations = self._station_codes(list(uniques))[labels]
+        else:
+            stations = np.repeat(self._station_codes([None]), len(df))
+        valid = ~np.isnat(days)
+        order = np.lexsort((days[valid], stations[valid]))
+        values = {col: (pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')
+                        if col in df.columns else np.full(len(df), np.nan))[valid][order]
+                  for col in self.columns}
+        return stations[valid][order], days[valid][order], values
+
+    def append(self, df):
+        """
+        Add new days and extend or close the open runs.
+
+        Rows dated on or before a station's newest day are ignored, so an
+        overlapping frame doesn't add days twice. Returns the number of rows
+        added.
+        """
+        stations, days, values = self._rows(df)
+        last = self._last_day[stations]
+        new = np.isnat(last) | (days > last)
+        stations, days = stations[new], days[new]
+        values = {col: v[new] for col, v in values.items()}
+        if len(days) == 0:
+            return 0
+        self._scan(stations, days, values)
+        return len(days)
+
+    def _scan(self, stations, days, values):
+        if self._tail is not None:
+            tail_stations, tail_days, tail_values = self._tail
+            stations = np.r_[tail_stations, stations]
+            days = np.r_[tail_days, days]
+            values = {col: np.r_[tail_values[col], values[col]] for col in values}
+            order = np.lexsort((days, stations))
+            stations, days = stations[order], days[order]
+            values = {col: v[order] for col, v in values.items()}
+
+        previous_last = self._last_day[stations]
+        continues = np.r_[False, (stations[1:] == stations[:-1])
+                          & (days[1:] - days[:-1] == np.timedelta64(1, 'D'))]
+        is_last = np.r_[stations[1:] != stations[:-1], True]
+        slots = calendar_slots(days)
+
+        keep = np.zeros(len(days), dtype=bool)
+        for name, spec in self.definitions.items():
+            sign = 1.0 if spec['above'] else -1.0
+            if 'percentile' in spec:
+                threshold = self.thresholds[name][stations, slots]
+            else:
+                threshold = np.full(len(days), float(spec['value']))
+            value = values[spec['column']]
+            excess = np.nan_to_num(sign * (value - threshold), nan=-np.inf)
+
+            # The tail holds the open runs of every event type; for this type
+            # only its own open runs and the new days are scanned
+            open_start = self._open_start[name][stations]
+            eligible = np.where(np.isnat(open_start),
+                                np.isnat(previous_last) | (days > previous_last),
+                                days >= open_start)
+            starts, ends = find_runs((excess > 0) & eligible, continues)
+            table = _run_table(starts, ends, days, np.maximum(excess, 0.0), sign * value)
+            table['peak'] = sign * table['peak']
+            table['station'] = stations[starts]
+
+            still_open = is_last[ends]
+            closed = ~still_open & (table['duration'] >= spec['min_days'])
+            self._closed[name].append({key: column[closed] for key, column in table.items()})
+
+            open_start = _no_days(len(self.stations))
+            open_start[stations[ends[still_open]]] = days[starts[still_open]]
+            self._open_start[name] = open_start
+            self._open[name] = {key: column[still_open] for key, column in table.items()}
+            keep |= days >= open_start[stations]
+
+        np.maximum.at(self._last_day.view('int64'), stations, days.view('int64'))
+        self._tail = (stations[keep], days[keep], {col: v[keep] for col, v in values.items()})
+
+    def events(self, name):
+        """
+        Return the events of one type, including any still in progress at the
+        newest day once they are long enough.
+
+        Returns:
+            DataFrame with station (for multi-station data), start, end,
+            duration (days), intensity (mean exceedance of the threshold) and
+            peak (most extreme value), ordered by station and start
+        """
+        spec = self.definitions[name]
+        parts = self._closed[name] + [self._open[name]]
+        table = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        long_enough = table['duration'] >= spec['min_days']
+        table = {key: column[long_enough] for key, column in table.items()}
+        order = np.lexsort((table['start'], table['station']))
+
+        events = pd.DataFrame({key: table[key][order] for key in EVENT_TABLE_COLUMNS})
+        events['start'] = events['start'].astype('datetime64[ns]')
+        events['end'] = events['end'].astype('datetime64[ns]')
+        if self.stations != [None]:
+            events.insert(0, STATION_COLUMN, np.array(self.stations, dtype=object)[table['station'][order]])
+        return events
+
+    def tables(self):
+        """Return {event name: events(name)} for every event type."""
+        return {name: self.events(name) for name in self.definitions}
+
+def detect_events(df, definitions=None, window=THRESHOLD_WINDOW, base=None):
+    """
+    Detect every event type over a frame (full or compact, optionally with a
+    station column) in one pass.
+
+    Returns:
+        Dict of event name to event table (see EventDetector.events)
+    """
+    return EventDetector(df, definitions, window, base).tables()
+
+def events_per_year(events):
+    """Count events and event days per year of their start date."""
+    years = events['start'].dt.year.rename('year')
+    return events.groupby(years).agg(events=('duration', 'size'), days=('duration', 'sum'))
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+MEASUREMENT_COLUMNS = ['cloud_cover', 'sunshine', 'global_radiation', 'max_temp',
+                       'mean_temp', 'min_temp', 'precipitation', 'pressure', 'snow_depth']
+
+# Known schema of the London weather export; declaring it up front skips
+# per-column type inference in the CSV reader.
+WEATHER_DTYPES = {'date': 'int32', **{col: 'float32' for col in MEASUREMENT_COLUMNS}}
+
+# Whole days that fit datetime64[ns]; pandas coerces dates outside them to NaT
+FIRST_NS_DAY = np.datetime64('1677-09-22')
+LAST_NS_DAY = np.datetime64('2262-04-11')
+
+def _month_day(rest, digits):
+    # Split the digits after the year the way pd.to_datetime's %m%d pattern
+    # does: two digits each when there are four; with three, a two-digit
+    # month if that leaves a valid day digit, else a one-digit month; with
+    # two, one digit each. Returns (month, day), 0 where nothing matches.
+    two_month, one_day = rest // 10, rest % 10
+    one_month, two_day = rest // 100, rest % 100
+    two_digit_month = (two_month >= 1) & (two_month <= 12) & (one_day >= 1)
+    month = np.select([digits == 4, (digits == 3) & two_digit_month, digits == 3, digits == 2],
+                      [rest // 100, two_month, one_month, two_month], 0)
+    day = np.select([digits == 4, (digits == 3) & two_digit_month, digits == 3, digits == 2],
+                    [rest % 100, one_day, two_day, one_day], 0)
+    # Single digits never match 0; two-digit fields are 01-12 and 01-31
+    return month, np.where(day <= 31, day, 0)
+
+def parse_yyyymmdd(values):
+    """
+    Convert YYYYMMDD numbers to datetime64 with integer arithmetic.
+
+    Matches pd.to_datetime(format='%Y%m%d', errors='coerce') restricted to
+    the datetime64[ns] range: fractions are truncated, six- and seven-digit
+    values are read with the same short month/day fields as pandas (1979011
+    is 1979-01-01), and missing values, impossible dates and dates outside
+    the range become NaT.
+    """
+    values = np.trunc(np.asarray(values, dtype='float64'))
+    valid = np.isfinite(values) & (values >= 1e5) & (values < 1e8)
+    ints = np.where(valid, values, 19700101).astype('int64')
+
+    digits = np.where(ints >= 10_000_000, 4, np.where(ints >= 1_000_000, 3, 2))
+    scale = 10 ** digits
+    year = ints // scale
+    month, day = _month_day(ints % scale, digits)
+    valid &= (month >= 1) & (month <= 12) & (day >= 1)
+
+    month_start = ((year - 1970) * 12 + np.clip(month, 1, 12) - 1).astype('datetime64[M]')
+    days_in_month = ((month_start + 1).astype('datetime64[D]')
+                     - month_start.astype('datetime64[D]')).astype('int64')
+    valid &= day <= days_in_month
+
+    dates = month_start.astype('datetime64[D]') + (day - 1)
+    valid &= (dates >= FIRST_NS_DAY) & (dates <= LAST_NS_DAY)
+    dates[~valid] = np.datetime64('NaT')
+    return dates.astype('datetime64[ns]')
+
+def parse_date_column(dates):
+    # Numeric YYYYMMDD columns take the vectorized path; anything else
+    # (e.g. text mixed into the column) goes through pandas' format parser
+    if pd.api.types.is_numeric_dtype(dates):
+        return pd.Series(parse_yyyymmdd(dates), index=dates.index, name=dates.name)
+    parsed = pd.to_datetime(dates, format='%Y%m%d', errors='coerce')
+    in_range = (parsed >= pd.Timestamp(FIRST_NS_DAY)) & (parsed <= pd.Timestamp(LAST_NS_DAY))
+    return parsed.where(in_range).astype('datetime64[ns]')
+
+def coerce_weather_dtypes(df, measurement_dtype='float32'):
+    # Coerce unparseable measurements to NaN, then narrow to the declared dtype
+    for col in MEASUREMENT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(measurement_dtype)
+    return df
+
+def read_weather_csv(file, use_pyarrow=False, measurement_dtype='float32'):
+    """
+    Read a London weather CSV with the known schema declared up front.
+
+    Args:
+        file: Path or file-like object
+        use_pyarrow: Use the multithreaded pyarrow CSV engine when it is installed
+        measurement_dtype: Float dtype for the measurement columns; use float64
+            when values are written back out and must keep their decimal form
+
+    Returns:
+        DataFrame with typed measurements and the raw YYYYMMDD date column
+    """
+    engine = 'c'
+    if use_pyarrow:
+        try:
+            import pyarrow  # noqa: F401
+            engine = 'pyarrow'
+        except ImportError:
+            pass
+
+    dtypes = {**WEATHER_DTYPES, **{col: measurement_dtype for col in MEASUREMENT_COLUMNS}}
+    try:
+        return pd.read_csv(file, dtype=dtypes, engine=engine)
+    except ValueError:
+        # A malformed value broke the typed read; rewind and fall back to
+        # inference plus the same coercion the untyped path applies
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        return coerce_weather_dtypes(pd.read_csv(file, low_memory=False), measurement_dtype)
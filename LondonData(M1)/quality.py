@@ -0,0 +1,314 @@
+import numpy as np
+import pandas as pd
+from ingest import MEASUREMENT_COLUMNS
+from compact import frame_dates
+from events import STATION_COLUMN, calendar_slots, find_runs
+
+# Bit per measurement in the `gaps` mask, plus one for days absent from the
+# source (every measurement bit is then set as well)
+GAP_BITS = {col: 1 << i for i, col in enumerate(MEASUREMENT_COLUMNS)}
+MISSING_DAY = 1 << 15
+
+FILL_STRATEGIES = ('linear', 'time', 'climatology', 'ffill')
+
+# Period keys for resample; every period is labelled by its first day
+# (weeks start on Monday)
+RESAMPLE_FREQUENCIES = ('W', 'M', 'A')
+
+def _columns(df, columns):
+    if columns is None:
+        return [col for col in MEASUREMENT_COLUMNS if col in df.columns]
+    return list(columns)
+
+def _station_codes(df):
+    # Integer station code per row and the labels, or a single unnamed station
+    if STATION_COLUMN in df.columns:
+        codes, labels = pd.factorize(df[STATION_COLUMN], sort=True)
+        return codes.astype('int64'), labels
+    return np.zeros(len(df), dtype='int64'), None
+
+def gap_mask(df, columns=None):
+    """Return a uint16 GAP_BITS mask per row, with a bit set for each missing measurement."""
+    mask = np.zeros(len(df), dtype='uint16')
+    for col in _columns(df, columns):
+        mask |= np.isnan(df[col].to_numpy(dtype='float64')).astype('uint16') * np.uint16(GAP_BITS[col])
+    return mask
+
+def daily_calendar(df, columns=None):
+    """
+    Place a frame (full or compact, optionally multi-station) on a complete
+    daily calendar.
+
+    Each station gets every day from its first to its last, so missing days
+    become rows of NaNs. Rows are written straight to their calendar
+    position; where a station has the same day twice the later row wins.
+
+    Returns:
+        DataFrame with `date` (and `station`), the measurement columns and a
+        `gaps` mask: GAP_BITS of the missing measurements, and MISSING_DAY
+        for days absent from the source
+    """
+    columns = _columns(df, columns)
+    days = frame_dates(df).to_numpy().astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    stations, labels = _station_codes(df)
+    day_numbers, stations = days[valid].astype('int64'), stations[valid]
+    n_stations = len(labels) if labels is not None else 1
+
+    # Calendar span per station, and where each station's block starts
+    first = np.full(n_stations, np.iinfo('int64').max)
+    last = np.full(n_stations, np.iinfo('int64').min)
+    np.minimum.at(first, stations, day_numbers)
+    np.maximum.at(last, stations, day_numbers)
+    lengths = np.where(last >= first, last - first + 1, 0)
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+    total = int(lengths.sum())
+    position = offsets[stations] + day_numbers - first[stations]
+
+    present = np.zeros(total, dtype=bool)
+    present[position] = True
+    row_station = np.repeat(np.arange(n_stations), lengths)
+    calendar = np.arange(total) - offsets[row_station] + first[row_station]
+
+    result = {'date': calendar.astype('datetime64[D]').astype('datetime64[ns]')}
+    if labels is not None:
+        result[STATION_COLUMN] = np.asarray(labels)[row_station]
+    for col in columns:
+        source = df[col].to_numpy()[valid]
+        dtype = source.dtype if np.issubdtype(source.dtype, np.floating) else np.float64
+        values = np.full(total, np.nan, dtype=dtype)
+        values[position] = source
+        result[col] = values
+    daily = pd.DataFrame(result)
+    daily['gaps'] = gap_mask(daily, columns) | np.where(present, 0, MISSING_DAY).astype('uint16')
+    return daily
+
+def _neighbours(valid, segments):
+    # Index of the nearest valid row at or before / at or after each row within
+    # the same segment (station), -1 / len(valid) where there is none
+    n = len(valid)
+    index = np.arange(n)
+    before = np.maximum.accumulate(np.where(valid, index, -1))
+    after = np.minimum.accumulate(np.where(valid, index, n)[::-1])[::-1]
+    segment = np.r_[segments, -1]
+    before = np.where((before >= 0) & (segment[before] == segments), before, -1)
+    after = np.where((after < n) & (segment[np.minimum(after, n - 1)] == segments), after, n)
+    return before, after
+
+def fill_gaps(daily, strategy='linear', limit=None, columns=None, climatology=None):
+    """
+    Fill missing measurements with one vectorized pass per column.
+
+    Args:
+        daily: Frame from daily_calendar (any date-ordered frame works; runs
+            never cross from one station to the next)
+        strategy: 'linear' (by row), 'time' (by date), 'climatology' (the
+            smoothed normal for the calendar day) or 'ffill'
+        limit: For 'linear'/'time', only gaps of at most `limit` days are
+            filled; for 'ffill', values are carried at most `limit` days
+        columns: Columns to fill, by default every measurement column present
+        climatology: Fitted Climatology, required for 'climatology'
+
+    Returns:
+        Copy of `daily` with the gaps filled. The `gaps` mask is unchanged,
+        so filled values can still be told apart.
+    """
+    if strategy not in FILL_STRATEGIES:
+        raise ValueError(f"strategy must be one of {FILL_STRATEGIES}")
+    if strategy == 'climatology' and climatology is None:
+        raise ValueError("The climatology strategy needs a fitted Climatology")
+
+    filled = daily.copy()
+    stations, _ = _station_codes(daily)
+    days = frame_dates(daily).to_numpy().astype('datetime64[D]')
+    x = days.astype('int64').astype('float64') if strategy != 'linear' else np.arange(len(daily), dtype='float64')
+    slots = calendar_slots(days) if strategy == 'climatology' else None
+
+    for col in _columns(daily, columns):
+        values = daily[col].to_numpy(dtype='float64')
+        missing = np.isnan(values)
+        if not missing.any():
+            continue
+        if strategy == 'climatology':
+            fill = climatology.normals[slots, climatology.columns.index(col)]
+        else:
+            before, after = _neighbours(~missing, stations)
+            has_before = before >= 0
+            previous = np.where(has_before, values[np.maximum(before, 0)], np.nan)
+            gap_start = x[np.maximum(before, 0)]
+            if strategy == 'ffill':
+                fill = previous
+                if limit is not None:
+                    fill = np.where(x - gap_start <= limit, fill, np.nan)
+            else:
+                has_after = after < len(values)
+                following = np.where(has_after, values[np.minimum(after, len(values) - 1)], np.nan)
+                gap_end = x[np.minimum(after, len(values) - 1)]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    weight = (x - gap_start) / (gap_end - gap_start)
+                fill = previous + (following - previous) * weight
+                if limit is not None:
+                    span = days[np.minimum(after, len(values) - 1)] - days[np.maximum(before, 0)]
+                    fill = np.where(span.astype('int64') - 1 <= limit, fill, np.nan)
+        filled[col] = np.where(missing, fill, values).astype(daily[col].dtype)
+    return filled
+
+def _period_keys(days, freq):
+    # Integer period number of each day
+    if freq == 'W':
+        return (days.astype('int64') + 3) // 7  # 1970-01-01 was a Thursday
+    if freq == 'M':
+        return days.astype('datetime64[M]').astype('int64')
+    if freq == 'A':
+        return days.astype('datetime64[Y]').astype('int64')
+    raise ValueError(f"freq must be one of {RESAMPLE_FREQUENCIES}")
+
+def _period_starts(keys, freq):
+    # First day of each period number
+    if freq == 'W':
+        return (keys * 7 - 3).astype('datetime64[D]')
+    unit = 'datetime64[M]' if freq == 'M' else 'datetime64[Y]'
+    return keys.astype(unit).astype('datetime64[D]')
+
+def resample(df, freqs=RESAMPLE_FREQUENCIES, columns=None):
+    """
+    Resample daily values to several frequencies at once.
+
+    The measurements are read into one (rows, columns) block and each
+    frequency's sums and counts come from a single bincount over
+    (station, period, column) keys, without sorting.
+
+    Args:
+        df: Daily frame (full, compact or from daily_calendar/fill_gaps)
+        freqs: Any of 'W' (weeks from Monday), 'M' and 'A'
+        columns: Columns to resample, by default every measurement column present
+
+    Returns:
+        Dict of frequency to a DataFrame of period means, indexed by the
+        period's first day (and station), with a `days` column counting the
+        rows in each period
+    """
+    columns = _columns(df, columns)
+    days = frame_dates(df).to_numpy().astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    days = days[valid]
+    stations, labels = _station_codes(df)
+    stations = stations[valid]
+    n_stations = len(labels) if labels is not None else 1
+    values = np.empty((len(days), len(columns)))
+    for i, col in enumerate(columns):
+        values[:, i] = df[col].to_numpy(dtype='float64')[valid]
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    n_columns = len(columns)
+
+    results = {}
+    for freq in freqs:
+        keys = _period_keys(days, freq)
+        # Group id per row from (station, period) offsets, so no sort is needed
+        first_key = keys.min() if len(keys) else 0
+        n_periods = int(keys.max() - first_key + 1) if len(keys) else 0
+        groups = stations * n_periods + (keys - first_key)
+        n_groups = n_stations * n_periods
+        flat = (groups[:, None] * n_columns + np.arange(n_columns)).ravel()
+        sums = np.bincount(flat, filled.ravel(), n_groups * n_columns).reshape(n_groups, n_columns)
+        counts = np.bincount(flat, present.ravel(), n_groups * n_columns).reshape(n_groups, n_columns)
+        rows = np.bincount(groups, minlength=n_groups)
+        used = np.flatnonzero(rows)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums[used] / counts[used]
+        group_station, group_key = np.divmod(used, max(n_periods, 1))
+        period_start = _period_starts(group_key + first_key, freq)
+
+        frame = pd.DataFrame(means, columns=columns)
+        frame.insert(0, 'date', period_start.astype('datetime64[ns]'))
+        frame['days'] = rows[used]
+        if labels is not None:
+            frame.insert(0, STATION_COLUMN, np.asarray(labels)[group_station])
+            frame = frame.set_index([STATION_COLUMN, 'date'])
+        else:
+            frame = frame.set_index('date')
+        results[freq] = frame
+    return results
+
+def completeness_report(daily, columns=None):
+    """
+    Per-column (and per-station) data completeness of a daily_calendar frame.
+
+    Returns:
+        DataFrame with the calendar days, days present, completeness (share of
+        days present), number of gaps and longest gap (days) per column
+    """
+    columns = _columns(daily, columns)
+    stations, labels = _station_codes(daily)
+    days = frame_dates(daily).to_numpy().astype('datetime64[D]')
+    continues = np.r_[False, (stations[1:] == stations[:-1])
+                      & (np.diff(days).astype('int64') == 1)]
+    n_stations = len(labels) if labels is not None else 1
+    calendar_days = np.bincount(stations, minlength=n_stations)
+
+    rows = []
+    for col in columns:
+        if 'gaps' in daily.columns:
+            missing = (daily['gaps'].to_numpy() & GAP_BITS[col]) != 0
+        else:
+            missing = np.isnan(daily[col].to_numpy(dtype='float64'))
+        starts, ends = find_runs(missing, continues)
+        run_station = stations[starts]
+        longest = np.zeros(n_stations, dtype='int64')
+        np.maximum.at(longest, run_station, ends - starts + 1)
+        present = calendar_days - np.bincount(stations, missing, n_stations).astype('int64')
+        for code in range(n_stations):
+            rows.append({
+                **({STATION_COLUMN: labels[code]} if labels is not None else {}),
+                'column': col,
+                'days': calendar_days[code],
+                'present': present[code],
+                'completeness': present[code] / calendar_days[code] if calendar_days[code] else np.nan,
+                'gaps': int(np.count_nonzero(run_station == code)),
+                'longest_gap': longest[code],
+            })
+    if labels is None:
+        return pd.DataFrame(rows).set_index('column')
+    report = pd.DataFrame(rows).set_index([STATION_COLUMN, 'column'])
+    return report.sort_index(level=STATION_COLUMN, sort_remaining=False)
+
+def main():
+    import sys
+    import time
+
+    # Synthetic multi-station input: a million rows with 2% of the
+    # measurements and 1% of the days missing
+    n_stations, n_days = 25, 40_000
+    rng = np.random.default_rng(0)
+    days = np.tile(np.arange(n_days), n_stations)
+    keep = rng.random(len(days)) > 0.01
+    df = pd.DataFrame({
+        STATION_COLUMN: np.repeat([f'station{i}' for i in range(n_stations)], n_days)[keep],
+        'date': days[keep].astype('datetime64[D]').astype('datetime64[ns]'),
+    })
+    for col in MEASUREMENT_COLUMNS:
+        values = rng.normal(10, 5, len(df)).astype('float32')
+        values[rng.random(len(df)) < 0.02] = np.nan
+        df[col] = values
+    print(f"{len(df)} rows, {n_stations} stations")
+
+    start = time.perf_counter()
+    daily = daily_calendar(df)
+    print(f"daily_calendar: {time.perf_counter() - start:.3f}s")
+    for strategy in ('linear', 'ffill'):
+        start = time.perf_counter()
+        fill_gaps(daily, strategy, limit=7)
+        print(f"fill_gaps({strategy!r}): {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    resample(daily)
+    print(f"resample(W, M, A): {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    completeness_report(daily)
+    print(f"completeness_report: {time.perf_counter() - start:.3f}s")
+    if len(sys.argv) > 1:
+        from weatherAnalysis import load_data
+        print(completeness_report(daily_calendar(load_data(sys.argv[1]))))
+
+if __name__ == "__main__":
+    main()
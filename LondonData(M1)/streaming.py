@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from weatherAnalysis import load_data_chunks
+
+class GroupMoments:
+    """
+    Per-group count, mean and M2 (sum of squared deviations) for one column.
+
+    Chunks are folded in with Chan's parallel update, so accumulators built
+    over separate parts of a file can be merged into the exact full result.
+    """
+
+    def __init__(self):
+        self.stats = pd.DataFrame(columns=['count', 'mean', 'm2'], dtype='float64')
+
+    def update(self, keys, values):
+        # Chunks hold float32 measurements; accumulate in float64
+        grouped = pd.Series(values, dtype='float64').groupby(np.asarray(keys))
+        chunk = pd.DataFrame({
+            'count': grouped.count(),
+            'mean': grouped.mean(),
+            'm2': grouped.var(ddof=0) * grouped.count(),
+        }).fillna({'m2': 0.0})
+        self._merge(chunk[chunk['count'] > 0])
+
+    def merge(self, other):
+        self._merge(other.stats)
+
+    def _merge(self, chunk):
+        left, right = self.stats.align(chunk, fill_value=0.0)
+        n = left['count'] + right['count']
+        delta = right['mean'] - left['mean']
+        self.stats = pd.DataFrame({
+            'count': n,
+            'mean': left['mean'] + delta * right['count'] / n,
+            'm2': left['m2'] + right['m2'] + delta ** 2 * left['count'] * right['count'] / n,
+        })
+
+    def mean(self):
+        return self.stats['mean']
+
+    def std(self, ddof=1):
+        return np.sqrt(self.stats['m2'] / (self.stats['count'] - ddof))
+
+class GroupMax:
+    """Per-group running maximum of one column."""
+
+    def __init__(self):
+        self.stats = pd.Series(dtype='float64')
+
+    def update(self, keys, values):
+        chunk = pd.Series(values, dtype='float64').groupby(np.asarray(keys)).max()
+        self._merge(chunk)
+
+    def merge(self, other):
+        self._merge(other.stats)
+
+    def _merge(self, chunk):
+        left, right = self.stats.align(chunk)
+        self.stats = np.fmax(left, right)
+
+class CoMoments:
+    """Running co-moments of two columns for a pairwise-complete Pearson r."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.m2_x = self.m2_y = self.c_xy = 0.0
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        mask = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[mask], y[mask]
+        if len(x) == 0:
+            return
+        chunk = CoMoments()
+        chunk.n = len(x)
+        chunk.mean_x, chunk.mean_y = x.mean(), y.mean()
+        dx, dy = x - chunk.mean_x, y - chunk.mean_y
+        chunk.m2_x, chunk.m2_y, chunk.c_xy = dx @ dx, dy @ dy, dx @ dy
+        self.merge(chunk)
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+        self.m2_x += other.m2_x + dx * dx * weight
+        self.m2_y += other.m2_y + dy * dy * weight
+        self.c_xy += other.c_xy + dx * dy * weight
+        self.mean_x += dx * other.n / n
+        self.mean_y += dy * other.n / n
+        self.n = n
+
+    def pearson(self):
+        r = self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+        # Two-sided p-value from the t distribution, as scipy's pearsonr does
+        if self.n > 2 and abs(r) < 1:
+            t = r * np.sqrt((self.n - 2) / (1 - r * r))
+            p_value = 2 * stats.t.sf(abs(t), self.n - 2)
+        else:
+            p_value = 0.0 if self.n > 2 else np.nan
+        return r, p_value
+
+def stream_analysis(file, chunksize=100_000):
+    """
+    Run the monthly trend, extreme weather and correlation analyses over a CSV
+    without loading it whole. Peak memory is bounded by `chunksize`.
+
+    Returns:
+        Tuple of (monthly_temps, correlation_stats, monthly_stats) matching the
+        data returned by analyze_monthly_temperature_trend,
+        analyze_temp_cloud_correlation and analyze_extreme_weather
+    """
+    period_temp = GroupMoments()
+    month_temp = GroupMoments()
+    month_precip = GroupMoments()
+    month_precip_max = GroupMax()
+    temp_cloud = CoMoments()
+
+    for chunk in load_data_chunks(file, chunksize):
+        periods = chunk['date'].dt.year * 12 + chunk['date'].dt.month - 1
+        months = chunk['date'].dt.month
+        period_temp.update(periods, chunk['mean_temp'])
+        month_temp.update(months, chunk['mean_temp'])
+        month_precip.update(months, chunk['precipitation'])
+        month_precip_max.update(months, chunk['precipitation'])
+        temp_cloud.update(chunk['mean_temp'], chunk['cloud_cover'])
+
+    periods = period_temp.mean().sort_index()
+    monthly_temps = pd.DataFrame({
+        'date': pd.to_datetime({'year': periods.index // 12,
+                                'month': periods.index % 12 + 1,
+                                'day': 1}),
+        'mean_temp': periods.to_numpy(),
+    })
+
+    correlation, p_value = temp_cloud.pearson()
+    correlation_stats = {
+        'correlation': correlation,
+        'correlation_strength': 'weak' if abs(correlation) < 0.3 else
+                              'moderate' if abs(correlation) < 0.7 else 'strong',
+        'p_value': p_value
+    }
+
+    monthly_stats = pd.concat({
+        ('mean_temp', 'mean'): month_temp.mean(),
+        ('mean_temp', 'std'): month_temp.std(),
+        ('precipitation', 'mean'): month_precip.mean(),
+        ('precipitation', 'max'): month_precip_max.stats,
+    }, axis=1).sort_index().round(2)
+    monthly_stats.index.name = 'date'
+
+    return monthly_temps, correlation_stats, monthly_stats
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from aggregates import AggregateCube
+
+def make_frame():
+    dates = pd.date_range('2019-01-01', '2020-12-31')
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'date': dates, 'mean_temp': rng.normal(10, 5, len(dates)),
+                         'precipitation': rng.exponential(2, len(dates))})
+
+def test_cube_matches_groupby():
+    df = make_frame()
+    cube = AggregateCube(df)
+    grouped = df.groupby(df['date'].dt.month)['mean_temp']
+    np.testing.assert_allclose(cube.mean('mean_temp'), grouped.mean())
+    np.testing.assert_allclose(cube.std('mean_temp'), grouped.std())
+    np.testing.assert_allclose(cube.stat('precipitation', 'max'),
+                               df.groupby(df['date'].dt.month)['precipitation'].max())
+
+def test_append_merges_unseen_days_and_skips_counted_ones():
+    df = make_frame()
+    # Start with a gap in the middle, then append an overlapping frame
+    cube = AggregateCube(df[(df['date'] < '2019-06-01') | (df['date'] >= '2019-09-01')])
+    assert cube.append(df) == 92
+    assert cube.append(df) == 0
+    full = AggregateCube(df)
+    for stat in ('count', 'sum', 'sumsq', 'min', 'max'):
+        pd.testing.assert_series_equal(cube.stat('mean_temp', stat, 'year_month'),
+                                       full.stat('mean_temp', stat, 'year_month'))
+
+def test_append_counts_a_date_repeated_in_one_batch_once():
+    df = make_frame()
+    cube = AggregateCube(df.iloc[:100])
+    batch = pd.concat([df.iloc[100:110], df.iloc[105:108].assign(mean_temp=99.0)])
+    assert cube.append(batch) == 10
+    assert cube.append(df.iloc[:110]) == 0
+    # The later row wins
+    expected = pd.concat([df.iloc[:105], batch.iloc[10:], df.iloc[108:110]])
+    full = AggregateCube(expected)
+    for stat in ('count', 'sum', 'sumsq', 'min', 'max'):
+        pd.testing.assert_series_equal(cube.stat('mean_temp', stat, 'day_of_year'),
+                                       full.stat('mean_temp', stat, 'day_of_year'))
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bootstrap import (_batch_pearson, _monthly_stat, block_bootstrap_indices,
+                       permutation_test_correlation, resample)
+
+def make_frame(n=1500):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2000-01-01', periods=n)
+    mean_temp = rng.normal(10, 5, n)
+    df = pd.DataFrame({'date': dates, 'mean_temp': mean_temp,
+                       'cloud_cover': 8 - 0.3 * mean_temp + rng.normal(0, 2, n)})
+    df.loc[rng.random(n) < 0.05, 'cloud_cover'] = np.nan
+    return df
+
+def test_resample_is_the_same_for_any_worker_count():
+    df = make_frame()
+    data = {'x': df['mean_temp'].to_numpy(), 'y': df['cloud_cover'].to_numpy()}
+    # More resamples than one task, so the tasks really are split across processes
+    serial = resample('correlation', data, len(df), 10, 1200, seed=3, workers=1)
+    parallel = resample('correlation', data, len(df), 10, 1200, seed=3, workers=2)
+    np.testing.assert_array_equal(serial, parallel)
+
+def test_batch_statistics_match_numpy_and_groupby():
+    df = make_frame()
+    idx = block_bootstrap_indices(len(df), 10, 20, np.random.default_rng(0))
+    x, y = df['mean_temp'].to_numpy(), df['cloud_cover'].to_numpy()
+    months = df['date'].dt.month.to_numpy()
+
+    r = _batch_pearson(x[idx], y[idx])
+    stats = _monthly_stat(idx, {'values': y, 'months': months})
+    for row, rows in enumerate(idx):
+        present = ~np.isnan(y[rows])
+        assert np.isclose(r[row], np.corrcoef(x[rows][present], y[rows][present])[0, 1])
+        grouped = pd.Series(y[rows]).groupby(months[rows]).agg(['mean', 'std'])
+        np.testing.assert_allclose(stats[row, 0], grouped['mean'].reindex(range(1, 13)))
+        np.testing.assert_allclose(stats[row, 1], grouped['std'].reindex(range(1, 13)))
+
+def test_permutation_p_value_is_in_range():
+    df = make_frame()
+    for frame in (df, df.assign(cloud_cover=np.random.default_rng(1).normal(size=len(df)))):
+        result = permutation_test_correlation(frame, n_permutations=200, block_length=10, workers=1)
+        assert 0 < result['p_value'] <= 1
+    assert result['p_value'] > 1 / 201
+
+def test_block_longer_than_the_series_is_rejected():
+    with pytest.raises(ValueError, match='block_length'):
+        block_bootstrap_indices(5, 10, 3, np.random.default_rng(0))
+    with pytest.raises(ValueError, match='block_length'):
+        permutation_test_correlation(make_frame(5), block_length=10, workers=1)
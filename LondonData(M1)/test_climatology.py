@@ -0,0 +1,24 @@
+import os
+
+import numpy as np
+import pandas as pd
+import climatology
+from climatology import Climatology
+
+def make_frame(offset):
+    dates = pd.date_range('2000-01-01', '2003-12-31')
+    season = 10 - 8 * np.cos(2 * np.pi * dates.dayofyear / 365.25)
+    return pd.DataFrame({'date': dates, 'mean_temp': season + offset})
+
+def test_load_or_fit_is_keyed_by_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(climatology, 'CACHE_DIR', str(tmp_path))
+    first = Climatology.load_or_fit(make_frame(0.0))
+    # Same date span, different values: must not reuse the first baseline
+    second = Climatology.load_or_fit(make_frame(5.0))
+    assert second.source_hash != first.source_hash
+    np.testing.assert_allclose(second.normals - first.normals, 5.0)
+
+    reloaded = Climatology.load_or_fit(make_frame(0.0))
+    np.testing.assert_array_equal(reloaded.normals, first.normals)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        f'climatology_{baseline.source_hash}.npz' for baseline in (first, second))
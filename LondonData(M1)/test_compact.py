@@ -0,0 +1,62 @@
+import os
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from aggregates import AggregateCube
+from compact import compact_frame, frame_dates, frame_months, month_categories, season_categories
+from correlation import correlation_matrix
+from date_index import DateIndex
+from events import detect_events
+from quality import resample
+from weatherAnalysis import (analyze_extreme_weather, analyze_monthly_temperature_trend,
+                             analyze_temp_cloud_correlation, load_data)
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weather_data.csv')
+
+@pytest.fixture(scope='module')
+def frames(tmp_path_factory):
+    df = load_data(CSV_PATH, cache_dir=str(tmp_path_factory.mktemp('cache')))
+    return df, compact_frame(df)
+
+def test_analyses_match_on_compact_frames(frames):
+    df, compact = frames
+    try:
+        _, full_temps = analyze_monthly_temperature_trend(df)
+        _, compact_temps = analyze_monthly_temperature_trend(compact)
+        _, full_correlation = analyze_temp_cloud_correlation(df)
+        _, compact_correlation = analyze_temp_cloud_correlation(compact)
+    finally:
+        plt.close('all')
+    pd.testing.assert_frame_equal(compact_temps, full_temps)
+    assert compact_correlation == full_correlation
+    pd.testing.assert_frame_equal(analyze_extreme_weather(compact), analyze_extreme_weather(df))
+
+def test_engines_match_on_compact_frames(frames):
+    df, compact = frames
+    full_cube, compact_cube = AggregateCube(df), AggregateCube(compact)
+    for dim in ('year_month', 'month', 'day_of_year'):
+        pd.testing.assert_series_equal(compact_cube.std('max_temp', dim),
+                                       full_cube.std('max_temp', dim))
+    pd.testing.assert_frame_equal(correlation_matrix(compact)['r'], correlation_matrix(df)['r'])
+    pd.testing.assert_frame_equal(DateIndex(compact).stats('2000-01-01', '2009-12-31'),
+                                  DateIndex(df).stats('2000-01-01', '2009-12-31'))
+    for name, events in detect_events(df).items():
+        pd.testing.assert_frame_equal(detect_events(compact)[name], events)
+    pd.testing.assert_frame_equal(resample(compact)['M'], resample(df)['M'])
+
+def test_undated_rows():
+    dates = pd.to_datetime(['2020-01-05', None, '2020-12-01']).astype('datetime64[ns]')
+    df = pd.DataFrame({'date': dates,
+                       'mean_temp': np.array([1.0, 2.0, 3.0], dtype='float32')})
+    compact = compact_frame(df)
+    assert compact['month'].isna().tolist() == [False, True, False]
+    assert compact['season'].tolist()[::2] == ['Winter', 'Winter']
+    pd.testing.assert_series_equal(frame_dates(compact), df['date'])
+    pd.testing.assert_series_equal(frame_months(compact), frame_months(df))
+    assert list(month_categories(df['date'].dt.month).isna()) == [False, True, False]
+    assert list(season_categories([12.0, np.nan]).isna()) == [False, True]
+    assert AggregateCube(compact).stat('mean_temp', 'count').tolist() == [1, 1]
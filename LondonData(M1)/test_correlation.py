@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from correlation import correlation_matrix, rolling_correlation
+
+def make_frame(n=2000):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2000-01-01', periods=n)
+    mean_temp = rng.normal(10, 5, n)
+    df = pd.DataFrame({
+        'date': dates,
+        'mean_temp': mean_temp,
+        'cloud_cover': 8 - 0.2 * mean_temp + rng.normal(0, 2, n),
+        'precipitation': rng.exponential(2, n),
+    })
+    # Different missing rows per column, so pairs use different rows
+    for col, share in (('mean_temp', 0.05), ('cloud_cover', 0.1)):
+        df.loc[rng.random(n) < share, col] = np.nan
+    return df
+
+def test_correlation_matrix_matches_corr():
+    df = make_frame()
+    columns = ['mean_temp', 'cloud_cover', 'precipitation']
+    for method in ('pearson', 'spearman'):
+        matrix = correlation_matrix(df, columns, method)
+        pd.testing.assert_frame_equal(matrix['r'], df[columns].corr(method), atol=1e-10)
+    pearson = correlation_matrix(df, columns)
+    pairs = df[['mean_temp', 'cloud_cover']].dropna()
+    r, p_value = stats.pearsonr(pairs['mean_temp'], pairs['cloud_cover'])
+    assert pearson['n'].loc['mean_temp', 'cloud_cover'] == len(pairs)
+    assert np.isclose(pearson['p'].loc['mean_temp', 'cloud_cover'], p_value, rtol=1e-6)
+
+def test_rolling_correlation_matches_pandas():
+    df = make_frame()
+    # Drop some days so the calendar window and a row window differ
+    df = df.drop(index=df.index[100:160]).reset_index(drop=True)
+    rolled = rolling_correlation(df, 'mean_temp', 'cloud_cover', window=90, min_periods=30)
+
+    pairs = df.set_index('date')[['mean_temp', 'cloud_cover']].dropna()
+    window = pairs.rolling('90D', min_periods=30)
+    expected = window['mean_temp'].corr(pairs['cloud_cover'])
+    complete = df[['mean_temp', 'cloud_cover']].notna().all(axis=1).to_numpy()
+    np.testing.assert_allclose(rolled[complete], expected.to_numpy(), atol=1e-10)
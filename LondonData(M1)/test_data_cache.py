@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+from data_cache import write_cache
+from weatherAnalysis import load_data
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weather_data.csv')
+
+def test_warm_load_is_writable(tmp_path):
+    cold = load_data(CSV_PATH, cache_dir=str(tmp_path))
+    warm = load_data(CSV_PATH, cache_dir=str(tmp_path))
+    assert cold.attrs['load_stats']['source'] == 'csv'
+    assert warm.attrs['load_stats']['source'] == 'cache'
+    pd.testing.assert_frame_equal(warm, cold, check_like=True)
+
+    warm.loc[warm.index[0], 'mean_temp'] = 99.0
+    warm['mean_temp'] += 1
+    assert warm['mean_temp'].iloc[0] == 100.0
+
+    # Writes to a warm frame never reach the cache files
+    again = load_data(CSV_PATH, cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(again, cold, check_like=True)
+
+def test_unwritable_cache_dir_still_loads(tmp_path):
+    # A cache_dir under a regular file can never be created
+    blocker = tmp_path / 'blocker'
+    blocker.write_text('')
+    df = load_data(CSV_PATH, cache_dir=str(blocker / 'cache'))
+    assert df.attrs['load_stats']['source'] == 'csv'
+    assert len(df) == len(load_data(CSV_PATH, use_cache=False))
+    assert write_cache(CSV_PATH, 'digest', df, str(blocker / 'cache')) is False
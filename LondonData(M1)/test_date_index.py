@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from date_index import DateIndex
+
+def test_stats_match_masked_agg():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2000-01-01', periods=3000)
+    df = pd.DataFrame({'date': dates, 'mean_temp': rng.normal(10, 5, len(dates)),
+                       'precipitation': rng.exponential(2, len(dates))})
+    df.loc[rng.random(len(df)) < 0.05, 'mean_temp'] = np.nan
+    # Shuffled rows for the first load, then appends after and inside the range
+    index = DateIndex(df.iloc[:2000].sample(frac=1, random_state=0))
+    index.append(df.iloc[2500:])
+    index.append(df.iloc[2000:2500])
+
+    for first, last in np.sort(rng.integers(0, len(dates), size=(50, 2)), axis=1):
+        start, end = dates[first], dates[last]
+        stats = index.stats(start, end)
+        mask = (df['date'] >= start) & (df['date'] <= end)
+        expected = df.loc[mask, index.columns].agg(['count', 'mean', 'std', 'min', 'max']).T
+        pd.testing.assert_frame_equal(stats, expected, check_dtype=False, check_names=False)
+        pd.testing.assert_frame_equal(index.frame(start, end).reset_index(drop=True),
+                                      df.loc[mask, ['date', *index.columns]].reset_index(drop=True),
+                                      check_dtype=False)
+
+def test_single_day_ranges_have_nan_std():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2020-01-01', periods=50)
+    df = pd.DataFrame({'date': dates, 'mean_temp': rng.normal(10, 5, 50).round(1)})
+    index = DateIndex(df)
+    for day, value in zip(dates, df['mean_temp']):
+        stats = index.stats(day, day).loc['mean_temp']
+        assert stats['count'] == 1 and np.isclose(stats['mean'], value)
+        assert np.isnan(stats['std'])
+
+def test_empty_index():
+    index = DateIndex(pd.DataFrame({'date': pd.to_datetime([]), 'mean_temp': []}))
+    assert index.last(30) == (None, None)
+    stats = index.stats(*index.last(30)).loc['mean_temp']
+    assert stats['count'] == 0 and np.isnan(stats['mean']) and np.isnan(stats['std'])
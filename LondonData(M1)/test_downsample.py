@@ -0,0 +1,73 @@
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.collections import PathCollection, PolyCollection
+from downsample import MAX_SCATTER_POINTS, decimate, density_scatter, lttb_indices, minmax_indices
+
+def make_series(n=20_000):
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 1000, n))
+    y = np.cumsum(rng.normal(size=n))
+    y[rng.integers(0, n, 50)] += rng.normal(0, 50, 50)  # spikes
+    y[rng.integers(0, n, 100)] = np.nan
+    return x, y
+
+def reference_lttb(x, y, n_out):
+    # Textbook LTTB over the same bucket edges, one point at a time
+    points = [(xi, yi, i) for i, (xi, yi) in enumerate(zip(x, y)) if not np.isnan(yi)]
+    n = len(points)
+    edges = [int(edge) for edge in np.linspace(1, n - 1, n_out - 1)]
+    chosen, a = [points[0][2]], 0
+    for i in range(n_out - 2):
+        bucket = range(edges[i], edges[i + 1])
+        following = points[edges[i + 1]:edges[i + 2] if i + 2 < len(edges) else n]
+        avg_x = sum(p[0] for p in following) / len(following)
+        avg_y = sum(p[1] for p in following) / len(following)
+        best, best_area = a, -1.0
+        for j in bucket:
+            area = abs((points[a][0] - avg_x) * (points[j][1] - points[a][1])
+                       - (points[a][0] - points[j][0]) * (avg_y - points[a][1]))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        chosen.append(points[a][2])
+    chosen.append(points[-1][2])
+    return sorted(set(chosen))
+
+def test_minmax_keeps_every_bin_extreme():
+    x, y = make_series()
+    n_bins = 300
+    idx = minmax_indices(x, y, n_bins)
+    assert len(idx) <= 2 * n_bins + 2 and np.all(np.diff(idx) > 0)
+    bins = np.minimum((x - x[0]) / (x[-1] - x[0]) * n_bins, n_bins - 1).astype(int)
+    frame = pd.DataFrame({'bin': bins, 'y': y}).dropna()
+    kept = frame.loc[frame.index.intersection(idx)].groupby('bin')['y'].agg(['min', 'max'])
+    pd.testing.assert_frame_equal(kept, frame.groupby('bin')['y'].agg(['min', 'max']))
+
+def test_lttb_matches_a_reference_loop():
+    x, y = make_series(3000)
+    for n_out in (3, 50, 500):
+        np.testing.assert_array_equal(lttb_indices(x, y, n_out), reference_lttb(x, y, n_out))
+
+def test_decimate_keeps_one_point_beyond_each_edge():
+    x = pd.date_range('2000-01-01', periods=5000).to_numpy()
+    y = np.arange(5000, dtype='float64')
+    xlim = (mdates.date2num(x[1000]) + 0.5, mdates.date2num(x[2000]) - 0.5)
+    for method in ('minmax', 'lttb'):
+        xs, ys = decimate(x, y, 100, method, xlim=xlim)
+        assert xs[0] == x[1000] and xs[-1] == x[2000]
+        assert ys[0] == 1000 and ys[-1] == 2000
+
+def test_density_scatter_switches_to_hexbin():
+    rng = np.random.default_rng(0)
+    fig, ax = plt.subplots()
+    try:
+        small = density_scatter(ax, *rng.normal(size=(2, MAX_SCATTER_POINTS)))
+        large = density_scatter(ax, *rng.normal(size=(2, MAX_SCATTER_POINTS + 1)))
+    finally:
+        plt.close(fig)
+    assert isinstance(small, PathCollection) and len(small.get_offsets()) == MAX_SCATTER_POINTS
+    assert isinstance(large, PolyCollection) and large.get_array().sum() == MAX_SCATTER_POINTS + 1
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from events import (EVENT_DEFINITIONS, EVENT_TABLE_COLUMNS, EventDetector, calendar_slots,
+                    day_of_year_thresholds, detect_events)
+
+def make_frame():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2001-01-01', '2008-12-31')
+    season = 10 - 8 * np.cos(2 * np.pi * dates.dayofyear / 365.25)
+    df = pd.DataFrame({
+        'date': dates,
+        'max_temp': season + 5 + rng.normal(0, 4, len(dates)),
+        'min_temp': season - 5 + rng.normal(0, 4, len(dates)),
+        'precipitation': rng.exponential(2, len(dates)) * (rng.random(len(dates)) < 0.4),
+        'snow_depth': np.where(rng.random(len(dates)) < 0.03, 2.0, 0.0),
+    })
+    df.loc[rng.random(len(df)) < 0.02, 'max_temp'] = np.nan
+    # Drop a few days so runs have to break at gaps in the record
+    return df.drop(index=df.index[[40, 41, 900, 2000]]).reset_index(drop=True)
+
+def reference_thresholds(days, values, percentile, window=7):
+    # Each calendar slot pools the days within +/- window of it in every year
+    years = days.astype('datetime64[Y]').astype('int64')
+    position = (years - years.min()) * 366 + calendar_slots(days)
+    n_years = years.max() - years.min() + 1
+    thresholds = np.full(366, np.nan)
+    for slot in range(366):
+        centres = np.arange(n_years) * 366 + slot
+        pooled = (np.abs(position[:, None] - centres) <= window).any(axis=1)
+        if np.isfinite(values[pooled]).any():
+            thresholds[slot] = np.nanpercentile(values[pooled], percentile)
+    return thresholds
+
+def reference_events(days, values, thresholds, above, min_days):
+    # Scan day by day, closing a run at a failing day or a gap in the record
+    sign = 1.0 if above else -1.0
+    events, run = [], []
+    for i, day in enumerate(days):
+        excess = sign * (values[i] - thresholds[i])
+        continues = run and day - days[run[-1]] == np.timedelta64(1, 'D')
+        if run and (not continues or not excess > 0):
+            events.append(run)
+            run = []
+        if excess > 0:
+            run.append(i)
+    if run:
+        events.append(run)
+    rows = []
+    for run in events:
+        if len(run) >= min_days:
+            excess = sign * (values[run] - thresholds[run])
+            rows.append({'start': days[run[0]], 'end': days[run[-1]], 'duration': len(run),
+                         'intensity': excess.mean(), 'peak': sign * (sign * values[run]).max()})
+    table = pd.DataFrame(rows, columns=EVENT_TABLE_COLUMNS)
+    table['start'] = table['start'].astype('datetime64[ns]')
+    table['end'] = table['end'].astype('datetime64[ns]')
+    table['duration'] = table['duration'].astype('int64')
+    return table.astype({'intensity': 'float64', 'peak': 'float64'})
+
+def test_thresholds_match_nanpercentile():
+    df = make_frame()
+    days = df['date'].to_numpy().astype('datetime64[D]')
+    values = df['max_temp'].to_numpy()
+    thresholds = day_of_year_thresholds(np.zeros(len(df), dtype='int64'), days, values, 1, 90)
+    np.testing.assert_allclose(thresholds[0], reference_thresholds(days, values, 90))
+
+def test_events_match_a_loop():
+    df = make_frame()
+    detector = EventDetector(df)
+    days = df['date'].to_numpy().astype('datetime64[D]')
+    slots = calendar_slots(days)
+    for name, spec in EVENT_DEFINITIONS.items():
+        values = df[spec['column']].to_numpy()
+        if 'percentile' in spec:
+            thresholds = reference_thresholds(days, values, spec['percentile'])[slots]
+        else:
+            thresholds = np.full(len(df), spec['value'])
+        expected = reference_events(days, values, thresholds, spec['above'], spec['min_days'])
+        assert len(expected), name
+        pd.testing.assert_frame_equal(detector.events(name), expected, check_exact=False)
+
+def test_appending_matches_one_pass():
+    df = make_frame()
+    whole = detect_events(df)
+    detector = EventDetector(df[df['date'] < '2005-01-01'], base=df)
+    for start in range(0, len(df), 97):
+        detector.append(df.iloc[start:start + 97])
+    for name, events in detector.tables().items():
+        pd.testing.assert_frame_equal(events, whole[name])
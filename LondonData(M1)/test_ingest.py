@@ -0,0 +1,41 @@
+import io
+import warnings
+
+import numpy as np
+import pandas as pd
+from ingest import FIRST_NS_DAY, LAST_NS_DAY, parse_date_column, parse_yyyymmdd, read_weather_csv
+
+def reference(values):
+    # pandas' format parser, limited to the datetime64[ns] range of the result
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        parsed = pd.to_datetime(pd.Series(values), format='%Y%m%d', errors='coerce')
+    in_range = (parsed >= pd.Timestamp(FIRST_NS_DAY)) & (parsed <= pd.Timestamp(LAST_NS_DAY))
+    return parsed.where(in_range).astype('datetime64[ns]')
+
+def test_parse_yyyymmdd_matches_to_datetime():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        np.arange(19790101, 19800101),                                 # valid and impossible days
+        [20000229, 19000229, 16770921, 16770922, 22620411, 22620412,  # leap days and range edges
+         99991231, 10000101, -19790101, 1e9, np.nan, np.inf],
+        np.arange(1979000, 1980000),                                   # seven digits
+        np.arange(197900, 198000),                                     # six digits
+        rng.uniform(19790101, 19800101, 1000),                         # fractional
+        rng.integers(100_000, 100_000_000, 10_000),
+    ]).astype('float64')
+    parsed = pd.Series(parse_yyyymmdd(values))
+    pd.testing.assert_series_equal(parsed, reference(values))
+
+def test_text_dates_are_coerced_like_numbers():
+    dates = pd.Series(['19790101', '1979011', 'garbage', '99991231', None])
+    expected = pd.Series(pd.to_datetime(['1979-01-01', '1979-01-01', None, None, None]))
+    pd.testing.assert_series_equal(parse_date_column(dates), expected.astype('datetime64[ns]'))
+
+def test_read_weather_csv_types_columns_and_falls_back():
+    typed = read_weather_csv(io.StringIO('date,mean_temp\n19790101,1.5\n19790102,\n'))
+    assert typed['date'].dtype == 'int32' and typed['mean_temp'].dtype == 'float32'
+    # A malformed measurement breaks the typed read; it is coerced to NaN instead
+    fallback = read_weather_csv(io.StringIO('date,mean_temp\n19790101,1.5\n19790102,n/a?\n'))
+    assert fallback['mean_temp'].dtype == 'float32'
+    assert fallback['mean_temp'].isna().tolist() == [False, True]
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from quality import MISSING_DAY, daily_calendar, fill_gaps, resample
+
+def make_frame():
+    rng = np.random.default_rng(0)
+    frames = []
+    for station, start in (('a', '2010-01-01'), ('b', '2010-03-15')):
+        dates = pd.date_range(start, periods=800)
+        keep = rng.random(len(dates)) > 0.05
+        frame = pd.DataFrame({'station': station, 'date': dates[keep],
+                              'mean_temp': rng.normal(10, 5, keep.sum()),
+                              'precipitation': rng.exponential(2, keep.sum())})
+        frame.loc[rng.random(len(frame)) < 0.05, 'mean_temp'] = np.nan
+        frames.append(frame)
+    # Shuffled, as rows arrive from Firestore
+    return pd.concat(frames).sample(frac=1, random_state=0).reset_index(drop=True)
+
+def reindexed(df):
+    # Every station on its own complete calendar, via a pandas reindex
+    parts = []
+    for station, group in df.groupby('station'):
+        group = group.set_index('date').sort_index()
+        calendar = pd.date_range(group.index.min(), group.index.max(), name='date')
+        part = group.reindex(calendar)
+        part['station'] = station
+        parts.append(part.reset_index())
+    return pd.concat(parts, ignore_index=True)
+
+def test_daily_calendar_matches_reindex():
+    df = make_frame()
+    daily = daily_calendar(df)
+    expected = reindexed(df)
+    pd.testing.assert_frame_equal(daily[['date', 'station', 'mean_temp', 'precipitation']],
+                                  expected[['date', 'station', 'mean_temp', 'precipitation']],
+                                  check_dtype=False)
+    absent = expected['precipitation'].isna().to_numpy()
+    np.testing.assert_array_equal((daily['gaps'] & MISSING_DAY) != 0, absent)
+
+def test_fill_gaps_matches_interpolate():
+    daily = daily_calendar(make_frame())
+    for strategy, limit in (('linear', None), ('time', None), ('linear', 3), ('ffill', 2)):
+        filled = fill_gaps(daily, strategy, limit=limit)
+        expected = []
+        for _, group in daily.groupby('station'):
+            values = group.set_index('date')['mean_temp']
+            if strategy == 'ffill':
+                expected.append(values.ffill(limit=limit))
+            elif limit is None:
+                expected.append(values.interpolate(strategy, limit_area='inside'))
+            else:
+                # Only gaps of at most `limit` days are filled, and then entirely
+                run = values.isna().ne(values.isna().shift()).cumsum()
+                length = values.isna().groupby(run).transform('sum')
+                interpolated = values.interpolate(strategy, limit_area='inside')
+                expected.append(interpolated.where(values.notna() | (length <= limit)))
+        np.testing.assert_allclose(filled['mean_temp'], pd.concat(expected).to_numpy())
+
+def test_resample_matches_groupby():
+    df = make_frame()
+    results = resample(df, columns=['mean_temp', 'precipitation'])
+    for freq, rule in (('W', 'W-SUN'), ('M', 'M'), ('A', 'Y')):
+        periods = df['date'].dt.to_period(rule).dt.start_time.astype('datetime64[ns]').rename('date')
+        grouped = df.groupby(['station', periods])
+        expected = grouped[['mean_temp', 'precipitation']].mean()
+        expected['days'] = grouped.size()
+        pd.testing.assert_frame_equal(results[freq], expected, check_dtype=False)
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from streaming import stream_analysis
+from weatherAnalysis import load_data
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weather_data.csv')
+
+def test_stream_analysis_matches_pandas(tmp_path):
+    # Chunks much smaller than the file, so the merges are exercised
+    monthly_temps, correlation_stats, monthly_stats = stream_analysis(CSV_PATH, chunksize=1000)
+    df = load_data(CSV_PATH, cache_dir=str(tmp_path))
+    temps = df['mean_temp'].astype('float64')
+
+    expected = temps.groupby(df['date'].dt.to_period('M').dt.to_timestamp()).mean()
+    np.testing.assert_array_equal(monthly_temps['date'], expected.index)
+    np.testing.assert_allclose(monthly_temps['mean_temp'], expected.to_numpy())
+
+    pairs = df[['mean_temp', 'cloud_cover']].astype('float64').dropna()
+    r, p_value = stats.pearsonr(pairs['mean_temp'], pairs['cloud_cover'])
+    assert np.isclose(correlation_stats['correlation'], r)
+    assert np.isclose(correlation_stats['p_value'], p_value, rtol=1e-6, atol=1e-300)
+
+    measurements = df[['mean_temp', 'precipitation']].astype('float64')
+    expected = measurements.groupby(df['date'].dt.month.rename('date')).agg({
+        'mean_temp': ['mean', 'std'],
+        'precipitation': ['mean', 'max']
+    }).round(2)
+    pd.testing.assert_frame_equal(monthly_stats, expected, check_names=False,
+                                  check_index_type=False, atol=0.011)
@@ -2,44 +2,80 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
-import scipy.stats as stats
+import time
+from data_cache import CACHE_DIR, source_hash, read_cache, write_cache
+from ingest import read_weather_csv, parse_date_column, coerce_weather_dtypes
+from compact import frame_months, frame_month_starts
+from downsample import plot_decimated, density_scatter, MAX_SCATTER_POINTS
+from correlation import correlation_matrix, pair_stats
 
-def load_data(file):
+def clean_data(df):
+    # Convert the YYYYMMDD 'date' column to datetime, coercing invalid dates to NaT
+    df['date'] = parse_date_column(df['date'])
+    
+    # Convert 'mean_temp' column to numeric, coercing errors to NaN
+    df['mean_temp'] = pd.to_numeric(df['mean_temp'], errors='coerce')
+    
+    # Drop rows with NaN values in 'mean_temp' or 'date' columns
+    df.dropna(subset=['mean_temp', 'date'], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+def load_data_chunks(file, chunksize=100_000):
+    # Yield cleaned frames of at most `chunksize` rows so memory stays bounded
+    for chunk in pd.read_csv(file, chunksize=chunksize, low_memory=False):
+        yield clean_data(coerce_weather_dtypes(chunk))
+
+def load_data(file, use_cache=True, cache_dir=CACHE_DIR, use_pyarrow=False):
     try:
-        # Load the data with low_memory=False to handle mixed types
-        df = pd.read_csv(file, low_memory=False)
+        start = time.perf_counter()
         
-        # Convert 'date' column to datetime with the correct format
-        df['date'] = pd.to_datetime(df['date'], format='%Y%m%d', errors='coerce')
+        # Serve already-typed columns from the on-disk cache when the source is unchanged
+        if use_cache:
+            digest = source_hash(file)
+            df = read_cache(file, digest, cache_dir)
+            if df is not None:
+                df.attrs['load_stats'] = {'source': 'cache', 'seconds': time.perf_counter() - start}
+                return df
         
-        # Convert 'mean_temp' column to numeric, coercing errors to NaN
-        df['mean_temp'] = pd.to_numeric(df['mean_temp'], errors='coerce')
+        # Load the data with the known column dtypes declared up front
+        df = clean_data(read_weather_csv(file, use_pyarrow=use_pyarrow))
         
-        # Drop rows with NaN values in 'mean_temp' or 'date' columns
-        df.dropna(subset=['mean_temp', 'date'], inplace=True)
+        if use_cache:
+            write_cache(file, digest, df, cache_dir)
         
+        df.attrs['load_stats'] = {'source': 'csv', 'seconds': time.perf_counter() - start}
         return df
     except Exception as e:
         print(f"Error loading data: {str(e)}")
         return pd.DataFrame()
 
-def analyze_monthly_temperature_trend(df):
-    # Calculate monthly average temperatures
-    monthly_temps = df.groupby(df['date'].dt.to_period('M'))['mean_temp'].mean().reset_index()
-    monthly_temps['date'] = monthly_temps['date'].dt.to_timestamp()
+def analyze_monthly_temperature_trend(df, cube=None):
+    # Calculate monthly average temperatures (works on full or compact frames),
+    # reading them from a prebuilt AggregateCube when one is passed
+    if cube is not None:
+        monthly_temps = cube.monthly_temps()
+    else:
+        # Aggregate in float64; float32 values would show binary noise (24.299999)
+        temps = df['mean_temp'].astype('float64')
+        monthly_temps = temps.groupby(frame_month_starts(df)).mean().reset_index()
     
     # Create figure with better styling for web display
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     
-    # Plot 1: Overall trend
-    sns.lineplot(data=monthly_temps, x='date', y='mean_temp', marker='o', ax=ax1)
+    # Plot 1: Overall trend, decimated to the axis width so long histories
+    # don't draw more points than there are pixels
+    plot_decimated(ax1, monthly_temps['date'], monthly_temps['mean_temp'], marker='o')
     ax1.set_title('Average Monthly Temperature Trend in London', pad=20)
     ax1.set_xlabel('Date')
     ax1.set_ylabel('Mean Temperature (°C)')
     ax1.grid(True)
     
     # Plot 2: Seasonal pattern
-    seasonal_pattern = df.groupby(df['date'].dt.month)['mean_temp'].mean()
+    if cube is not None:
+        seasonal_pattern = cube.mean('mean_temp', 'month')
+    else:
+        seasonal_pattern = temps.groupby(frame_months(df)).mean()
     sns.barplot(x=seasonal_pattern.index, y=seasonal_pattern.values, ax=ax2)
     ax2.set_title('Average Temperature by Month (Seasonal Pattern)', pad=20)
     ax2.set_xlabel('Month')
@@ -50,23 +86,35 @@ def analyze_monthly_temperature_trend(df):
     plt.tight_layout()
     return fig, monthly_temps
 
-def analyze_temp_cloud_correlation(df):
-    # Calculate correlation between mean temperature and cloud cover
-    correlation = df['mean_temp'].corr(df['cloud_cover'])
+def analyze_temp_cloud_correlation(df, matrix=None):
+    # Calculate correlation between mean temperature and cloud cover, reading
+    # r and its p-value from a prebuilt correlation_matrix when one is passed
+    if matrix is None:
+        matrix = correlation_matrix(df, columns=['mean_temp', 'cloud_cover'])
+    pair = pair_stats(matrix, 'mean_temp', 'cloud_cover')
+    correlation = pair['correlation']
     
     # Create figure with multiple plots
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
     
-    # Scatter plot with regression line
-    sns.regplot(x='mean_temp', y='cloud_cover', data=df, 
-                scatter_kws={'alpha':0.5}, line_kws={'color': 'red'}, ax=ax1)
+    # Scatter plot with regression line, over the days where both values are
+    # present (the same rows the correlation uses); large frames are drawn as
+    # a hexbin density and skip the bootstrapped confidence band
+    pairs = df[['mean_temp', 'cloud_cover']].dropna()
+    if len(pairs) > MAX_SCATTER_POINTS:
+        density_scatter(ax1, pairs['mean_temp'], pairs['cloud_cover'])
+        sns.regplot(x='mean_temp', y='cloud_cover', data=pairs, scatter=False, ci=None,
+                    line_kws={'color': 'red'}, ax=ax1)
+    else:
+        sns.regplot(x='mean_temp', y='cloud_cover', data=pairs, 
+                    scatter_kws={'alpha':0.5}, line_kws={'color': 'red'}, ax=ax1)
     ax1.set_title(f'Mean Temperature vs Cloud Cover\nCorrelation: {correlation:.3f}')
     ax1.set_xlabel('Mean Temperature (°C)')
     ax1.set_ylabel('Cloud Cover (units)')
     
     # Correlation heatmap
-    correlation_matrix = df[['mean_temp', 'cloud_cover']].corr()
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', ax=ax2)
+    heatmap = matrix['r'].loc[['mean_temp', 'cloud_cover'], ['mean_temp', 'cloud_cover']]
+    sns.heatmap(heatmap, annot=True, cmap='coolwarm', ax=ax2)
     ax2.set_title('Correlation Heatmap')
     
     plt.tight_layout()
@@ -76,14 +124,19 @@ def analyze_temp_cloud_correlation(df):
         'correlation': correlation,
         'correlation_strength': 'weak' if abs(correlation) < 0.3 else 
                               'moderate' if abs(correlation) < 0.7 else 'strong',
-        'p_value': stats.pearsonr(df['mean_temp'], df['cloud_cover'])[1]
+        'p_value': pair['p_value']
     }
     
     return fig, correlation_stats
 
-def analyze_extreme_weather(df):
-    # Group by month and calculate statistics
-    monthly_stats = df.groupby(df['date'].dt.month).agg({
+def analyze_extreme_weather(df, cube=None):
+    if cube is not None:
+        return cube.monthly_stats()
+    
+    # Group by month and calculate statistics, upcasting the float32
+    # measurements first so the rounded table shows 24.3 rather than 24.299999
+    measurements = df[['mean_temp', 'precipitation']].astype('float64')
+    monthly_stats = measurements.groupby(frame_months(df)).agg({
         'mean_temp': ['mean', 'std'],
         'precipitation': ['mean', 'max']
     }).round(2)